@@ -0,0 +1,229 @@
+"""Generates synthetic FileDescriptorSets, to measure how sabledocs scales with the size and the shape of the contracts.
+
+The generated descriptors are deterministic: the same parameters and seed always produce the same bytes.
+
+Usage, from the root of the repository:
+    python benchmarks/descriptor_generator.py output.pb [--packages N] [--files-per-package N] ...
+"""
+import argparse
+import random
+
+from google.protobuf.descriptor_pb2 import (
+    DescriptorProto,
+    FieldDescriptorProto,
+    FileDescriptorProto,
+    FileDescriptorSet,
+    SourceCodeInfo)
+
+# The field numbers used in the paths of the source code locations (see descriptor.proto).
+FILE_PACKAGE = 2
+FILE_MESSAGE_TYPE = 4
+FILE_ENUM_TYPE = 5
+FILE_SERVICE = 6
+MESSAGE_FIELD = 2
+MESSAGE_NESTED_TYPE = 3
+MESSAGE_ENUM_TYPE = 4
+ENUM_VALUE = 2
+SERVICE_METHOD = 2
+
+SCALAR_TYPES = [
+    FieldDescriptorProto.TYPE_STRING,
+    FieldDescriptorProto.TYPE_INT32,
+    FieldDescriptorProto.TYPE_INT64,
+    FieldDescriptorProto.TYPE_BOOL,
+    FieldDescriptorProto.TYPE_DOUBLE,
+    FieldDescriptorProto.TYPE_BYTES]
+
+WORDS = [
+    "the", "resource", "name", "of", "request", "response", "value", "field", "is", "a", "list", "used", "to",
+    "identify", "project", "when", "this", "set", "returns", "all", "entries", "for", "given", "`parent`", "**must**",
+    "be", "unique", "within", "operation", "optional", "output", "only", "format", "timestamp", "page", "token"]
+
+
+class GeneratorOptions:
+    def __init__(
+            self,
+            packages=10,
+            files_per_package=2,
+            messages_per_file=10,
+            fields_per_message=8,
+            nesting_depth=1,
+            map_fields=1,
+            oneofs=1,
+            enums_per_file=2,
+            services_per_file=1,
+            methods_per_service=5,
+            comment_lines=2,
+            seed=0):
+        self.packages = packages
+        self.files_per_package = files_per_package
+        self.messages_per_file = messages_per_file
+        self.fields_per_message = fields_per_message
+        # The depth of the nested messages under every top level message. (0 means no nested messages.)
+        self.nesting_depth = nesting_depth
+        # The number of map fields and oneofs in every message.
+        self.map_fields = map_fields
+        self.oneofs = oneofs
+        self.enums_per_file = enums_per_file
+        self.services_per_file = services_per_file
+        self.methods_per_service = methods_per_service
+        # The number of lines in the comment of every element.
+        self.comment_lines = comment_lines
+        self.seed = seed
+
+
+class DescriptorGenerator:
+    def __init__(self, options: GeneratorOptions):
+        self.options = options
+        self.random = random.Random(options.seed)
+        # The full names of the top level messages generated so far, which can be referenced by the fields.
+        self.message_names: list[str] = []
+        self.enum_names: list[str] = []
+
+    def comment(self) -> str:
+        lines = []
+        for _ in range(self.options.comment_lines):
+            lines.append(" " + " ".join(self.random.choice(WORDS) for _ in range(12)))
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def add_location(self, file: FileDescriptorProto, path: list[int]):
+        location = file.source_code_info.location.add()
+        location.path.extend(path)
+        # The span is [start line, start column, end column], only the line is used by sabledocs.
+        location.span.extend([len(file.source_code_info.location), 0, 1])
+        location.leading_comments = self.comment()
+
+    def add_field(self, file: FileDescriptorProto, message: DescriptorProto, path: list[int], name: str, number: int):
+        field = message.field.add()
+        field.name = name
+        field.number = number
+        field.json_name = name
+        kind = self.random.random()
+        if kind < 0.2 and self.message_names:
+            field.type = FieldDescriptorProto.TYPE_MESSAGE
+            field.type_name = "." + self.random.choice(self.message_names)
+        elif kind < 0.3 and self.enum_names:
+            field.type = FieldDescriptorProto.TYPE_ENUM
+            field.type_name = "." + self.random.choice(self.enum_names)
+        else:
+            field.type = self.random.choice(SCALAR_TYPES)
+        field.label = FieldDescriptorProto.LABEL_REPEATED if self.random.random() < 0.2 else FieldDescriptorProto.LABEL_OPTIONAL
+        self.add_location(file, path + [MESSAGE_FIELD, len(message.field) - 1])
+        return field
+
+    def add_map_field(self, file: FileDescriptorProto, message: DescriptorProto, path: list[int], full_name: str, index: int, number: int):
+        entry = message.nested_type.add()
+        entry.name = f"Labels{index}Entry"
+        entry.options.map_entry = True
+        for (entry_number, entry_field_name) in [(1, "key"), (2, "value")]:
+            entry_field = entry.field.add()
+            entry_field.name = entry_field_name
+            entry_field.number = entry_number
+            entry_field.type = FieldDescriptorProto.TYPE_STRING
+            entry_field.label = FieldDescriptorProto.LABEL_OPTIONAL
+
+        field = message.field.add()
+        field.name = f"labels_{index}"
+        field.number = number
+        field.type = FieldDescriptorProto.TYPE_MESSAGE
+        field.type_name = f".{full_name}.{entry.name}"
+        field.label = FieldDescriptorProto.LABEL_REPEATED
+        self.add_location(file, path + [MESSAGE_FIELD, len(message.field) - 1])
+
+    def fill_message(self, file: FileDescriptorProto, message: DescriptorProto, path: list[int], full_name: str, depth: int):
+        self.add_location(file, path)
+        number = 1
+        for i in range(self.options.fields_per_message):
+            self.add_field(file, message, path, f"field_{i}", number)
+            number += 1
+
+        for i in range(self.options.map_fields):
+            self.add_map_field(file, message, path, full_name, i, number)
+            number += 1
+
+        for i in range(self.options.oneofs):
+            message.oneof_decl.add().name = f"choice_{i}"
+            for j in range(2):
+                field = self.add_field(file, message, path, f"choice_{i}_option_{j}", number)
+                field.label = FieldDescriptorProto.LABEL_OPTIONAL
+                field.oneof_index = len(message.oneof_decl) - 1
+                number += 1
+
+        if depth < self.options.nesting_depth:
+            nested = message.nested_type.add()
+            nested.name = f"Nested{depth}"
+            self.fill_message(
+                file, nested, path + [MESSAGE_NESTED_TYPE, len(message.nested_type) - 1], f"{full_name}.{nested.name}", depth + 1)
+
+    def generate_file(self, package_name: str, file_index: int) -> FileDescriptorProto:
+        file = FileDescriptorProto()
+        file.name = f"{package_name.replace('.', '/')}/file_{file_index}.proto"
+        file.package = package_name
+        file.syntax = "proto3"
+        file.source_code_info.CopyFrom(SourceCodeInfo())
+        if file_index == 0:
+            self.add_location(file, [FILE_PACKAGE])
+
+        for i in range(self.options.enums_per_file):
+            enum = file.enum_type.add()
+            enum.name = f"Enum{file_index}_{i}"
+            self.add_location(file, [FILE_ENUM_TYPE, i])
+            for j in range(4):
+                value = enum.value.add()
+                value.name = f"{enum.name.upper()}_VALUE_{j}"
+                value.number = j
+                self.add_location(file, [FILE_ENUM_TYPE, i, ENUM_VALUE, j])
+            self.enum_names.append(f"{package_name}.{enum.name}")
+
+        file_messages = []
+        for i in range(self.options.messages_per_file):
+            message = file.message_type.add()
+            message.name = f"Message{file_index}_{i}"
+            full_name = f"{package_name}.{message.name}"
+            self.fill_message(file, message, [FILE_MESSAGE_TYPE, i], full_name, 0)
+            file_messages.append(full_name)
+            self.message_names.append(full_name)
+
+        for i in range(self.options.services_per_file):
+            service = file.service.add()
+            service.name = f"Service{file_index}_{i}"
+            self.add_location(file, [FILE_SERVICE, i])
+            for j in range(self.options.methods_per_service):
+                method = service.method.add()
+                method.name = f"Method{j}"
+                method.input_type = "." + self.random.choice(file_messages or self.message_names)
+                method.output_type = "." + self.random.choice(file_messages or self.message_names)
+                self.add_location(file, [FILE_SERVICE, i, SERVICE_METHOD, j])
+
+        return file
+
+    def generate(self) -> FileDescriptorSet:
+        fds = FileDescriptorSet()
+        for p in range(self.options.packages):
+            package_name = f"synthetic.group{p % 5}.package{p}.v1"
+            for f in range(self.options.files_per_package):
+                fds.file.append(self.generate_file(package_name, f))
+        return fds
+
+
+def generate_descriptor_set(options: GeneratorOptions) -> bytes:
+    return DescriptorGenerator(options).generate().SerializeToString(deterministic=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output_file")
+    defaults = GeneratorOptions()
+    for name, value in vars(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value)
+    args = parser.parse_args()
+
+    options = GeneratorOptions(**{k: v for k, v in vars(args).items() if k != "output_file"})
+    content = generate_descriptor_set(options)
+    with open(args.output_file, 'wb') as fh:
+        fh.write(content)
+    print(f"Written {args.output_file}, {len(content) / 1024:.1f} KB.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Measures the memory retained by the parsed model of a synthetic descriptor, and reports it per message field.
+To compare two versions, the benchmark can be run on both of them, with the same parameters.
+
+Usage, from the root of the repository:
+    python benchmarks/model_memory_benchmark.py [--packages N] [--messages-per-file N] [--fields-per-message N] [--comment-lines N]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import tempfile
+import tracemalloc
+
+from descriptor_generator import GeneratorOptions, generate_descriptor_set
+
+from sabledocs.comments_parser import CommentsParser
+from sabledocs.markdown_converter import _converters
+from sabledocs.proto_descriptor_parser import parse_proto_descriptor
+from sabledocs.sable_config import SableConfig
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=50)
+    parser.add_argument("--messages-per-file", type=int, default=20)
+    parser.add_argument("--fields-per-message", type=int, default=20)
+    parser.add_argument("--comment-lines", type=int, default=2)
+    args = parser.parse_args()
+
+    options = GeneratorOptions(
+        packages=args.packages,
+        messages_per_file=args.messages_per_file,
+        fields_per_message=args.fields_per_message,
+        comment_lines=args.comment_lines)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        descriptor_file = os.path.join(work_dir, "descriptor.pb")
+        with open(descriptor_file, 'wb') as fh:
+            fh.write(generate_descriptor_set(options))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            sable_config = SableConfig(os.path.join(work_dir, "nonexistent.toml"))
+            sable_config.input_descriptor_file = descriptor_file
+            sable_config.comments_parser = CommentsParser()
+
+            gc.collect()
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            sable_context = parse_proto_descriptor(sable_config)
+            # Only the memory retained by the model is counted, the Markdown cache and the temporary objects of the parsing
+            # are freed.
+            _converters.clear()
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+
+    fields = sum(len(m.fields) for m in sable_context.all_messages)
+    print(f"Messages: {len(sable_context.all_messages)}, fields: {fields}")
+    print(f"Memory retained by the model: {retained / 1024 / 1024:.1f} MB, {retained / fields:.0f} bytes per field")
+
+
+if __name__ == '__main__':
+    main()
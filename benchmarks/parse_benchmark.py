@@ -0,0 +1,81 @@
+"""Measures the time and the memory allocations of parsing a descriptor, and of building the source location maps, which is
+part of the parsing. To compare two versions, the benchmark can be run on both of them, with the same parameters.
+
+Usage, from the root of the repository:
+    python benchmarks/parse_benchmark.py [--descriptor sample/google-cloud-sdk.pb] [--repeat N]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import time
+import tracemalloc
+
+from google.protobuf.descriptor_pb2 import FileDescriptorSet
+
+from sabledocs.comments_parser import CommentsParser
+from sabledocs.instrumentation import enable_instrumentation
+from sabledocs.markdown_converter import _converters
+from sabledocs.proto_descriptor_parser import build_location_map, parse_proto_descriptor
+from sabledocs.sable_config import SableConfig
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sample")
+
+
+def parse(sable_config: SableConfig):
+    # The Markdown cache is cleared, so every run converts the same comments.
+    _converters.clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parse_proto_descriptor(sable_config)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--descriptor", default=os.path.join(SAMPLE_DIR, "google-cloud-sdk.pb"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sable_config = SableConfig()
+    sable_config.input_descriptor_file = args.descriptor
+    sable_config.comments_parser = CommentsParser()
+
+    # The first run warms up the imports and the regex caches.
+    parse(sable_config)
+
+    timings = []
+    location_map_timings = []
+    for _ in range(args.repeat):
+        instrumentation = enable_instrumentation()
+        gc.collect()
+        start = time.perf_counter()
+        parse(sable_config)
+        timings.append(time.perf_counter() - start)
+        location_map_timings.append(instrumentation.phases["build_location_map"].seconds)
+
+    # The allocations are measured in separate runs, since tracing slows down the parsing.
+    gc.collect()
+    tracemalloc.start()
+    sable_context = parse(sable_config)
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with open(args.descriptor, 'rb') as fh:
+        files = FileDescriptorSet.FromString(fh.read()).file
+    gc.collect()
+    tracemalloc.start()
+    location_maps = [build_location_map(f.source_code_info) for f in files]
+    (location_maps_size, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    locations = sum(len(f.source_code_info.location) for f in files)
+
+    print(f"Descriptor: {args.descriptor}")
+    print(f"Packages: {len(sable_context.packages)}, messages: {len(sable_context.all_messages)}, enums: {len(sable_context.all_enums)}")
+    print(f"Parse time: {min(timings) * 1000:.1f} ms (best of {args.repeat})")
+    print(f"Building the location maps: {min(location_map_timings) * 1000:.1f} ms (best of {args.repeat})")
+    print(f"Peak memory allocated while parsing: {peak / 1024 / 1024:.1f} MB")
+    print(f"Memory of the location maps of {len(location_maps)} files: {location_maps_size / 1024 / 1024:.2f} MB for {locations} locations")
+
+
+if __name__ == '__main__':
+    main()
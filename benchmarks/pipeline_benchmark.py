@@ -0,0 +1,194 @@
+"""Measures the time of every stage of the documentation generation, on synthetic descriptors of different shapes, and on
+the sample descriptors of the repository. The results are printed as a table, and can be written to a JSON file, so the
+results of different versions can be compared.
+
+Usage, from the root of the repository:
+    python benchmarks/pipeline_benchmark.py [--scenarios small,medium,large] [--repeat N] [--output results.json]
+
+Two result files can be compared with:
+    python benchmarks/pipeline_benchmark.py --compare before.json after.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from importlib.metadata import PackageNotFoundError, version
+
+from descriptor_generator import GeneratorOptions, generate_descriptor_set
+
+from sabledocs.__main__ import create_jinja_environments, get_template_base_dir
+from sabledocs.comments_parser import CommentsParser
+from sabledocs.lunr_search import build_search_index
+from sabledocs.markdown_converter import _converters
+from sabledocs.output_writer import OutputDirectoryWriter
+from sabledocs.page_renderer import Page, RenderState, package_output_file, render_page
+from sabledocs.proto_descriptor_parser import add_package_references, parse_proto_descriptor
+from sabledocs.sable_config import SableConfig
+from sabledocs.static_assets import sync_static_content
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sample")
+
+SCENARIOS = {
+    "small": GeneratorOptions(packages=5, files_per_package=1, messages_per_file=10),
+    "medium": GeneratorOptions(packages=50, files_per_package=2, messages_per_file=10),
+    "large": GeneratorOptions(packages=200, files_per_package=3, messages_per_file=15),
+    "deep-nesting": GeneratorOptions(packages=20, messages_per_file=5, nesting_depth=6),
+    "maps-and-oneofs": GeneratorOptions(packages=20, messages_per_file=10, map_fields=4, oneofs=4),
+    "long-comments": GeneratorOptions(packages=20, messages_per_file=10, comment_lines=20),
+    "many-services": GeneratorOptions(packages=20, messages_per_file=10, services_per_file=5, methods_per_service=20),
+    "sample-google-cloud-sdk": os.path.join(SAMPLE_DIR, "google-cloud-sdk.pb"),
+    "sample-descriptor": os.path.join(SAMPLE_DIR, "descriptor.pb"),
+}
+
+# The large scenario takes minutes, so it's only run if it's explicitly selected.
+DEFAULT_SCENARIOS = [name for name in SCENARIOS if name != "large"]
+
+STAGES = ["parse_proto_descriptor", "add_package_references", "build_search_index", "render_packages", "static_copy"]
+
+
+def measure(func, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings), "runs": timings}
+
+
+def create_config(descriptor_file: str, output_dir: str) -> SableConfig:
+    sable_config = SableConfig("nonexistent.toml")
+    sable_config.input_descriptor_file = descriptor_file
+    sable_config.output_dir = output_dir
+    sable_config.comments_parser = CommentsParser()
+    return sable_config
+
+
+def benchmark_descriptor(name: str, descriptor_file: str, work_dir: str, repeat: int) -> dict:
+    output_dir = os.path.join(work_dir, "output")
+    sable_config = create_config(descriptor_file, output_dir)
+    template_base_dir = get_template_base_dir(sable_config)
+
+    def parse():
+        # The Markdown conversions are cached in memory, the cache is cleared to measure a cold parse on every run.
+        _converters.clear()
+        return parse_proto_descriptor(sable_config)
+
+    stages = {}
+    stages["parse_proto_descriptor"] = measure(parse, repeat)
+    sable_context = parse()
+
+    all_services = [s for p in sable_context.packages for s in p.services]
+    stages["add_package_references"] = measure(
+        lambda: add_package_references(sable_context.all_messages, all_services, sable_context.packages, sable_config.hidden_packages),
+        repeat)
+
+    stages["build_search_index"] = measure(lambda: build_search_index(sable_context), repeat)
+
+    (jinja_env, jinja_extra_env) = create_jinja_environments(sable_config, template_base_dir)
+    render_state = RenderState(sable_config, sable_context, jinja_env, jinja_extra_env, "")
+    pages = [Page(package_output_file(p.name), "package", p.name) for p in sable_context.non_hidden_packages]
+    stages["render_packages"] = measure(lambda: [render_page(render_state, p) for p in pages], repeat)
+
+    def static_copy():
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir)
+        sync_static_content(sable_config, template_base_dir, OutputDirectoryWriter(output_dir))
+
+    stages["static_copy"] = measure(static_copy, repeat)
+
+    return {
+        "name": name,
+        "descriptor_size": os.path.getsize(descriptor_file),
+        "packages": len(sable_context.packages),
+        "messages": len(sable_context.all_messages),
+        "enums": len(sable_context.all_enums),
+        "services": len(all_services),
+        "stages": stages,
+    }
+
+
+def environment_info() -> dict:
+    try:
+        sabledocs_version = version("sabledocs")
+    except PackageNotFoundError:
+        sabledocs_version = "unknown"
+
+    return {
+        "sabledocs_version": sabledocs_version,
+        "python_version": sys.version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def print_results(results: list[dict]):
+    print(f"{'scenario':<26} {'packages':>9} {'messages':>9} " + " ".join(f"{s:>23}" for s in STAGES))
+    for r in results:
+        print(f"{r['name']:<26} {r['packages']:>9} {r['messages']:>9} " + " ".join(f"{r['stages'][s]['min']:>23.4f}" for s in STAGES))
+
+
+def compare(before_file: str, after_file: str):
+    with open(before_file, mode='r', encoding='utf-8') as fh:
+        before = {r["name"]: r for r in json.load(fh)["results"]}
+    with open(after_file, mode='r', encoding='utf-8') as fh:
+        after = {r["name"]: r for r in json.load(fh)["results"]}
+
+    print(f"{'scenario':<26} {'stage':<24} {'before (s)':>11} {'after (s)':>11} {'change':>9}")
+    for name in [n for n in before if n in after]:
+        for stage in STAGES:
+            b = before[name]["stages"][stage]["min"]
+            a = after[name]["stages"][stage]["min"]
+            change = f"{(a - b) / b * 100:+.1f}%" if b > 0 else "-"
+            print(f"{name:<26} {stage:<24} {b:>11.4f} {a:>11.4f} {change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS), help="Comma separated list of the scenarios to run.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="The JSON file the results are written to.")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files instead of running the benchmark.")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        # The benchmark runs in a temporary folder, so the static folder of the current directory is not picked up.
+        original_cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            for name in args.scenarios.split(","):
+                scenario = SCENARIOS[name]
+                if isinstance(scenario, GeneratorOptions):
+                    descriptor_file = os.path.join(work_dir, f"{name}.pb")
+                    with open(descriptor_file, 'wb') as fh:
+                        fh.write(generate_descriptor_set(scenario))
+                else:
+                    descriptor_file = scenario
+
+                print(f"Running the scenario {name}.", file=sys.stderr)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results.append(benchmark_descriptor(name, descriptor_file, work_dir, args.repeat))
+        finally:
+            os.chdir(original_cwd)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, mode='w', encoding='utf-8') as fh:
+            json.dump({"environment": environment_info(), "repeat": args.repeat, "results": results}, fh, indent=2)
+        print(f"The results were written to {args.output}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Measures the time of rendering the package pages, for messages with many fields and oneofs.
+
+Usage, from the root of the repository:
+    python benchmarks/render_benchmark.py [--fields-per-message N] [--oneofs N] [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from descriptor_generator import GeneratorOptions, generate_descriptor_set
+
+from sabledocs.__main__ import create_jinja_environments, get_template_base_dir
+from sabledocs.comments_parser import CommentsParser
+from sabledocs.page_renderer import Page, RenderState, package_output_file, render_page
+from sabledocs.proto_descriptor_parser import parse_proto_descriptor
+from sabledocs.sable_config import SableConfig
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=5)
+    parser.add_argument("--messages-per-file", type=int, default=10)
+    parser.add_argument("--fields-per-message", type=int, default=300)
+    parser.add_argument("--oneofs", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    options = GeneratorOptions(
+        packages=args.packages,
+        files_per_package=1,
+        messages_per_file=args.messages_per_file,
+        fields_per_message=args.fields_per_message,
+        oneofs=args.oneofs,
+        nesting_depth=0,
+        comment_lines=1)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        descriptor_file = os.path.join(work_dir, "descriptor.pb")
+        with open(descriptor_file, 'wb') as fh:
+            fh.write(generate_descriptor_set(options))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            sable_config = SableConfig(os.path.join(work_dir, "nonexistent.toml"))
+            sable_config.input_descriptor_file = descriptor_file
+            sable_config.comments_parser = CommentsParser()
+            sable_context = parse_proto_descriptor(sable_config)
+
+    template_base_dir = get_template_base_dir(sable_config)
+    (jinja_env, jinja_extra_env) = create_jinja_environments(sable_config, template_base_dir)
+    render_state = RenderState(sable_config, sable_context, jinja_env, jinja_extra_env, "")
+    pages = [Page(package_output_file(p.name), "package", p.name) for p in sable_context.non_hidden_packages]
+
+    # The first render compiles the templates, it's not measured.
+    for page in pages:
+        render_page(render_state, page)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for page in pages:
+            render_page(render_state, page)
+        timings.append(time.perf_counter() - start)
+
+    fields = sum(len(m.fields) for m in sable_context.all_messages)
+    print(f"Pages: {len(pages)}, messages: {len(sable_context.all_messages)}, fields: {fields}")
+    print(f"Render time: {min(timings):.3f} s, {min(timings) / fields * 1000000:.1f} us per field")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Compares the build time and the serialized size of the search index in the package and the symbol granularity.
+
+Usage, from the root of the repository:
+    python benchmarks/search_index_benchmark.py [descriptor_file] [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+from sabledocs.comments_parser import CommentsParser
+from sabledocs.lunr_search import build_search_index
+from sabledocs.proto_descriptor_parser import parse_proto_descriptor
+from sabledocs.sable_config import SableConfig, SearchIndexGranularity
+
+DEFAULT_DESCRIPTOR_FILE = os.path.join(os.path.dirname(__file__), "..", "sample", "google-cloud-sdk.pb")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("descriptor_file", nargs="?", default=DEFAULT_DESCRIPTOR_FILE)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        sable_config = SableConfig("nonexistent.toml")
+        sable_config.input_descriptor_file = args.descriptor_file
+        sable_config.comments_parser = CommentsParser()
+        sable_context = parse_proto_descriptor(sable_config)
+
+    print(f"{'granularity':<12} {'documents':>10} {'build time (s)':>15} {'index size (KB)':>16} {'documents size (KB)':>20}")
+    for granularity in [SearchIndexGranularity.PACKAGE, SearchIndexGranularity.SYMBOL]:
+        sable_config.search_index_granularity = granularity
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            (documents, index) = build_search_index(sable_context)
+            timings.append(time.perf_counter() - start)
+
+        index_size = len(json.dumps(index.serialize()).encode('utf-8'))
+        documents_size = len(json.dumps(documents).encode('utf-8'))
+        print(f"{granularity.name.lower():<12} {len(documents):>10} {min(timings):>15.3f} {index_size / 1024:>16.1f} {documents_size / 1024:>20.1f}")
+
+
+if __name__ == '__main__':
+    main()
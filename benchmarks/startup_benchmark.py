@@ -0,0 +1,72 @@
+"""Measures the startup time of the command line entry point with python -X importtime, and checks which of the heavy
+dependencies are loaded by commands which don't need them.
+
+Usage, from the root of the repository:
+    python benchmarks/startup_benchmark.py [--repeat N] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["jinja2", "markdown", "lunr", "furl", "google.protobuf.descriptor_pb2"]
+
+SCENARIOS = {
+    "import": ["-c", "import sabledocs.__main__"],
+    "version": ["-m", "sabledocs", "--version"],
+    # The modules needed by a build without search, and without a repository configured.
+    "build": ["-c", "import sabledocs.__main__, sabledocs.page_renderer, sabledocs.proto_descriptor_parser"],
+}
+
+
+def parse_importtime(stderr: str) -> tuple[dict[str, int], int]:
+    """Returns the cumulative import time of every module, and the total import time in microseconds, from the output
+       of -X importtime."""
+    times = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        (_, cumulative, name) = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        times[name.strip()] = int(cumulative)
+        # The modules imported at the top level are indented by a single space, their sum is the total import time.
+        if len(name) - len(name.lstrip()) == 1:
+            total += int(cumulative)
+    return (times, total)
+
+
+def run_scenario(args: list[str]) -> tuple[dict[str, int], int]:
+    env = dict(os.environ)
+    src_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+    env["PYTHONPATH"] = os.pathsep.join([src_dir] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args, capture_output=True, text=True, env=env)
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="The JSON file the results are written to.")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'scenario':<10} {'import time (ms)':>17}  heavy modules loaded")
+    for name, scenario_args in SCENARIOS.items():
+        runs = [run_scenario(scenario_args) for _ in range(args.repeat)]
+        import_times = [total / 1000 for (_, total) in runs]
+        loaded = [m for m in HEAVY_MODULES if m in runs[0][0]]
+        results[name] = {"median_ms": statistics.median(import_times), "min_ms": min(import_times), "heavy_modules": loaded}
+        print(f"{name:<10} {statistics.median(import_times):>17.1f}  {', '.join(loaded) or '-'}")
+
+    if args.output:
+        with open(args.output, mode='w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=2)
+        print(f"The results were written to {args.output}.")
+
+
+if __name__ == '__main__':
+    main()
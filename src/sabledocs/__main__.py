@@ -1,16 +1,20 @@
-import json
-import markdown
+import argparse
 import os
-import pprint
 import sys
-from shutil import copy, copytree, rmtree
+from typing import TYPE_CHECKING
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-
-from sabledocs.lunr_search import build_search_index
-from sabledocs.proto_descriptor_parser import parse_proto_descriptor
-from sabledocs.sable_config import SableConfig
+# Only the light modules are imported at startup. The modules of the build stages, which depend on Jinja, Markdown, lunr,
+# furl and protobuf, are imported by the functions running the stages, so commands like --version or check-config,
+# and builds which don't need some of the stages (for example the search), don't pay for loading them.
 from sabledocs.comments_parser import CommentsParser
+from sabledocs.instrumentation import enable_instrumentation, get_instrumentation
+from sabledocs.sable_config import SableConfig
+
+if TYPE_CHECKING:
+    from sabledocs.output_writer import OutputDirectoryWriter
+    from sabledocs.page_renderer import Page, RenderState
+
+CONFIG_FILE = "sabledocs.toml"
 
 
 def check_python_version():
@@ -26,22 +30,155 @@ def return_error(error_message):
     sys.exit(1)
 
 
+def get_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return version("sabledocs")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(prog="sabledocs", description="Static documentation generator for Protobuf and gRPC")
+    # The version is printed by cli(), so it's only looked up if it's requested.
+    parser.add_argument("--version", action="store_true", help="Print the version of sabledocs and exit.")
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Number of workers used to render the pages. 0 means one worker per CPU core. Overrides the render-jobs config option.")
+    parser.add_argument(
+        "--timings-json",
+        metavar="FILE",
+        help="Measure the time, the number of calls and the peak memory of every phase of the build and every descriptor file, and write them to a JSON file.")
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="Profile the build with cProfile, and write the statistics to a file, which can be loaded with the pstats module.")
+
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser(
+        "check-config",
+        help="Check the configuration in sabledocs.toml, without building the documentation.")
+    subparsers.add_parser(
+        "clear-parse-cache",
+        help="Remove every parsed model from the folder configured with parse-cache-dir.")
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Build the documentation, and serve the output folder with a local HTTP server.")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="The address the server listens on. (Default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8000, help="The port the server listens on. (Default: 8000)")
+    serve_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Watch the descriptor, the templates, the main page content and the static files, and rebuild what changed.")
+
+    serve_modules_parser = subparsers.add_parser(
+        "serve-modules",
+        help="Serve the documentation of every descriptor set in a folder, parsing the modules and rendering the pages on demand.")
+    serve_modules_parser.add_argument("descriptor_dir", help="The folder containing the descriptor sets (*.pb or *.binpb).")
+    serve_modules_parser.add_argument("--host", default="127.0.0.1", help="The address the server listens on. (Default: 127.0.0.1)")
+    serve_modules_parser.add_argument("--port", type=int, default=8000, help="The port the server listens on. (Default: 8000)")
+    serve_modules_parser.add_argument(
+        "--max-modules",
+        type=int,
+        default=8,
+        help="The number of parsed modules kept in memory. (Default: 8)")
+    serve_modules_parser.add_argument(
+        "--max-page-cache-mb",
+        type=int,
+        default=256,
+        help="The total size of the rendered pages kept in memory, in megabytes. (Default: 256)")
+
+    return parser.parse_args(args)
+
+
 def cli():
+    args = parse_args()
+    if args.version:
+        print(f"sabledocs {get_version()}")
+        return
+
     try:
-        run_sabledocs()
+        if args.command == "serve":
+            # Imported here, so the one-shot build doesn't need to load the HTTP server modules.
+            from sabledocs.dev_server import serve
+            serve(args.host, args.port, args.watch, jobs=args.jobs)
+        elif args.command == "serve-modules":
+            from sabledocs.docs_server import serve_modules
+            serve_modules(args.descriptor_dir, args.host, args.port, args.max_modules, args.max_page_cache_mb)
+        elif args.command == "check-config":
+            check_config(jobs=args.jobs)
+        elif args.command == "clear-parse-cache":
+            clear_parse_cache()
+        elif args.timings_json or args.profile:
+            run_instrumented(args.jobs, args.timings_json, args.profile)
+        else:
+            run_sabledocs(jobs=args.jobs)
     except Exception as e:
         return_error(f'Unexpected error: {e}')
 
 
-def run_sabledocs():
-    print("Starting Sabledocs")
-    check_python_version()
+def run_instrumented(jobs, timings_json_file, profile_file):
+    # The memory is only traced for the timings report, since tracing slows down the build.
+    instrumentation = enable_instrumentation(trace_memory=bool(timings_json_file))
+
+    profiler = None
+    if profile_file:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        run_sabledocs(jobs=jobs)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_file)
+        instrumentation.close()
+
+    instrumentation.print_summary()
+    if profile_file:
+        print(f"The profile was written to {profile_file}.")
+    if timings_json_file:
+        instrumentation.save(timings_json_file)
+        print(f"The timings were written to {timings_json_file}.")
+
+
+def check_config(jobs=None):
+    sable_config = load_sable_config(jobs)
+
+    template_base_dir = get_template_base_dir(sable_config)
+    if not os.path.isdir(template_base_dir):
+        return_error(f'The template folder {template_base_dir} does not exist.')
+    if sable_config.extra_template_path != "" and not os.path.isdir(sable_config.extra_template_path):
+        return_error(f'The extra template folder {sable_config.extra_template_path} does not exist.')
+    if sable_config.main_page_content_file != "" and not os.path.exists(sable_config.main_page_content_file):
+        print(f"WARNING: The configured main content page, {sable_config.main_page_content_file} was not found.")
 
     print()
-    print("Starting documentation generation.")
-    sable_config = SableConfig("sabledocs.toml")
+    print("The configuration is valid.")
+
+
+def clear_parse_cache():
+    from sabledocs.parse_cache import clear_parse_cache as clear_cache_dir
+
+    sable_config = SableConfig(CONFIG_FILE)
+    if sable_config.parse_cache_dir == "":
+        return_error("The parse-cache-dir option is not configured.")
+
+    removed = clear_cache_dir(sable_config.parse_cache_dir)
+    print(f"Removed {removed} parsed models from {sable_config.parse_cache_dir}.")
 
-    if not os.path.exists(sable_config.input_descriptor_file):
+
+def load_sable_config(jobs=None, require_descriptor_file=True) -> SableConfig:
+    sable_config = SableConfig(CONFIG_FILE)
+
+    if jobs is not None:
+        sable_config.render_jobs = jobs
+
+    if require_descriptor_file and not os.path.exists(sable_config.input_descriptor_file):
         return_error(f'The Proto descriptor file {sable_config.input_descriptor_file} does not exist.')
 
     if sable_config.comments_parser_file is None:
@@ -66,41 +203,71 @@ def run_sabledocs():
 
         print(f"Successfully installed CustomCommentsParser from {sable_config.comments_parser_file}");
 
-    # Execute the main processing of the Proto contracts.
-    sable_context = parse_proto_descriptor(sable_config)
+    get_instrumentation().wrap_methods(
+        sable_config.comments_parser,
+        "comments_parser",
+        [name for name in dir(CommentsParser) if name.startswith("Parse")])
+
+    return sable_config
 
+
+def get_template_base_dir(sable_config: SableConfig) -> str:
     if sable_config.template != "_default":
         print()
         print('WARNING: The "template" config parameter is deprecated, it will be removed in a future version. The field template-path should be used instead.')
-        template_base_dir = f"templates/{sable_config.template}"
+        return f"templates/{sable_config.template}"
     else:
-        template_base_dir = sable_config.template_path if sable_config.template_path else os.path.join(os.path.dirname(__file__), "templates", "_default")
+        return sable_config.template_path if sable_config.template_path else os.path.join(os.path.dirname(__file__), "templates", "_default")
+
+
+def create_jinja_environments(sable_config: SableConfig, template_base_dir: str):
+    import jinja2
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+    from sabledocs.static_assets import static_asset_urls
+    from sabledocs.template_compiler import load_precompiled_templates
+
+    # The asset_url filter returns the URL of a static file of the template, which is different from its path if the assets are fingerprinted.
+    asset_urls = static_asset_urls(sable_config, template_base_dir)
+
+    def asset_url(path: str):
+        return asset_urls.get(path, path)
+
+    # The bytecode cache is shared by both environments, the compiled templates are keyed by their path and content, and
+    # they are stored separately for every Jinja version.
+    bytecode_cache = None
+    if sable_config.template_cache_dir != "":
+        bytecode_cache_dir = os.path.join(sable_config.template_cache_dir, f"jinja-{jinja2.__version__}")
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+
+    loader = None
+    if sable_config.precompiled_templates:
+        loader = load_precompiled_templates(template_base_dir)
+        if loader is None:
+            print()
+            print("WARNING: The precompiled templates are not available or out of date, the templates are compiled from source.")
 
     jinja_env = Environment(
-        loader=FileSystemLoader(searchpath=template_base_dir),
-        autoescape=select_autoescape()
+        loader=loader or FileSystemLoader(searchpath=template_base_dir),
+        autoescape=select_autoescape(),
+        bytecode_cache=bytecode_cache
     )
+    jinja_env.filters['asset_url'] = asset_url
 
-    package_template = jinja_env.get_template("package.html")
-
-    if not os.path.exists(sable_config.output_dir):
-        os.makedirs(sable_config.output_dir)
+    jinja_extra_env = None
+    if sable_config.extra_template_path != "":
+        jinja_extra_env = Environment(
+            loader=FileSystemLoader(searchpath=sable_config.extra_template_path),
+            autoescape=select_autoescape(),
+            bytecode_cache=bytecode_cache
+        )
+        jinja_extra_env.filters['asset_url'] = asset_url
 
-    jinja_render_input = {
-        'sable_config':sable_config,
-        'packages':sable_context.packages,
-        'non_hidden_packages':sable_context.non_hidden_packages,
-        'all_messages':sable_context.all_messages,
-        'all_enums':sable_context.all_enums
-    }
+    return (jinja_env, jinja_extra_env)
 
-    # NOTE: When the output files are generated, the encode('utf-8') option has to be used, otherwise Unicode characters like © can end up garbled.
-    for package in sable_context.non_hidden_packages:
-        with open(os.path.join(sable_config.output_dir, f'{package.name if package.name else "__default"}.html'), 'wb') as fh:
-            output = package_template.render(
-                jinja_render_input | { 'package': package }).encode('utf-8')
 
-            fh.write(output)
+def load_main_page_content(sable_config: SableConfig) -> str:
+    from sabledocs.markdown_converter import get_markdown_converter
 
     main_page_content = ""
 
@@ -109,77 +276,137 @@ def run_sabledocs():
         if os.path.exists(sable_config.main_page_content_file):
             print(f"Found main content page, {sable_config.main_page_content_file}.")
             with open(sable_config.main_page_content_file, mode='r') as main_page_content_file:
-                main_page_content = markdown.markdown(main_page_content_file.read(), extensions=sable_config.markdown_extensions)
+                main_page_content = get_markdown_converter(sable_config.markdown_extensions).convert(main_page_content_file.read())
         else:
             print(f"WARNING: The configured main content page, {sable_config.main_page_content_file} was not found.")
 
-    with open(os.path.join(sable_config.output_dir, 'index.html'), 'wb') as fh:
-        output = (jinja_env
-                  .get_template("index.html")
-                  .render(jinja_render_input | { 'main_page_content': main_page_content})
-                  .encode('utf-8'))
+    return main_page_content
 
-        fh.write(output)
 
-    if sable_config.enable_lunr_search:
-        (search_documents, search_index) = build_search_index(sable_context)
+def write_output_file(writer: "OutputDirectoryWriter", output_file: str, output: bytes):
+    with get_instrumentation().phase("write_output"):
+        writer.write(output_file, output)
 
-        with open(os.path.join(sable_config.output_dir, 'search.html'), 'wb') as fh:
-            output = jinja_env.get_template("search.html").render(
-                sable_config = sable_config,
-                search_documents = json.dumps(search_documents),
-                search_index = json.dumps(search_index.serialize())).encode('utf-8')
 
-            fh.write(output)
+def select_changed_pages(render_state: "RenderState", pages: list["Page"], template_base_dir: str, writer: "OutputDirectoryWriter"):
+    from sabledocs.build_manifest import compute_page_fingerprints
 
-    index_abs_path = os.path.abspath(os.path.join(sable_config.output_dir, "index.html"))
+    sable_config = render_state.sable_config
+    fingerprints = compute_page_fingerprints(render_state, pages, template_base_dir)
 
-    output_static_path = os.path.join(sable_config.output_dir, "static")
+    # The pages which were generated by the previous build, but don't exist any more (for example because a package was
+    # removed), are not kept, so the writer removes them.
+    changed_pages = []
+    for p in pages:
+        # The fingerprints are recorded in the manifest of the writer, which is only saved at the end of the build, so if
+        # the build fails, the next build renders every changed page again.
+        previous_fingerprint = writer.previous_attributes.get(p.output_file, {}).get("fingerprint")
+        writer.set_attributes(p.output_file, fingerprint=fingerprints[p.output_file])
+        if previous_fingerprint == fingerprints[p.output_file] and os.path.exists(os.path.join(sable_config.output_dir, p.output_file)):
+            # The page is not rendered again, but it's still part of the output.
+            writer.keep(p.output_file)
+        else:
+            changed_pages.append(p)
 
-    if os.path.exists(output_static_path):
-        # This is needed, because shutils.copytree cannot copy to a target folder which already exists.
-        rmtree(output_static_path)
+    print()
+    print(f"Incremental build, {len(changed_pages)} of {len(pages)} pages changed.")
 
-    copytree(os.path.join(template_base_dir, "static"), output_static_path)
+    return changed_pages
 
-    if os.path.exists("static") and os.path.isdir("static"):
-        print("Copying static content from the folder 'static'.")
-        for root, _, files in os.walk("static"):
-            dir_path = "" if root == "static" else root.removeprefix("static\\")
-            dest_dir_path = os.path.join(sable_config.output_dir, dir_path)
-            if dir_path != "":
-                if not os.path.exists(dest_dir_path):
-                    os.makedirs(dest_dir_path)
 
-            for f in files:
-                src_file_path = os.path.join(root, f)
-                dest_file_path = os.path.join(dest_dir_path, f)
-                if not os.path.exists(dest_file_path):
-                    copy(src_file_path, dest_file_path)
+def render_and_write_pages(render_state: "RenderState", pages: list["Page"], writer: "OutputDirectoryWriter"):
+    """Renders and writes the pages, except for the extra templates, which are returned to be written after the static content is copied,
+       so they can override static files."""
+    from sabledocs.page_renderer import RenderError, render_pages
 
-    if sable_config.extra_template_path != "":
-        print(f"Rendering extra Jinja templates from, {sable_config.extra_template_path}")
-        jinja_extra_env = Environment(
-            loader=FileSystemLoader(searchpath=sable_config.extra_template_path),
-            autoescape=select_autoescape()
-        )
-        for root, _, files in os.walk(sable_config.extra_template_path):
-            dir_path = "" if root == sable_config.extra_template_path else (
-                root.removeprefix(sable_config.extra_template_path).rstrip("/\\"))
-            if "/_" in dir_path or "\\_" in dir_path:  # ignore subdirectories that start with "_"
+    extra_outputs = []
+    try:
+        for page, output in render_pages(render_state, pages, render_state.sable_config.render_jobs):
+            if page.kind == "extra":
+                extra_outputs.append((page, output))
                 continue
-            for file in files:
-                if not file.endswith(sable_config.extra_template_suffix):
-                    continue
-                file_path = file if dir_path == "" else str(os.path.join(dir_path, file))
-                print(f"Rendering extra Jinja template, {file_path}")
-                with open(os.path.join(sable_config.output_dir, file_path), 'wb') as fh:
-                    output = (jinja_extra_env
-                              .get_template(file_path)
-                              .render(jinja_render_input)
-                              .encode('utf-8'))
-
-                    fh.write(output)
+
+            write_output_file(writer, page.output_file, output)
+    except RenderError as e:
+        return_error(str(e))
+
+    return extra_outputs
+
+
+def write_extra_outputs(sable_config: SableConfig, extra_outputs, writer: "OutputDirectoryWriter"):
+    if extra_outputs:
+        print(f"Rendering extra Jinja templates from, {sable_config.extra_template_path}")
+        for page, output in extra_outputs:
+            print(f"Rendering extra Jinja template, {page.output_file}")
+            write_output_file(writer, page.output_file, output)
+
+
+def run_sabledocs(jobs=None):
+    print("Starting Sabledocs")
+    check_python_version()
+
+    print()
+    print("Starting documentation generation.")
+    from sabledocs.output_writer import OutputDirectoryWriter
+    from sabledocs.page_renderer import RenderState, collect_pages
+    from sabledocs.proto_descriptor_parser import parse_proto_descriptor
+    from sabledocs.static_assets import sync_static_content
+
+    instrumentation = get_instrumentation()
+    with instrumentation.phase("load_config"):
+        sable_config = load_sable_config(jobs)
+
+    if instrumentation.enabled and sable_config.render_jobs != 1:
+        # The phases are only measured in the main process, so every page is rendered there.
+        print("The build is instrumented, rendering the pages in a single worker.")
+        sable_config.render_jobs = 1
+
+    # Execute the main processing of the Proto contracts.
+    with instrumentation.phase("parse_proto_descriptor"):
+        sable_context = parse_proto_descriptor(sable_config)
+
+    template_base_dir = get_template_base_dir(sable_config)
+    with instrumentation.phase("create_jinja_environments"):
+        (jinja_env, jinja_extra_env) = create_jinja_environments(sable_config, template_base_dir)
+
+    if not os.path.exists(sable_config.output_dir):
+        os.makedirs(sable_config.output_dir)
+
+    with instrumentation.phase("load_main_page_content"):
+        main_page_content = load_main_page_content(sable_config)
+
+    render_state = RenderState(sable_config, sable_context, jinja_env, jinja_extra_env, main_page_content)
+    pages = collect_pages(render_state)
+    writer = OutputDirectoryWriter(sable_config.output_dir, sable_config.write_queue_size)
+
+    if sable_config.incremental_build:
+        with instrumentation.phase("select_changed_pages"):
+            pages = select_changed_pages(render_state, pages, template_base_dir, writer)
+
+    with instrumentation.phase("render_pages"):
+        extra_outputs = render_and_write_pages(render_state, pages, writer)
+
+    index_abs_path = os.path.abspath(os.path.join(sable_config.output_dir, "index.html"))
+
+    with instrumentation.phase("sync_static_content"):
+        sync_static_content(sable_config, template_base_dir, writer)
+
+    write_extra_outputs(sable_config, extra_outputs, writer)
+
+    if sable_config.optimize_assets:
+        # Done after every page is written, because the used selectors are collected from the whole output.
+        from sabledocs.asset_optimizer import optimize_assets
+        with instrumentation.phase("optimize_assets"):
+            optimize_assets(sable_config, template_base_dir, writer)
+
+    if sable_config.precompress:
+        from sabledocs.precompress import precompress_output
+        with instrumentation.phase("precompress"):
+            precompress_output(sable_config, writer)
+
+    with instrumentation.phase("finish_output"):
+        writer.finish()
+
     print()
     print(f"Building documentation done. It can be opened with {index_abs_path}")
 
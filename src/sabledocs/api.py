@@ -0,0 +1,148 @@
+"""The library API of sabledocs, to build the documentation in memory, without the command line tool.
+
+Example:
+    sable_config = SableConfig()
+    sable_config.module_title = "My API"
+    result = build(sable_config, descriptor_bytes)
+    html = result.files["index.html"]
+
+Unlike the command line tool, the API never reads sabledocs.toml or exits the process, errors are raised as BuildError.
+The disk based features of the command line tool (incremental builds, static content synchronization, asset pruning,
+precompression and the user's static folder) are not used, the optimize-assets option is ignored.
+"""
+import os
+from typing import Optional, Protocol
+
+from sabledocs.comments_parser import CommentsParser
+from sabledocs.proto_model import SableContext
+from sabledocs.sable_config import SableConfig
+
+
+class BuildError(Exception):
+    pass
+
+
+class OutputWriter(Protocol):
+    def write(self, output_file: str, content: bytes):
+        """Called with the path of every output file relative to the output folder (always with forward slashes), and
+           its content."""
+        ...
+
+
+class MemoryWriter:
+    """Collects the output files in a dict, by their relative paths."""
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+
+    def write(self, output_file: str, content: bytes):
+        self.files[output_file] = content
+
+
+class DirectoryWriter:
+    """Writes the output files into a folder."""
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+
+    def write(self, output_file: str, content: bytes):
+        output_path = os.path.join(self.output_dir, output_file)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'wb') as fh:
+            fh.write(content)
+
+
+class BuildResult:
+    def __init__(self, sable_context: SableContext, output_files: list[str], files: Optional[dict[str, bytes]]):
+        self.sable_context = sable_context
+        # The relative paths of the output files, in the order they were written.
+        self.output_files = output_files
+        # The content of the output files, if they were collected in memory (when no writer was passed to build).
+        self.files = files
+
+
+class _RecordingWriter:
+    def __init__(self, writer: OutputWriter):
+        self.writer = writer
+        self.output_files: list[str] = []
+
+    def write(self, output_file: str, content: bytes):
+        self.writer.write(output_file, content)
+        self.output_files.append(output_file)
+
+
+class DocsBuilder:
+    """Builds the documentation with a fixed config. The Jinja environments are created once, so a builder can be reused
+       to render many descriptors, and a parsed context can be rendered any number of times. Descriptors can be parsed
+       from several threads, if the comments parser of the config is thread-safe (the default one is)."""
+    def __init__(self, sable_config: SableConfig):
+        from sabledocs.__main__ import create_jinja_environments, get_template_base_dir
+
+        if getattr(sable_config, "comments_parser", None) is None:
+            sable_config.comments_parser = CommentsParser()
+        elif not isinstance(sable_config.comments_parser, CommentsParser):
+            raise BuildError("The comments parser of the config has to be derived from the class CommentsParser.")
+
+        # The pruned stylesheets are generated from the output folder, which the API doesn't have, so the pages would link
+        # to stylesheets which don't exist.
+        sable_config.optimize_assets = False
+
+        self.sable_config = sable_config
+        self.template_base_dir = get_template_base_dir(sable_config)
+        if not os.path.isdir(self.template_base_dir):
+            raise BuildError(f"The template folder {self.template_base_dir} does not exist.")
+        if sable_config.extra_template_path != "" and not os.path.isdir(sable_config.extra_template_path):
+            raise BuildError(f"The extra template folder {sable_config.extra_template_path} does not exist.")
+
+        (self.jinja_env, self.jinja_extra_env) = create_jinja_environments(sable_config, self.template_base_dir)
+
+    def parse(self, descriptor_bytes: bytes) -> SableContext:
+        from google.protobuf.message import DecodeError
+        from sabledocs.proto_descriptor_parser import parse_proto_descriptor
+
+        try:
+            return parse_proto_descriptor(self.sable_config, descriptor_bytes)
+        except DecodeError as e:
+            raise BuildError(f"The Proto descriptor could not be decoded: {e}") from e
+
+    def render(self, sable_context: SableContext, writer: OutputWriter, main_page_content: str = "", include_static: bool = True):
+        """Renders the pages of the parsed context, and passes them, and the static files of the template, to the writer."""
+        from sabledocs.page_renderer import RenderError, RenderState, collect_pages, render_pages
+        from sabledocs.static_assets import collect_static_assets
+
+        render_state = RenderState(self.sable_config, sable_context, self.jinja_env, self.jinja_extra_env, main_page_content)
+        extra_outputs = []
+        try:
+            for page, output in render_pages(render_state, collect_pages(render_state), self.sable_config.render_jobs):
+                # The extra templates are written after the static files, so they can override them, like in the command line tool.
+                if page.kind == "extra":
+                    extra_outputs.append((page, output))
+                else:
+                    writer.write(page.output_file, output)
+        except RenderError as e:
+            raise BuildError(str(e)) from e
+
+        if include_static:
+            for asset in collect_static_assets(self.sable_config, self.template_base_dir):
+                # Only the static files of the template are included, the user's static folder is a feature of the command line tool.
+                if asset.overwrite:
+                    with open(asset.source_path, 'rb') as fh:
+                        writer.write(asset.output_file, fh.read())
+
+        for page, output in extra_outputs:
+            writer.write(page.output_file.replace(os.sep, "/"), output)
+
+    def build(self, descriptor_bytes: bytes, writer: Optional[OutputWriter] = None, main_page_content: str = "") -> BuildResult:
+        sable_context = self.parse(descriptor_bytes)
+        memory_writer = MemoryWriter() if writer is None else None
+        recording_writer = _RecordingWriter(writer or memory_writer)
+        self.render(sable_context, recording_writer, main_page_content)
+        return BuildResult(sable_context, recording_writer.output_files, memory_writer.files if memory_writer else None)
+
+
+def build(
+        sable_config: SableConfig,
+        descriptor_bytes: bytes,
+        writer: Optional[OutputWriter] = None,
+        main_page_content: str = "") -> BuildResult:
+    """Builds the documentation of the serialized FileDescriptorSet. If no writer is passed, the output files are returned
+       in the files of the result. The main page content is HTML, displayed on the main page above the packages."""
+    return DocsBuilder(sable_config).build(descriptor_bytes, writer, main_page_content)
@@ -0,0 +1,149 @@
+import os
+import re
+
+from sabledocs.output_writer import OutputDirectoryWriter
+from sabledocs.sable_config import SableConfig
+
+TOKEN_PATTERN = re.compile(r"[\w-]+")
+SELECTOR_NAME_PATTERN = re.compile(r"[.#]((?:[\w-]|\\.)+)")
+# At-rules whose content is a list of rules, which can be pruned recursively. The content of every other block at-rule
+# (@keyframes, @font-face, etc.) is kept as it is.
+NESTED_AT_RULES = ("@media", "@supports", "@document", "@layer")
+
+
+def pruned_file_name(relative_path: str) -> str:
+    (name, ext) = os.path.splitext(relative_path)
+    return f"{name}.pruned{ext}"
+
+
+def collect_used_tokens(output_dir: str) -> set[str]:
+    """Collects every word from the generated HTML pages and the scripts. This is deliberately conservative: a class name used
+       in a script (for example to display the search results, or to switch to dark mode) also counts as used."""
+    tokens = set()
+    for root, _, files in os.walk(output_dir):
+        for f in files:
+            if os.path.splitext(f)[1] in (".html", ".js"):
+                with open(os.path.join(root, f), mode='r', encoding='utf-8', errors='ignore') as fh:
+                    tokens.update(TOKEN_PATTERN.findall(fh.read()))
+    return tokens
+
+
+def find_block_end(css: str, start: int) -> int:
+    """Returns the index of the closing brace matching the opening brace at start, skipping strings."""
+    depth = 0
+    i = start
+    while i < len(css):
+        c = css[i]
+        if c in "\"'":
+            i = css.find(c, i + 1)
+            if i == -1:
+                return len(css) - 1
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(css) - 1
+
+
+def split_selectors(selector_list: str) -> list[str]:
+    selectors = []
+    depth = 0
+    current = ""
+    for c in selector_list:
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        if c == "," and depth == 0:
+            selectors.append(current.strip())
+            current = ""
+        else:
+            current += c
+    selectors.append(current.strip())
+    return [s for s in selectors if s]
+
+
+def is_selector_used(selector: str, used_tokens: set[str]) -> bool:
+    # The content of functional pseudo-classes like :not(.is-active) is ignored, since those don't need to be present.
+    while "(" in selector:
+        stripped = re.sub(r"\([^()]*\)", "", selector)
+        if stripped == selector:
+            break
+        selector = stripped
+
+    return all(name.replace("\\", "") in used_tokens for name in SELECTOR_NAME_PATTERN.findall(selector))
+
+
+def prune_css(css: str, used_tokens: set[str]) -> str:
+    """Removes the rules from the stylesheet whose selectors reference classes or ids which are not used."""
+    # Comments are removed, except for the ones starting with /*!, which by convention contain the license.
+    css = re.sub(r"/\*(?!!).*?\*/", "", css, flags=re.DOTALL)
+
+    output = []
+    i = 0
+    while i < len(css):
+        brace = css.find("{", i)
+        semicolon = css.find(";", i)
+        if brace == -1:
+            output.append(css[i:].strip())
+            break
+
+        prelude = css[i:brace].strip()
+        if prelude.startswith("@") and semicolon != -1 and semicolon < brace:
+            # A statement at-rule, like @import or @charset.
+            output.append(css[i:semicolon + 1].strip())
+            i = semicolon + 1
+            continue
+
+        end = find_block_end(css, brace)
+        body = css[brace + 1:end]
+        i = end + 1
+
+        if prelude.startswith("@"):
+            if prelude.startswith(NESTED_AT_RULES):
+                pruned_body = prune_css(body, used_tokens)
+                if pruned_body.strip():
+                    output.append(f"{prelude} {{\n{pruned_body}\n}}")
+            else:
+                output.append(f"{prelude} {{{body}}}")
+        else:
+            comment_end = prelude.rfind("*/")
+            if comment_end != -1:
+                output.append(prelude[:comment_end + 2])
+                prelude = prelude[comment_end + 2:]
+
+            selectors = [s for s in split_selectors(prelude) if is_selector_used(s, used_tokens)]
+            if selectors:
+                output.append(f"{', '.join(selectors)} {{{body}}}")
+
+    return "\n".join(o for o in output if o)
+
+
+def optimize_assets(sable_config: SableConfig, template_base_dir: str, writer: OutputDirectoryWriter):
+    """Writes a pruned version of every stylesheet of the template into the static folder of the output, which only contains
+       the rules used by the generated pages. (The pages reference the pruned stylesheets through the asset_url filter.)"""
+    # The selectors are collected from the output folder, so the pages queued in the writer have to be written first.
+    writer.flush()
+    used_tokens = collect_used_tokens(sable_config.output_dir)
+    template_static_dir = os.path.join(template_base_dir, "static")
+
+    print()
+    for root, _, files in os.walk(template_static_dir):
+        for f in sorted(files):
+            if not f.endswith(".css"):
+                continue
+
+            source_path = os.path.join(root, f)
+            relative_path = os.path.relpath(source_path, template_static_dir)
+            with open(source_path, mode='r', encoding='utf-8') as fh:
+                css = fh.read()
+
+            pruned = prune_css(css, used_tokens)
+
+            # The writer only writes the file if it changed, to keep its modification time otherwise.
+            writer.write(f"static/{pruned_file_name(relative_path)}", pruned.encode('utf-8'))
+
+            print(f"Pruned the stylesheet {relative_path}, {len(css.encode('utf-8')) / 1024:.1f} KB -> {len(pruned.encode('utf-8')) / 1024:.1f} KB.")
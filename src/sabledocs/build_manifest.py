@@ -0,0 +1,123 @@
+import enum
+import hashlib
+import os
+
+from sabledocs.page_renderer import Page, RenderState
+from sabledocs.proto_model import Package, TypeUsage, model_vars
+from sabledocs.sable_config import PageLayout
+
+FINGERPRINT_VERSION = 1
+
+# The config fields which don't affect the content of the generated pages.
+IGNORED_CONFIG_FIELDS = {
+    "comments_parser", "output_dir", "render_jobs", "incremental_build", "markdown_cache_dir", "precompress",
+    "template_cache_dir", "precompiled_templates", "parse_cache_dir", "parse_cache_max_mb",
+    "write_queue_size"}
+
+# The model attributes pointing to other items. These are fingerprinted by the name of the item they point to, since that's
+# all the templates use them for (to generate links), and walking them would pull the whole model into every fingerprint.
+REFERENCE_ATTRIBUTES = {"package", "parent_message"}
+
+
+def _update_hash(h, value):
+    if value is None or isinstance(value, (str, int, float, bool, enum.Enum)):
+        h.update(repr(value).encode('utf-8'))
+    elif isinstance(value, (list, tuple)):
+        h.update(b"[")
+        for v in value:
+            _update_hash(h, v)
+            h.update(b",")
+        h.update(b"]")
+    elif isinstance(value, dict):
+        h.update(b"{")
+        for k in sorted(value):
+            h.update(repr(k).encode('utf-8'))
+            _update_hash(h, value[k])
+        h.update(b"}")
+    else:
+        h.update(type(value).__name__.encode('utf-8'))
+        _update_hash(h, {
+            k: (_reference_name(v) if k in REFERENCE_ATTRIBUTES else v)
+            for k, v in model_vars(value).items()})
+
+
+def _reference_name(item):
+    return None if item is None else getattr(item, "full_name", item.name)
+
+
+def fingerprint(*values) -> str:
+    h = hashlib.sha256()
+    for v in values:
+        _update_hash(h, v)
+    return h.hexdigest()
+
+
+def fingerprint_files(dir_path: str, skip_dirs=()) -> str:
+    h = hashlib.sha256()
+    if dir_path and os.path.isdir(dir_path):
+        for root, dirs, files in os.walk(dir_path):
+            dirs[:] = sorted(d for d in dirs if os.path.join(root, d) not in skip_dirs)
+            for f in sorted(files):
+                file_path = os.path.join(root, f)
+                h.update(os.path.relpath(file_path, dir_path).encode('utf-8'))
+                with open(file_path, 'rb') as fh:
+                    h.update(hashlib.sha256(fh.read()).digest())
+    return h.hexdigest()
+
+
+def usage_keys(package: Package, used_by: dict[str, list[TypeUsage]]) -> list[tuple]:
+    """Returns what the "used by" lists of the messages and enums of the package display, since these come from other
+       packages, so they are not part of the fingerprint of the package itself."""
+    return [
+        (u.kind, u.owner.full_name, u.member.name, _reference_name(u.package), u.is_package_hidden)
+        for t in package.messages + package.enums
+        for u in used_by.get(t.full_name, [])]
+
+
+def compute_page_fingerprints(render_state: RenderState, pages: list[Page], template_base_dir: str) -> dict[str, str]:
+    """Computes a fingerprint for every page from the data it depends on.
+       A package page depends on the messages, enums and services of its package (including the names of the packages
+       its fields link to, and the fields and methods using its types), the templates and the config. The main page and
+       the search page depend on every non-hidden package, and the extra templates, which receive the full model, depend
+       on every package."""
+    sable_config = render_state.sable_config
+    config_values = {k: v for k, v in vars(sable_config).items() if k not in IGNORED_CONFIG_FIELDS}
+    common = fingerprint(
+        FINGERPRINT_VERSION,
+        config_values,
+        # The static files only affect the pages if they are fingerprinted, since then their URLs depend on their content.
+        fingerprint_files(
+            template_base_dir,
+            skip_dirs=set() if sable_config.fingerprint_static_assets else {os.path.join(template_base_dir, "static")}),
+        # With more than one type per page, the page of a type depends on the other types of its package, so a change in
+        # one package can change the links in every other package.
+        {p.name: p.type_pages for p in render_state.sable_context.non_hidden_packages}
+            if sable_config.page_layout == PageLayout.SPLIT and sable_config.types_per_page > 1
+            else None)
+
+    used_by = render_state.sable_context.used_by
+    package_fingerprints = {p.name: fingerprint(p, usage_keys(p, used_by)) for p in render_state.sable_context.packages}
+    non_hidden_fingerprints = [package_fingerprints[p.name] for p in render_state.sable_context.non_hidden_packages]
+
+    fingerprints = {}
+    for page in pages:
+        match page.kind:
+            case "package":
+                fingerprints[page.output_file] = fingerprint(common, package_fingerprints[page.key])
+            case "types":
+                fingerprints[page.output_file] = fingerprint(common, package_fingerprints[render_state.type_pages[page.key].package.name])
+            case "index":
+                fingerprints[page.output_file] = fingerprint(common, render_state.main_page_content, non_hidden_fingerprints)
+            case "search" | "search-manifest":
+                fingerprints[page.output_file] = fingerprint(common, non_hidden_fingerprints)
+            case "search-index" | "search-documents":
+                fingerprints[page.output_file] = fingerprint(
+                    common,
+                    [package_fingerprints[p.name] for p in render_state.search_shards[page.key]])
+            case "extra":
+                fingerprints[page.output_file] = fingerprint(
+                    common,
+                    fingerprint_files(sable_config.extra_template_path),
+                    list(package_fingerprints.values()))
+
+    return fingerprints
@@ -0,0 +1,197 @@
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from sabledocs.__main__ import (
+    CONFIG_FILE,
+    check_python_version,
+    create_jinja_environments,
+    get_template_base_dir,
+    load_main_page_content,
+    load_sable_config,
+    render_and_write_pages,
+    write_extra_outputs)
+from sabledocs.asset_optimizer import optimize_assets
+from sabledocs.output_writer import OutputDirectoryWriter
+from sabledocs.page_renderer import RenderState, collect_pages
+from sabledocs.proto_descriptor_parser import parse_proto_descriptor
+from sabledocs.static_assets import sync_static_content
+
+POLL_INTERVAL_SECONDS = 0.5
+
+
+class DocsSession:
+    """Keeps the parsed model and the Jinja environments in memory, so that a change can be rebuilt by re-running only the
+       stages affected by it."""
+    def __init__(self, jobs=None):
+        self.sable_config = load_sable_config(jobs)
+        self.sable_context = parse_proto_descriptor(self.sable_config)
+        self.template_base_dir = get_template_base_dir(self.sable_config)
+        (self.jinja_env, self.jinja_extra_env) = create_jinja_environments(self.sable_config, self.template_base_dir)
+        self.main_page_content = load_main_page_content(self.sable_config)
+        # One writer is used for every build of the session, so it knows the pages written by the previous builds, and
+        # the static files don't overwrite them. The rebuilds only write some of the files, so no deploy manifest is
+        # saved, and only the removed static files are removed.
+        self.writer = OutputDirectoryWriter(self.sable_config.output_dir, self.sable_config.write_queue_size)
+
+    def watched_paths(self) -> dict[str, list[str]]:
+        """Returns the files and folders to watch, grouped by the stage which has to be re-run if they change."""
+        return {
+            "config": [CONFIG_FILE] + ([self.sable_config.comments_parser_file] if self.sable_config.comments_parser_file else []),
+            "descriptor": [self.sable_config.input_descriptor_file],
+            "templates": [self.template_base_dir],
+            "extra_templates": [self.sable_config.extra_template_path] if self.sable_config.extra_template_path else [],
+            "main_page": [self.sable_config.main_page_content_file] if self.sable_config.main_page_content_file else [],
+            "static": [os.path.join(self.template_base_dir, "static"), "static"]
+        }
+
+    def render_state(self):
+        return RenderState(self.sable_config, self.sable_context, self.jinja_env, self.jinja_extra_env, self.main_page_content)
+
+    def render(self, writer: OutputDirectoryWriter, page_kinds=None):
+        render_state = self.render_state()
+        pages = [p for p in collect_pages(render_state) if page_kinds is None or p.kind in page_kinds]
+        write_extra_outputs(self.sable_config, render_and_write_pages(render_state, pages, writer), writer)
+        print(f"Rendered {len(pages)} pages.")
+
+    def build(self):
+        os.makedirs(self.sable_config.output_dir, exist_ok=True)
+        writer = self.writer
+        try:
+            render_state = self.render_state()
+            extra_outputs = render_and_write_pages(render_state, collect_pages(render_state), writer)
+            sync_static_content(self.sable_config, self.template_base_dir, writer)
+            write_extra_outputs(self.sable_config, extra_outputs, writer)
+            if self.sable_config.optimize_assets:
+                optimize_assets(self.sable_config, self.template_base_dir, writer)
+        finally:
+            # Waits for the queued files, so the build is only reported done when they are written, and raises the errors.
+            writer.close()
+
+    def rebuild(self, changed_groups: set[str]):
+        if "descriptor" in changed_groups:
+            print("The descriptor changed, parsing it again.")
+            self.sable_context = parse_proto_descriptor(self.sable_config)
+        # With fingerprinted assets, a change in the static files changes the URLs used in the pages.
+        static_urls_changed = "static" in changed_groups and self.sable_config.fingerprint_static_assets
+        if "templates" in changed_groups or "extra_templates" in changed_groups or static_urls_changed:
+            (self.jinja_env, self.jinja_extra_env) = create_jinja_environments(self.sable_config, self.template_base_dir)
+        if "main_page" in changed_groups:
+            self.main_page_content = load_main_page_content(self.sable_config)
+
+        writer = self.writer
+        try:
+            if "descriptor" in changed_groups or "templates" in changed_groups or static_urls_changed:
+                self.render(writer)
+            else:
+                page_kinds = set()
+                if "main_page" in changed_groups:
+                    page_kinds.add("index")
+                if "extra_templates" in changed_groups:
+                    page_kinds.add("extra")
+                if page_kinds:
+                    self.render(writer, page_kinds)
+
+            if "static" in changed_groups or "templates" in changed_groups:
+                sync_static_content(self.sable_config, self.template_base_dir, writer)
+
+            if self.sable_config.optimize_assets:
+                optimize_assets(self.sable_config, self.template_base_dir, writer)
+        finally:
+            writer.close()
+
+
+def snapshot_files(paths: list[str], skip_dirs=()) -> dict[str, tuple[int, int]]:
+    """Returns the modification time and the size of every file under the given paths."""
+    snapshot = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        elif os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [d for d in dirs if os.path.join(root, d) not in skip_dirs]
+                for f in files:
+                    file_path = os.path.join(root, f)
+                    stat = os.stat(file_path)
+                    snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+class FileWatcher:
+    """Detects changes in groups of files by polling their modification times, so no platform specific dependency is needed."""
+    def __init__(self, groups: dict[str, list[str]], skip_dirs=()):
+        self.groups = groups
+        self.skip_dirs = set(skip_dirs)
+        self.snapshots = {group: snapshot_files(paths, self.skip_dirs) for group, paths in groups.items()}
+
+    def poll(self) -> set[str]:
+        changed_groups = set()
+        for group, paths in self.groups.items():
+            snapshot = snapshot_files(paths, self.skip_dirs)
+            if snapshot != self.snapshots[group]:
+                self.snapshots[group] = snapshot
+                changed_groups.add(group)
+        return changed_groups
+
+
+def start_http_server(host: str, port: int, directory: str) -> ThreadingHTTPServer:
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def create_watcher(session: DocsSession) -> FileWatcher:
+    # The static folder of the templates is watched separately, so a change in it only triggers copying the static content.
+    return FileWatcher(
+        session.watched_paths(),
+        skip_dirs={os.path.join(session.template_base_dir, "static"), session.sable_config.output_dir})
+
+
+def serve(host: str, port: int, watch: bool, jobs=None):
+    print("Starting Sabledocs development server")
+    check_python_version()
+
+    print()
+    session = DocsSession(jobs)
+    session.build()
+
+    server = start_http_server(host, port, os.path.abspath(session.sable_config.output_dir))
+    print()
+    print(f"Serving the documentation at http://{host}:{port}/ (press Ctrl+C to stop)")
+
+    try:
+        if not watch:
+            threading.Event().wait()
+
+        watcher = create_watcher(session)
+        while True:
+            time.sleep(POLL_INTERVAL_SECONDS)
+            changed_groups = watcher.poll()
+            if not changed_groups:
+                continue
+
+            print()
+            print(f"Changes detected in {', '.join(sorted(changed_groups))}, rebuilding.")
+            try:
+                if "config" in changed_groups:
+                    session = DocsSession(jobs)
+                    session.build()
+                    watcher = create_watcher(session)
+                else:
+                    session.rebuild(changed_groups)
+                print("Rebuild done.")
+            # Errors are only reported, so the server keeps running, and the next change can fix the problem.
+            except SystemExit:
+                # The error has already been printed by return_error.
+                print("The rebuild failed, waiting for the next change.")
+            except Exception as e:
+                print(f"ERROR: The rebuild failed: {e}")
+    except KeyboardInterrupt:
+        print()
+        print("Stopping the server.")
+    finally:
+        server.shutdown()
@@ -0,0 +1,282 @@
+"""Serves the documentation of many Proto modules from a folder of descriptor sets, without building a static site for
+every module. A module is parsed when one of its pages is first requested, and its pages are rendered on demand.
+
+The parsed modules and the rendered pages are kept in LRU caches, keyed by the hash of the descriptor set and the
+configuration, so a changed descriptor file is parsed again, and the modules which are not visited don't use any memory.
+"""
+import html
+import json
+import mimetypes
+import os
+import threading
+import urllib.parse
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Hashable, Optional
+
+from sabledocs.__main__ import check_python_version, load_main_page_content, load_sable_config, return_error
+from sabledocs.api import BuildError, DocsBuilder
+from sabledocs.build_manifest import IGNORED_CONFIG_FIELDS, fingerprint
+from sabledocs.page_renderer import RenderState, collect_pages, render_page
+from sabledocs.sable_config import SableConfig
+from sabledocs.static_assets import collect_static_assets, file_hash
+
+DESCRIPTOR_EXTENSIONS = (".pb", ".binpb")
+METRICS_PATH = "/_sabledocs/metrics"
+
+
+class LruCache:
+    """A thread-safe cache, which evicts the least recently used entries when the total size of the entries exceeds
+       max_size. (The size of an entry is 1 by default, so max_size is the number of entries.)
+       If several threads miss the same key at the same time, only the first one creates the value, the others wait for it."""
+    def __init__(self, max_size: int, size_of: Callable[[object], int] = lambda value: 1):
+        self.max_size = max_size
+        self.size_of = size_of
+        self.entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+        self.size = 0
+        self.pending: set[Hashable] = set()
+        self.condition = threading.Condition()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_create(self, key: Hashable, create: Callable[[], object]):
+        with self.condition:
+            while True:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                if key not in self.pending:
+                    break
+                self.condition.wait()
+
+            self.misses += 1
+            self.pending.add(key)
+
+        try:
+            value = create()
+        except BaseException:
+            # One of the waiting threads will try to create the value again.
+            with self.condition:
+                self.pending.discard(key)
+                self.condition.notify_all()
+            raise
+
+        with self.condition:
+            self.pending.discard(key)
+            self._add(key, value)
+            self.condition.notify_all()
+        return value
+
+    def _add(self, key: Hashable, value: object):
+        size = self.size_of(value)
+        self.entries[key] = (value, size)
+        self.size += size
+        # A value larger than the whole cache is returned, but not kept.
+        while self.size > self.max_size and self.entries:
+            (_, (_, evicted_size)) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.condition:
+            return {
+                "entries": len(self.entries),
+                "size": self.size,
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+class ModuleDocs:
+    """The parsed model of a module, and its pages by their relative path."""
+    def __init__(self, render_state: RenderState):
+        self.render_state = render_state
+        self.pages = {page.output_file.replace(os.sep, "/"): page for page in collect_pages(render_state)}
+
+
+class ModuleServer:
+    """Resolves the requested paths to the modules in the descriptor folder, and returns their pages and static files.
+       A module is identified by the path of its descriptor set relative to the folder, without the extension, so the
+       descriptor payments/v1.2.pb is served at /payments/v1.2/."""
+    def __init__(
+            self,
+            descriptor_dir: str,
+            sable_config: SableConfig,
+            max_modules: int = 8,
+            max_page_cache_bytes: int = 256 * 1024 * 1024):
+        self.descriptor_dir = descriptor_dir
+        self.builder = DocsBuilder(sable_config)
+        self.main_page_content = load_main_page_content(sable_config)
+        self.config_fingerprint = fingerprint(
+            {k: v for k, v in vars(sable_config).items() if k not in IGNORED_CONFIG_FIELDS and k != "input_descriptor_file"})
+        # The static files are the same for every module, and they are served from their source.
+        self.static_files = {
+            asset.output_file: asset.source_path
+            for asset in collect_static_assets(sable_config, self.builder.template_base_dir)}
+
+        self.modules = LruCache(max_modules)
+        self.pages = LruCache(max_page_cache_bytes, len)
+        # The comments parser is shared, and a custom one is not necessarily thread-safe, so the descriptors are parsed one
+        # at a time. (Parsing is CPU bound, so parallel parsing wouldn't be faster anyway.)
+        self.parse_lock = threading.Lock()
+        self.descriptor_hashes: dict[str, tuple[int, int, str]] = {}
+        self.descriptor_hashes_lock = threading.Lock()
+
+    def list_modules(self) -> list[str]:
+        modules = []
+        for root, _, files in os.walk(self.descriptor_dir):
+            for f in files:
+                (name, ext) = os.path.splitext(f)
+                if ext in DESCRIPTOR_EXTENSIONS:
+                    modules.append(os.path.relpath(os.path.join(root, name), self.descriptor_dir).replace(os.sep, "/"))
+        return sorted(modules)
+
+    def resolve(self, path: str) -> Optional[tuple[str, str, str]]:
+        """Returns the module id, the path of the descriptor set, and the path of the requested file inside the module, or
+           None if the path doesn't belong to a module. The longest matching module wins, so modules can be nested."""
+        parts = path.lstrip("/").split("/")
+        if any(p in (".", "..") or "\0" in p or os.sep in p or (os.altsep and os.altsep in p) for p in parts):
+            return None
+
+        for i in range(len(parts), 0, -1):
+            if parts[i - 1] == "":
+                continue
+            for ext in DESCRIPTOR_EXTENSIONS:
+                descriptor_path = os.path.join(self.descriptor_dir, *parts[:i]) + ext
+                if os.path.isfile(descriptor_path):
+                    return ("/".join(parts[:i]), descriptor_path, "/".join(parts[i:]))
+        return None
+
+    def descriptor_key(self, descriptor_path: str) -> str:
+        # The hash is only computed again if the modification time or the size of the file changes.
+        stat = os.stat(descriptor_path)
+        with self.descriptor_hashes_lock:
+            cached = self.descriptor_hashes.get(descriptor_path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        descriptor_hash = file_hash(descriptor_path)
+        with self.descriptor_hashes_lock:
+            self.descriptor_hashes[descriptor_path] = (stat.st_mtime_ns, stat.st_size, descriptor_hash)
+        return descriptor_hash
+
+    def get_module(self, descriptor_path: str) -> tuple[tuple[str, str], ModuleDocs]:
+        key = (self.descriptor_key(descriptor_path), self.config_fingerprint)
+
+        def parse_module():
+            with open(descriptor_path, 'rb') as fh:
+                descriptor_bytes = fh.read()
+            with self.parse_lock:
+                sable_context = self.builder.parse(descriptor_bytes)
+            return ModuleDocs(RenderState(
+                self.builder.sable_config,
+                sable_context,
+                self.builder.jinja_env,
+                self.builder.jinja_extra_env,
+                self.main_page_content))
+
+        return (key, self.modules.get_or_create(key, parse_module))
+
+    def get_file(self, descriptor_path: str, file_path: str) -> Optional[bytes]:
+        """Returns the content of a page or a static file of the module, or None if the module doesn't have it."""
+        (key, module) = self.get_module(descriptor_path)
+
+        page = module.pages.get(file_path)
+        if page is not None:
+            return self.pages.get_or_create(key + (file_path,), lambda: render_page(module.render_state, page))
+
+        source_path = self.static_files.get(file_path)
+        if source_path is not None:
+            with open(source_path, 'rb') as fh:
+                return fh.read()
+
+        return None
+
+    def metrics(self) -> dict:
+        return {"modules": self.modules.stats(), "pages": self.pages.stats()}
+
+
+class ModuleRequestHandler(BaseHTTPRequestHandler):
+    server_version = "sabledocs"
+
+    def do_GET(self):
+        self.respond(True)
+
+    def do_HEAD(self):
+        self.respond(False)
+
+    def respond(self, include_body: bool):
+        module_server: ModuleServer = self.server.module_server
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+
+        if path == METRICS_PATH:
+            return self.send_content(json.dumps(module_server.metrics(), indent=2).encode('utf-8'), "application/json", include_body)
+
+        if path == "/":
+            links = "".join(f'<li><a href="{html.escape(m)}/">{html.escape(m)}</a></li>' for m in module_server.list_modules())
+            return self.send_content(f"<!DOCTYPE html><html><body><ul>{links}</ul></body></html>".encode('utf-8'), "text/html", include_body)
+
+        resolved = module_server.resolve(path)
+        if resolved is None:
+            return self.send_error(404)
+
+        (module_id, descriptor_path, file_path) = resolved
+        if file_path == "" and not path.endswith("/"):
+            # The pages use relative links, so the main page of a module has to be served from a folder URL.
+            self.send_response(301)
+            self.send_header("Location", urllib.parse.quote(f"/{module_id}/"))
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+
+        try:
+            content = module_server.get_file(descriptor_path, file_path or "index.html")
+        except Exception as e:
+            self.log_error(f"Failed to serve {path}: {e}")
+            return self.send_error(500, f"Failed to build the documentation of the module {module_id}")
+
+        if content is None:
+            return self.send_error(404)
+
+        content_type = mimetypes.guess_type(file_path or "index.html")[0] or "application/octet-stream"
+        self.send_content(content, content_type, include_body)
+
+    def send_content(self, content: bytes, content_type: str, include_body: bool):
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8" if content_type.startswith("text/") else content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(content)
+
+
+def serve_modules(descriptor_dir: str, host: str, port: int, max_modules: int, max_page_cache_mb: int):
+    print("Starting Sabledocs module server")
+    check_python_version()
+
+    if not os.path.isdir(descriptor_dir):
+        return_error(f'The descriptor folder {descriptor_dir} does not exist.')
+
+    sable_config = load_sable_config(require_descriptor_file=False)
+    try:
+        module_server = ModuleServer(descriptor_dir, sable_config, max_modules, max_page_cache_mb * 1024 * 1024)
+    except BuildError as e:
+        return_error(str(e))
+
+    server = ThreadingHTTPServer((host, port), ModuleRequestHandler)
+    server.module_server = module_server
+    print()
+    print(f"Serving the modules in {descriptor_dir} at http://{host}:{port}/ (press Ctrl+C to stop)")
+    print(f"The cache metrics are available at http://{host}:{port}{METRICS_PATH}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+        print("Stopping the server.")
+    finally:
+        server.server_close()
@@ -0,0 +1,216 @@
+import functools
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+
+try:
+    # The resource module is not available on Windows, where the memory usage is not reported.
+    import resource
+except ImportError:
+    resource = None
+
+
+def max_rss_kb():
+    """Returns the maximum resident set size of the process so far, in kilobytes. This is the high-water mark of the whole
+       process, so it only grows during the build, the memory used by the phases is measured with tracemalloc instead."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # It's reported in bytes on macOS, and in kilobytes on Linux.
+    return max_rss // 1024 if sys.platform == "darwin" else max_rss
+
+
+class PhaseStats:
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        # The largest amount of memory allocated during a call of the phase (over the memory allocated when the call
+        # started), or None if the memory is not traced.
+        self.peak_memory_kb: Optional[int] = None
+
+    def add(self, seconds: float, peak_memory_kb: Optional[int] = None):
+        self.seconds += seconds
+        self.calls += 1
+        if peak_memory_kb is not None:
+            self.peak_memory_kb = max(self.peak_memory_kb or 0, peak_memory_kb)
+
+    def to_dict(self):
+        return {"seconds": self.seconds, "calls": self.calls, "peak_memory_kb": self.peak_memory_kb}
+
+
+class Instrumentation:
+    """Records the wall time, the number of calls and the peak memory of the phases of the build, and the time and the
+       peak memory of every descriptor file, and the time of every rendered page. Nested phases are measured inclusively,
+       for example the time of the markdown phase is also included in the time of the parse_file phase.
+
+       The memory is only measured with trace_memory, with tracemalloc, which slows down the build. The peak of a phase
+       is the most memory allocated by Python during it, over the memory allocated when it started."""
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False):
+        self.start_time = time.perf_counter()
+        self.phases: dict[str, PhaseStats] = {}
+        self.files: dict[str, dict] = {}
+        self.templates: dict[str, PhaseStats] = {}
+        self.pages: dict[str, float] = {}
+
+        self.trace_memory = trace_memory
+        self.started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        # The traced memory at the start of every measured block in progress, and the peak since then. The peak of
+        # tracemalloc is reset at the start and the end of every block, so it's folded into the blocks around it first.
+        self.memory_frames: list[list[int]] = []
+
+    def close(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def _update_memory_frames(self) -> int:
+        (current, peak) = tracemalloc.get_traced_memory()
+        for frame in self.memory_frames:
+            frame[1] = max(frame[1], peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def _start_memory_frame(self) -> Optional[list[int]]:
+        if not self.trace_memory:
+            return None
+        current = self._update_memory_frames()
+        frame = [current, current]
+        self.memory_frames.append(frame)
+        return frame
+
+    def _end_memory_frame(self, frame: Optional[list[int]]) -> Optional[int]:
+        if frame is None:
+            return None
+        self._update_memory_frames()
+        self.memory_frames.remove(frame)
+        return (frame[1] - frame[0]) // 1024
+
+    def record(self, name: str, seconds: float, peak_memory_kb: Optional[int] = None):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        stats.add(seconds, peak_memory_kb)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        memory_frame = self._start_memory_frame()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, self._end_memory_frame(memory_frame))
+
+    @contextmanager
+    def file(self, file_name: str):
+        start = time.perf_counter()
+        memory_frame = self._start_memory_frame()
+        phase_seconds_before = {name: stats.seconds for name, stats in self.phases.items()}
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak_memory_kb = self._end_memory_frame(memory_frame)
+            self.record("parse_file", seconds, peak_memory_kb)
+            # The time of the phases nested in the processing of the file, like build_location_map or markdown.
+            nested_phases = {
+                name: stats.seconds - phase_seconds_before.get(name, 0.0)
+                for name, stats in self.phases.items()
+                if name != "parse_file" and stats.seconds > phase_seconds_before.get(name, 0.0)}
+            self.files[file_name] = {"seconds": seconds, "peak_memory_kb": peak_memory_kb, "phases": nested_phases}
+
+    def record_page(self, output_file: str, template: str, seconds: float):
+        self.pages[output_file] = seconds
+        stats = self.templates.get(template)
+        if stats is None:
+            stats = self.templates[template] = PhaseStats()
+        stats.add(seconds)
+
+    def wrap_methods(self, obj, phase_name: str, method_names: list[str]):
+        """Replaces the methods of the object with wrappers recording the time spent in them, used to measure the
+           custom comments parser."""
+        # The methods can call each other (for example ParseField calls ParseAll), only the outermost call is measured.
+        active = [False]
+
+        def timed(method):
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                if active[0]:
+                    return method(*args, **kwargs)
+                active[0] = True
+                try:
+                    with self.phase(phase_name):
+                        return method(*args, **kwargs)
+                finally:
+                    active[0] = False
+            return wrapper
+
+        for method_name in method_names:
+            setattr(obj, method_name, timed(getattr(obj, method_name)))
+
+    def report(self) -> dict:
+        return {
+            "total_seconds": time.perf_counter() - self.start_time,
+            "max_rss_kb": max_rss_kb(),
+            "phases": {name: stats.to_dict() for name, stats in self.phases.items()},
+            "files": self.files,
+            "templates": {name: stats.to_dict() for name, stats in self.templates.items()},
+            "pages": self.pages,
+        }
+
+    def save(self, path: str):
+        with open(path, mode='w', encoding='utf-8') as fh:
+            json.dump(self.report(), fh, indent=2)
+
+    def print_summary(self):
+        print()
+        print(f"{'Phase':<30} {'Time (s)':>10} {'Calls':>10}" + (f" {'Peak (KB)':>12}" if self.trace_memory else ""))
+        for name, stats in sorted(self.phases.items(), key=lambda p: -p[1].seconds):
+            print(f"{name:<30} {stats.seconds:>10.3f} {stats.calls:>10}" + (f" {stats.peak_memory_kb:>12}" if self.trace_memory else ""))
+
+        slowest_pages = sorted(self.pages.items(), key=lambda p: -p[1])[:5]
+        if slowest_pages:
+            print()
+            print("Slowest pages: " + ", ".join(f"{output_file} ({seconds:.3f} s)" for output_file, seconds in slowest_pages))
+
+
+class NullInstrumentation:
+    """Used when the instrumentation is not enabled, so the measured code doesn't need to check it."""
+    enabled = False
+
+    def record(self, name: str, seconds: float):
+        pass
+
+    def phase(self, name: str):
+        return nullcontext()
+
+    def file(self, file_name: str):
+        return nullcontext()
+
+    def record_page(self, output_file: str, template: str, seconds: float):
+        pass
+
+    def wrap_methods(self, obj, phase_name: str, method_names: list[str]):
+        pass
+
+    def close(self):
+        pass
+
+
+_instrumentation = NullInstrumentation()
+
+
+def get_instrumentation():
+    return _instrumentation
+
+
+def enable_instrumentation(trace_memory: bool = False) -> Instrumentation:
+    global _instrumentation
+    _instrumentation = Instrumentation(trace_memory)
+    return _instrumentation
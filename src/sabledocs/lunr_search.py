@@ -1,82 +1,218 @@
-import lunr
-from sabledocs.proto_model import Enum, Message, Package, SableContext, Service
+import io
+from typing import TYPE_CHECKING, Optional
 
+from sabledocs.proto_model import Enum, Message, Package, SableContext, Service, ServiceMethod
+from sabledocs.sable_config import SearchIndexGranularity
 
-def build_search_index(sable_context: SableContext) -> tuple[dict[str, dict[str, str]], lunr.index.Index]:
-    documents = []
+if TYPE_CHECKING:
+    import lunr
 
-    for package in sable_context.non_hidden_packages:
-        doc = {
+
+class SearchContentBuilder:
+    """Builds the content of a search document line by line. The lines are streamed into a buffer, so building the
+       content takes linear time, as opposed to repeated string concatenation, which is quadratic in its size."""
+    def __init__(self):
+        self.buffer = io.StringIO()
+
+    def add_line(self, line: str):
+        self.buffer.write(line)
+        self.buffer.write("\n")
+
+    def add_name_segments(self, full_name: str):
+        for name_segment in full_name.split("."):
+            self.add_line(name_segment)
+
+    def build(self) -> str:
+        return self.buffer.getvalue()
+
+
+def package_url(package: Package) -> str:
+    return f'{package.name if package.name else "__default"}.html'
+
+
+def type_url(package: Package, type_full_name: str, anchor: str) -> str:
+    """Returns the URL of a symbol on the page of its type, which is the package page, unless the types are split to
+       separate pages."""
+    return f"{package.type_pages.get(type_full_name) or package_url(package)}#{anchor}"
+
+
+def build_search_documents(packages: list[Package]) -> list[dict[str, str]]:
+    return [
+        {
             "package": package.name,
-            "url": f"{package.name}.html",
+            "url": package_url(package),
             "content": build_package_content(package)
         }
+        for package in packages]
 
-        documents.append(doc)
+
+def build_symbol_search_documents(packages: list[Package]) -> list[dict[str, str]]:
+    """Builds one search document for every service, method, message, field and enum, pointing to the anchor of the
+       symbol (or, for fields, the anchor of their message) on the page of its type."""
+    documents = []
+
+    def add_document(ref: str, title: str, package: Package, type_full_name: str, anchor: str, builder: SearchContentBuilder):
+        documents.append({
+            "ref": ref,
+            "title": title,
+            "package": package.name,
+            "url": type_url(package, type_full_name, anchor),
+            "content": builder.build()
+        })
+
+    for package in packages:
+        for service in package.services:
+            builder = SearchContentBuilder()
+            builder.add_name_segments(service.full_name)
+            builder.add_line(service.description)
+            for method in service.methods:
+                builder.add_line(method.name)
+            add_document(f"service-{service.full_name}", f"service {service.full_name}", package, service.full_name, f"service-{service.full_name}", builder)
+
+            for method in service.methods:
+                builder = SearchContentBuilder()
+                append_service_method_content(builder, method)
+                anchor = f"service-{service.full_name}-{method.name}"
+                add_document(anchor, f"rpc {service.full_name}.{method.name}", package, service.full_name, anchor, builder)
+
+        for message in package.messages:
+            # Map entries are not displayed in the documentation, so there is nothing to link to.
+            if message.is_map_entry:
+                continue
+
+            builder = SearchContentBuilder()
+            builder.add_name_segments(message.full_name)
+            builder.add_line(message.description)
+            for field in message.fields:
+                builder.add_line(field.name)
+            add_document(f"message-{message.full_name}", f"message {message.full_name}", package, message.full_name, f"message-{message.full_name}", builder)
+
+            for field in message.fields:
+                builder = SearchContentBuilder()
+                builder.add_line(field.name)
+                builder.add_line(field.description)
+                builder.add_name_segments(field.full_type)
+                add_document(
+                    f"field-{message.full_name}.{field.name}",
+                    f"field {message.full_name}.{field.name}",
+                    package,
+                    message.full_name,
+                    f"message-{message.full_name}",
+                    builder)
+
+        for enum in package.enums:
+            builder = SearchContentBuilder()
+            append_enum_content(builder, enum)
+            add_document(f"enum-{enum.full_name}", f"enum {enum.full_name}", package, enum.full_name, f"enum-{enum.full_name}", builder)
+
+    return documents
+
+
+def search_ref_field(sable_context: SableContext) -> str:
+    return "ref" if sable_context.sable_config.search_index_granularity == SearchIndexGranularity.SYMBOL else "package"
+
+
+def build_search_documents_dict(sable_context: SableContext, packages: list[Package]) -> dict[str, dict[str, str]]:
+    ref_field = search_ref_field(sable_context)
+    documents = (
+        build_symbol_search_documents(packages)
+        if ref_field == "ref"
+        else build_search_documents(packages))
+
+    return {d[ref_field]:d for d in documents}
+
+
+def build_search_index(sable_context: SableContext, packages: Optional[list[Package]] = None) -> tuple[dict[str, dict[str, str]], "lunr.index.Index"]:
+    """Builds the search index of the given packages, or of every non-hidden package if packages is not specified."""
+    # lunr is only imported when a search index is built, so builds without the search don't need to load it.
+    import lunr
+
+    documents_dict = build_search_documents_dict(sable_context, sable_context.non_hidden_packages if packages is None else packages)
 
     builder = lunr.get_default_builder()
     #builder.metadata_whitelist.append("position") This can be enabled to get position information in the search results, not used yet.
 
     idx = lunr.lunr(
-        ref="package", fields=("content", "content", "url"), documents=documents, builder=builder
+        ref=search_ref_field(sable_context), fields=("content", "content", "url"), documents=list(documents_dict.values()), builder=builder
     )
 
-    documents_dict = {d["package"]:d for d in documents}
-
     return (documents_dict, idx)
 
 
+def search_shard_name(package_name: str, shard_depth: int) -> str:
+    """Returns the name of the search index shard of a package, which is the first shard_depth segments of the package name."""
+    if shard_depth <= 0:
+        return "all"
+
+    return ".".join(package_name.split(".")[:shard_depth]) if package_name else "__default"
+
+
+def build_search_shards(sable_context: SableContext, shard_depth: int) -> dict[str, list[Package]]:
+    shards: dict[str, list[Package]] = {}
+    for package in sable_context.non_hidden_packages:
+        shards.setdefault(search_shard_name(package.name, shard_depth), []).append(package)
+
+    return shards
+
+
+def search_shard_files(shard_name: str) -> tuple[str, str]:
+    """Returns the paths of the index and the documents files of a shard, relative to the output folder."""
+    return (f"search/{shard_name}.index.json", f"search/{shard_name}.documents.json")
+
+
+def build_search_manifest(shards: dict[str, list[Package]]) -> dict:
+    return {
+        "shards": [
+            {
+                "name": shard_name,
+                "packages": [p.name for p in packages],
+                "index": search_shard_files(shard_name)[0],
+                "documents": search_shard_files(shard_name)[1]
+            }
+            for shard_name, packages in shards.items()]
+    }
+
+
 def build_package_content(package: Package):
-    acc = ""
-    acc += package.name + "\n"
-    acc += package.description + "\n"
+    builder = SearchContentBuilder()
+    builder.add_line(package.name)
+    builder.add_line(package.description)
     for service in package.services:
-        acc = append_service_content(acc, service)
+        append_service_content(builder, service)
 
     for message in package.messages:
-        acc = append_message_content(acc, message)
+        append_message_content(builder, message)
 
     for enum in package.enums:
-        acc = append_enum_content(acc, enum)
-    
-    return acc
+        append_enum_content(builder, enum)
 
+    return builder.build()
 
-def append_service_content(acc: str, service: Service):
-    for name_segment in service.full_name.split("."):
-        acc += name_segment + "\n"
 
-    acc += service.description + "\n"
+def append_service_content(builder: SearchContentBuilder, service: Service):
+    builder.add_name_segments(service.full_name)
+    builder.add_line(service.description)
     for method in service.methods:
-        acc += method.name + "\n"
-        acc += method.description + "\n"
-        for name_segment in method.request.full_type.split("."):
-            acc += name_segment + "\n"
+        append_service_method_content(builder, method)
 
-        for name_segment in method.response.full_type.split("."):
-            acc += name_segment + "\n"
-    
-    return acc
 
+def append_service_method_content(builder: SearchContentBuilder, method: ServiceMethod):
+    builder.add_line(method.name)
+    builder.add_line(method.description)
+    builder.add_name_segments(method.request.full_type)
+    builder.add_name_segments(method.response.full_type)
 
-def append_message_content(acc: str, message: Message):
-    for name_segment in message.full_name.split("."):
-        acc += name_segment + "\n"
 
+def append_message_content(builder: SearchContentBuilder, message: Message):
+    builder.add_name_segments(message.full_name)
     for field in message.fields:
-        acc += field.name + "\n"
-        acc += field.description + "\n"
-    
-    return acc
-
+        builder.add_line(field.name)
+        builder.add_line(field.description)
 
-def append_enum_content(acc: str, enum: Enum):
-    for name_segment in enum.full_name.split("."):
-        acc += name_segment + "\n"
 
-    acc += enum.description + "\n"
+def append_enum_content(builder: SearchContentBuilder, enum: Enum):
+    builder.add_name_segments(enum.full_name)
+    builder.add_line(enum.description)
     for value in enum.values:
-        acc += value.name + "\n"
-        acc += value.description + "\n"
-    
-    return acc
+        builder.add_line(value.name)
+        builder.add_line(value.description)
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Sequence
+
+import markdown
+
+from sabledocs.instrumentation import get_instrumentation
+
+
+class MarkdownConverter:
+    """Converts Markdown to HTML with a single reused Markdown engine, caching the result of every distinct input.
+       Proto comments are very repetitive (most of them are empty, or contain the same boilerplate), so the cache
+       saves most of the conversions. The cache can also be persisted to disk to be reused by the next build.
+
+       The Markdown engine keeps the state of the conversion in itself, so the converter can be used from several threads
+       (for example by a service parsing descriptors with the API) only with the lock."""
+    def __init__(self, extensions: Sequence[str]):
+        self.extensions = list(extensions)
+        self.engine = markdown.Markdown(extensions=self.extensions)
+        self.lock = threading.Lock()
+        self.cache: dict[str, str] = {}
+        self.used_keys: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def convert(self, md: str) -> str:
+        with self.lock:
+            html = self.cache.get(md)
+            if html is None:
+                self.misses += 1
+                with get_instrumentation().phase("markdown"):
+                    html = self.engine.reset().convert(md)
+                self.cache[md] = html
+            else:
+                self.hits += 1
+
+            self.used_keys.add(md)
+            return html
+
+    def cache_file_path(self, cache_dir: str) -> str:
+        # The cache is keyed by the extension list and the version of the Markdown library, since both affect the output.
+        key = hashlib.sha256(json.dumps([markdown.__version__, self.extensions]).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(cache_dir, f"markdown-{key}.json")
+
+    def load(self, cache_dir: str):
+        cache_file_path = self.cache_file_path(cache_dir)
+        if not os.path.exists(cache_file_path):
+            return
+
+        try:
+            with open(cache_file_path, mode='r', encoding='utf-8') as fh:
+                entries = json.load(fh)
+            with self.lock:
+                self.cache.update(entries)
+        except (OSError, ValueError):
+            print(f"WARNING: The Markdown cache file {cache_file_path} could not be read, it will be rebuilt.")
+
+    def save(self, cache_dir: str):
+        # Only the entries used by this build are saved, so the cache file doesn't grow indefinitely as comments change.
+        os.makedirs(cache_dir, exist_ok=True)
+        with self.lock:
+            entries = {k: self.cache[k] for k in self.used_keys}
+
+        # Writing to a temporary file and renaming it makes sure concurrent builds never see a partially written cache.
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, mode='w', encoding='utf-8') as fh:
+            json.dump(entries, fh)
+        os.replace(temp_path, self.cache_file_path(cache_dir))
+        self.trim()
+
+    def trim(self):
+        """Drops the entries which were not used since the last trim, and starts tracking the used entries again. Called
+           after every parse, so the cache of the long running servers doesn't grow with every edited comment."""
+        with self.lock:
+            self.cache = {k: self.cache[k] for k in self.used_keys}
+            self.used_keys = set()
+
+
+# The converters by their extension list, in the order they were last used.
+_converters: dict[tuple[str, ...], MarkdownConverter] = {}
+_converters_lock = threading.Lock()
+MAX_CONVERTERS = 4
+
+
+def get_markdown_converter(extensions: Sequence[str]) -> MarkdownConverter:
+    key = tuple(extensions)
+    with _converters_lock:
+        converter = _converters.pop(key, None)
+        if converter is None:
+            converter = MarkdownConverter(extensions)
+            if len(_converters) >= MAX_CONVERTERS:
+                # The least recently used converter is dropped.
+                del _converters[next(iter(_converters))]
+        _converters[key] = converter
+
+    return converter
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+from typing import Optional
+
+DEPLOY_MANIFEST_FILE_NAME = ".sabledocs-deploy.json"
+DEPLOY_MANIFEST_VERSION = 1
+
+
+def _load_manifest(output_dir: str) -> dict:
+    manifest_path = os.path.join(output_dir, DEPLOY_MANIFEST_FILE_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+
+    try:
+        with open(manifest_path, mode='r', encoding='utf-8') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+    if manifest.get("version") != DEPLOY_MANIFEST_VERSION:
+        return {}
+
+    return manifest
+
+
+def load_deploy_manifest(output_dir: str) -> dict[str, str]:
+    """Returns the hashes of the output files of the previous build, by their relative path."""
+    return _load_manifest(output_dir).get("files", {})
+
+
+class OutputDirectoryWriter:
+    """Writes the output files into the output folder. A file is only written if it's new or its content changed, so the
+       unchanged files keep their modification time, and tools like rsync don't upload them again.
+
+       If queue_size is larger than 0, the files are written by a background thread, so the next pages are rendered
+       while the previous ones are written. At most queue_size files wait to be written, so the rendered pages don't
+       pile up in memory if the disk is slower than the rendering.
+
+       The writer records the files of the output, and finish() saves them with the added, changed and removed files into
+       a manifest, which deploy scripts can use to only upload the changed files, and to invalidate them in a CDN. The
+       files of the previous build which were not written or kept by this build are removed by finish(), so the stages of
+       the build only have to call remove() for files they have to remove before that.
+
+       The manifest is the only record of the output files. The stages can attach attributes to the files (for example
+       the fingerprint of a page, or the sizes of its compressed sidecars), which the next build reads from
+       previous_attributes."""
+    def __init__(self, output_dir: str, queue_size: int = 0):
+        self.output_dir = output_dir
+        previous_manifest = _load_manifest(output_dir)
+        self.previous_hashes: dict[str, str] = previous_manifest.get("files", {})
+        self.previous_attributes: dict[str, dict] = previous_manifest.get("attributes", {})
+        # The hashes of the files written or kept by this build, by their relative path, always with forward slashes.
+        self.hashes: dict[str, str] = {}
+        # The files passed to write or keep, and not removed since. Unlike the hashes, these are recorded right away, not
+        # when the background thread gets to them.
+        self.outputs: set[str] = set()
+        self.removed: set[str] = set()
+        self.attributes: dict[str, dict] = {}
+        self.added: set[str] = set()
+        self.changed: set[str] = set()
+        self.deleted: set[str] = set()
+        self.lock = threading.Lock()
+        self.queue: Optional[queue.Queue] = queue.Queue(maxsize=queue_size) if queue_size > 0 else None
+        self.thread: Optional[threading.Thread] = None
+        self.error: Optional[BaseException] = None
+
+    def write(self, output_file: str, content: bytes):
+        output_file = output_file.replace(os.sep, "/")
+        with self.lock:
+            self.outputs.add(output_file)
+            self.removed.discard(output_file)
+        self._enqueue(self._write, output_file, content)
+
+    def remove(self, output_file: str):
+        """Removes a file from the output, after the files passed to write before it are written."""
+        output_file = output_file.replace(os.sep, "/")
+        with self.lock:
+            self.outputs.discard(output_file)
+            self.removed.add(output_file)
+            self.attributes.pop(output_file, None)
+        self._enqueue(self._remove, output_file)
+
+    def _enqueue(self, operation, *args):
+        if self.queue is None:
+            operation(*args)
+            return
+
+        self._raise_error()
+        with self.lock:
+            # Files can be written from several threads (for example the sidecars of the precompression), so the check and
+            # the start of the background thread are done under the lock, otherwise two threads could start one each.
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._write_queued_files, name="sabledocs-writer", daemon=True)
+                self.thread.start()
+        # Blocks if the queue is full, until the background thread catches up.
+        self.queue.put((operation, args))
+
+    def keep(self, output_file: str, content_hash: Optional[str] = None):
+        """Records a file of the previous build, which is not written again, because it's known to be up to date."""
+        output_file = output_file.replace(os.sep, "/")
+        if content_hash is None:
+            content_hash = self.previous_hashes.get(output_file)
+        if content_hash is None:
+            with open(os.path.join(self.output_dir, output_file), 'rb') as fh:
+                content_hash = hashlib.sha256(fh.read()).hexdigest()
+        with self.lock:
+            self.hashes[output_file] = content_hash
+            self.outputs.add(output_file)
+            self.removed.discard(output_file)
+
+    def set_attributes(self, output_file: str, **attributes):
+        """Attaches attributes to a file of the output, which are saved in the manifest. They have to be JSON serializable."""
+        output_file = output_file.replace(os.sep, "/")
+        with self.lock:
+            self.attributes.setdefault(output_file, {}).update(attributes)
+
+    def output_files(self) -> list[str]:
+        """Returns the relative paths of the files written or kept so far."""
+        with self.lock:
+            return sorted(self.outputs)
+
+    def recorded_hash(self, output_file: str) -> Optional[str]:
+        """Returns the hash of the file written or kept by this build, or by the previous build, if this build didn't write,
+           keep or remove it yet."""
+        output_file = output_file.replace(os.sep, "/")
+        with self.lock:
+            if output_file in self.hashes:
+                return self.hashes[output_file]
+            if output_file in self.outputs or output_file in self.removed:
+                # Still waiting in the queue.
+                return None
+            return self.previous_hashes.get(output_file)
+
+    def has_output(self, output_file: str) -> bool:
+        """Returns whether the file was written or kept so far (even if it's still waiting in the queue)."""
+        with self.lock:
+            return output_file.replace(os.sep, "/") in self.outputs
+
+    def files_with_attribute(self, name: str) -> list[str]:
+        """Returns the files which have the attribute set, by this build, or by the previous build, if this build didn't
+           write, keep or remove them yet."""
+        with self.lock:
+            current = {f for f, attributes in self.attributes.items() if attributes.get(name) and f in self.outputs}
+            previous = {
+                f for f, attributes in self.previous_attributes.items()
+                if attributes.get(name) and f not in self.outputs and f not in self.removed}
+        return sorted(current | previous)
+
+    def _write(self, output_file: str, content: bytes):
+        output_path = os.path.join(self.output_dir, output_file)
+        content_hash = hashlib.sha256(content).hexdigest()
+
+        exists = os.path.exists(output_path)
+        if exists and os.path.getsize(output_path) == len(content):
+            with open(output_path, 'rb') as fh:
+                unchanged = fh.read() == content
+        else:
+            unchanged = False
+
+        if not unchanged:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, 'wb') as fh:
+                fh.write(content)
+
+        with self.lock:
+            self.hashes[output_file] = content_hash
+            self.deleted.discard(output_file)
+            if not exists:
+                self.added.add(output_file)
+            elif not unchanged and output_file not in self.added:
+                self.changed.add(output_file)
+
+    def _remove(self, output_file: str):
+        output_path = os.path.join(self.output_dir, output_file)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+            with self.lock:
+                self.deleted.add(output_file)
+
+        with self.lock:
+            self.hashes.pop(output_file, None)
+            self.added.discard(output_file)
+            self.changed.discard(output_file)
+
+    def _write_queued_files(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if self.error is None:
+                    (operation, args) = item
+                    operation(*args)
+            except BaseException as e:
+                # The error is raised in the main thread, by the next call of write or flush. The rest of the queue is
+                # drained without writing, so the main thread is never blocked on a full queue.
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def flush(self):
+        """Waits until every file passed to write is written."""
+        if self.queue is not None:
+            self.queue.join()
+        self._raise_error()
+
+    def close(self):
+        """Stops the background thread, after every file passed to write is written. The writer can still be used after
+           that, the thread is started again by the next write."""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        # The error is only raised once, so a writer which is used for several builds can continue after a failed one.
+        (error, self.error) = (self.error, None)
+        if error is not None:
+            raise error
+
+    def finish(self) -> dict:
+        """Closes the writer, removes the files of the previous build which were not written or kept by this build, and
+           saves the deploy manifest. Returns the content of the manifest."""
+        self.close()
+
+        stale = self.previous_hashes.keys() - self.hashes.keys()
+        for output_file in stale:
+            stale_path = os.path.join(self.output_dir, output_file)
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+        removed = sorted(stale | (self.deleted - self.hashes.keys()))
+
+        manifest = {
+            "version": DEPLOY_MANIFEST_VERSION,
+            "files": self.hashes,
+            "attributes": {f: attributes for f, attributes in self.attributes.items() if attributes and f in self.hashes},
+            "added": sorted(self.added),
+            "changed": sorted(self.changed),
+            "removed": removed
+        }
+        with open(os.path.join(self.output_dir, DEPLOY_MANIFEST_FILE_NAME), mode='w', encoding='utf-8') as fh:
+            json.dump(manifest, fh, indent=2, sort_keys=True)
+
+        unchanged = len(self.hashes) - len(self.added) - len(self.changed)
+        print(f"Output written, {len(self.added)} files added, {len(self.changed)} changed, {unchanged} unchanged, {len(removed)} removed.")
+
+        return manifest
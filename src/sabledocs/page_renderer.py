@@ -0,0 +1,291 @@
+import functools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+from sabledocs.instrumentation import get_instrumentation
+from sabledocs.lunr_search import build_search_documents_dict, build_search_index, build_search_manifest, build_search_shards, search_shard_files
+from sabledocs.proto_model import Package, SableContext
+from sabledocs.sable_config import PageLayout, SableConfig, SearchIndexMode
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+SEARCH_MANIFEST_FILE = "search/manifest.json"
+
+
+class RenderError(Exception):
+    pass
+
+
+class Page:
+    """A single output file of the documentation, identified by its kind and the key needed to render it.
+       Pages are sent to the render workers, so they only carry names, not model objects."""
+    def __init__(self, output_file: str, kind: str, key: Optional[str] = None):
+        self.output_file = output_file
+        self.kind = kind
+        self.key = key
+
+    @property
+    def description(self):
+        match self.kind:
+            case "package":
+                return f'the page of the package "{self.key}"' if self.key else "the page of the default package"
+            case "types":
+                return f"the type page {self.key}"
+            case "extra":
+                return f"the extra template {self.key}"
+            case "search-index" | "search-documents":
+                return f'the search index shard "{self.key}"'
+            case _:
+                return self.output_file
+
+    @property
+    def template(self):
+        """The name of the template the page is rendered with, used to report the render times per template."""
+        match self.kind:
+            case "package" | "index" | "search":
+                return f"{self.kind}.html"
+            case "types":
+                return "type_page.html"
+            case "extra":
+                return self.key
+            case _:
+                return self.kind
+
+
+class TypePage:
+    """A page of the split layout, containing some of the services, messages and enums of a package."""
+    def __init__(self, output_file: str, package: Package):
+        self.output_file = output_file
+        self.package = package
+        self.services = []
+        self.messages = []
+        self.enums = []
+
+
+class RenderState:
+    def __init__(
+            self,
+            sable_config: SableConfig,
+            sable_context: SableContext,
+            jinja_env: "Environment",
+            jinja_extra_env: Optional["Environment"],
+            main_page_content: str):
+        self.sable_config = sable_config
+        self.sable_context = sable_context
+        self.jinja_env = jinja_env
+        self.jinja_extra_env = jinja_extra_env
+        self.main_page_content = main_page_content
+        self.packages_by_name = {p.name: p for p in sable_context.non_hidden_packages}
+        self.type_pages = layout_type_pages(sable_context.non_hidden_packages, sable_config)
+        self.search_shards = (
+            build_search_shards(sable_context, sable_config.search_index_shard_depth)
+            if sable_config.enable_lunr_search and sable_config.search_index_mode == SearchIndexMode.EXTERNAL
+            else {})
+        self.render_input = {
+            'sable_config': sable_config,
+            'packages': sable_context.packages,
+            'non_hidden_packages': sable_context.non_hidden_packages,
+            'all_messages': sable_context.all_messages,
+            'all_enums': sable_context.all_enums,
+            'types_by_full_name': sable_context.types_by_full_name,
+            'used_by': sable_context.used_by
+        }
+
+
+def package_output_file(package_name: str):
+    return f'{package_name if package_name else "__default"}.html'
+
+
+def type_page_output_file(package_name: str, suffix: str):
+    # The separator can't occur in Proto names, so a type page never collides with the page of a nested package.
+    return f'{package_name if package_name else "__default"}-{suffix}.html'
+
+
+def layout_type_pages(packages: list[Package], sable_config: SableConfig) -> dict[str, TypePage]:
+    """In the split layout, distributes the services, messages and enums of the packages to type pages, types_per_page
+       on each, and records the page of every type in the type_pages of its package. With one type per page, the pages
+       are named after the types, so their URLs don't change when other types are added. Returns the type pages by their
+       output file, which is empty in the package layout."""
+    type_pages = {}
+    types_per_page = max(sable_config.types_per_page, 1)
+    for package in packages:
+        package.type_pages = {}
+        if sable_config.page_layout != PageLayout.SPLIT:
+            continue
+
+        types = (
+            [("services", s) for s in package.services]
+            + [("messages", m) for m in package.messages if not m.is_map_entry]
+            + [("enums", e) for e in package.enums])
+        for i in range(0, len(types), types_per_page):
+            chunk = types[i:i + types_per_page]
+            if types_per_page == 1:
+                full_name = chunk[0][1].full_name
+                suffix = full_name[len(package.name) + 1:] if package.name else full_name
+            else:
+                suffix = str(i // types_per_page + 1)
+
+            type_page = TypePage(type_page_output_file(package.name, suffix), package)
+            for (kind, item) in chunk:
+                getattr(type_page, kind).append(item)
+                package.type_pages[item.full_name] = type_page.output_file
+            type_pages[type_page.output_file] = type_page
+
+    return type_pages
+
+
+def collect_pages(render_state: RenderState) -> list[Page]:
+    sable_config = render_state.sable_config
+    pages = []
+    for package in render_state.sable_context.non_hidden_packages:
+        pages.append(Page(package_output_file(package.name), "package", package.name))
+        pages.extend(Page(f, "types", f) for f in dict.fromkeys(package.type_pages.values()))
+    pages.append(Page("index.html", "index"))
+
+    if sable_config.enable_lunr_search:
+        pages.append(Page("search.html", "search"))
+
+        # In the external mode, the search index of every shard is a separate page, so the shards are built in parallel.
+        for shard_name in render_state.search_shards:
+            (index_file, documents_file) = search_shard_files(shard_name)
+            pages.append(Page(index_file, "search-index", shard_name))
+            pages.append(Page(documents_file, "search-documents", shard_name))
+
+        if render_state.search_shards:
+            pages.append(Page(SEARCH_MANIFEST_FILE, "search-manifest"))
+
+    if sable_config.extra_template_path != "":
+        for root, _, files in os.walk(sable_config.extra_template_path):
+            dir_path = "" if root == sable_config.extra_template_path else (
+                root.removeprefix(sable_config.extra_template_path).rstrip("/\\"))
+            if "/_" in dir_path or "\\_" in dir_path:  # ignore subdirectories that start with "_"
+                continue
+            for file in files:
+                if not file.endswith(sable_config.extra_template_suffix):
+                    continue
+                file_path = file if dir_path == "" else str(os.path.join(dir_path, file))
+                pages.append(Page(file_path, "extra", file_path))
+
+    return pages
+
+
+def render_page(render_state: RenderState, page: Page) -> bytes:
+    # NOTE: When the output files are generated, the encode('utf-8') option has to be used, otherwise Unicode characters like © can end up garbled.
+    match page.kind:
+        case "package":
+            output = (render_state.jinja_env
+                      .get_template("package.html")
+                      .render(render_state.render_input | {'package': render_state.packages_by_name[page.key]}))
+        case "types":
+            type_page = render_state.type_pages[page.key]
+            output = (render_state.jinja_env
+                      .get_template("type_page.html")
+                      .render(render_state.render_input | {
+                          'package': type_page.package,
+                          'type_page': type_page,
+                          'package_page': package_output_file(type_page.package.name)}))
+        case "index":
+            output = (render_state.jinja_env
+                      .get_template("index.html")
+                      .render(render_state.render_input | {'main_page_content': render_state.main_page_content}))
+        case "search" if render_state.search_shards:
+            output = render_state.jinja_env.get_template("search.html").render(
+                sable_config=render_state.sable_config,
+                search_index_mode="external",
+                search_manifest_file=SEARCH_MANIFEST_FILE,
+                search_shards=list(render_state.search_shards.keys()))
+        case "search":
+            with get_instrumentation().phase("build_search_index"):
+                (search_documents, search_index) = build_search_index(render_state.sable_context)
+            output = render_state.jinja_env.get_template("search.html").render(
+                sable_config=render_state.sable_config,
+                search_index_mode="inline",
+                search_documents=json.dumps(search_documents),
+                search_index=json.dumps(search_index.serialize()))
+        case "search-index":
+            with get_instrumentation().phase("build_search_index"):
+                (_, search_index) = build_search_index(render_state.sable_context, render_state.search_shards[page.key])
+            output = json.dumps(search_index.serialize())
+        case "search-documents":
+            output = json.dumps(build_search_documents_dict(render_state.sable_context, render_state.search_shards[page.key]))
+        case "search-manifest":
+            output = json.dumps(build_search_manifest(render_state.search_shards))
+        case "extra":
+            output = render_state.jinja_extra_env.get_template(page.key).render(render_state.render_input)
+        case _:
+            raise RenderError(f"Unknown page kind {page.kind}")
+
+    return output.encode('utf-8')
+
+
+def _render_page_job(render_state: RenderState, page: Page) -> bytes:
+    try:
+        return render_page(render_state, page)
+    except Exception as e:
+        raise RenderError(f"Failed to render {page.description}: {e}") from e
+
+
+# The state used by a render worker process. It's set by the initializer of the worker, and with the fork start method,
+# the worker inherits it from the parent, so the parsed model and the Jinja environments never have to be pickled.
+# Every pool has its own workers, so concurrent renders don't share it.
+_worker_render_state: Optional[RenderState] = None
+
+
+def _init_render_worker(render_state: RenderState):
+    global _worker_render_state
+    _worker_render_state = render_state
+
+
+def _render_page_in_worker(page: Page) -> bytes:
+    return _render_page_job(_worker_render_state, page)
+
+
+def create_executor(jobs: int, render_state: RenderState) -> tuple[Executor, Callable[[Page], bytes]]:
+    """Returns the pool rendering the pages, and the function to call in it for every page."""
+    # Processes are used where fork is available, because rendering is CPU bound, and would not benefit from threads
+    # due to the GIL. On other platforms we fall back to threads, since the custom comments parser and the model cannot
+    # be reliably pickled for spawned processes.
+    # Threads are also used if other threads are running (for example the HTTP server of the development server, the
+    # background writer, or the threads of a service using the API), because a forked child only gets a copy of the
+    # calling thread, so a lock held by another thread at the time of the fork (in logging, the Markdown converter or a
+    # queue) would never be released in the child, and the worker could deadlock.
+    if "fork" in multiprocessing.get_all_start_methods() and threading.active_count() == 1:
+        executor = ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_render_worker,
+            initargs=(render_state,))
+        return (executor, _render_page_in_worker)
+    else:
+        return (ThreadPoolExecutor(max_workers=jobs), functools.partial(_render_page_job, render_state))
+
+
+def resolve_jobs(jobs: int) -> int:
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+
+def render_pages(render_state: RenderState, pages: list[Page], jobs: int = 1) -> Iterator[tuple[Page, bytes]]:
+    """Renders the pages, using a pool of jobs workers if jobs is larger than 1 (or all the CPU cores if it's 0).
+       The rendered pages are yielded in the same order as they were passed in, regardless of the number of workers."""
+    jobs = resolve_jobs(jobs)
+
+    if jobs == 1 or len(pages) <= 1:
+        instrumentation = get_instrumentation()
+        for page in pages:
+            start = time.perf_counter()
+            output = _render_page_job(render_state, page)
+            instrumentation.record_page(page.output_file, page.template, time.perf_counter() - start)
+            yield (page, output)
+    else:
+        (executor, render_job) = create_executor(min(jobs, len(pages)), render_state)
+        try:
+            yield from zip(pages, executor.map(render_job, pages))
+        finally:
+            # If a page fails, we don't wait for the rest of the pages to be rendered.
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,200 @@
+"""An on-disk cache of the parsed model, so a build of an unchanged descriptor doesn't have to parse it again.
+
+The model is stored with pickle, keyed by the hash of everything the parsing depends on: the descriptor, the config
+options used by the parser, the source of the custom comments parser, and the source of the parser itself. A cache
+entry is never updated, a changed input simply results in a new key, and the least recently used entries are removed
+when the cache exceeds its size limit.
+
+Since loading a pickle can execute code, the cache folder must only be writable by trusted users.
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+from typing import Optional
+
+from sabledocs.proto_model import Package, SableContext, model_vars
+from sabledocs.sable_config import SableConfig
+
+PARSE_CACHE_VERSION = 1
+CACHE_FILE_PREFIX = "parsed-"
+CACHE_FILE_SUFFIX = ".pickle"
+
+# The config fields the parser uses. Every other field only affects the rendering, so changing it keeps the cache valid.
+PARSE_CONFIG_FIELDS = (
+    "markdown_extensions", "repository_url", "repository_branch", "repository_dir", "repository_type",
+    "ignore_comments_after", "ignore_comment_lines_containing", "hidden_packages", "include_packages", "member_ordering")
+
+# The modules producing the model. Their source is part of the key, so upgrading sabledocs never loads a stale model.
+PARSER_MODULES = ("proto_model.py", "proto_descriptor_parser.py", "comments_parser.py", "markdown_converter.py")
+
+_parser_source_hash: Optional[str] = None
+
+
+class _ModelPickler(pickle.Pickler):
+    """Pickles the references to the packages by their index. Otherwise every reference to another package (for example
+       from the type of a field) would pickle that package recursively, which exceeds the recursion limit of pickle when
+       there is a long chain of packages referencing each other."""
+    def __init__(self, fh, packages: list[Package]):
+        super().__init__(fh, protocol=pickle.HIGHEST_PROTOCOL)
+        self.package_indexes = {id(p): i for (i, p) in enumerate(packages)}
+
+    def persistent_id(self, obj):
+        return self.package_indexes.get(id(obj)) if type(obj) is Package else None
+
+
+class _ModelUnpickler(pickle.Unpickler):
+    def __init__(self, fh):
+        super().__init__(fh)
+        self.packages: list[Package] = []
+
+    def persistent_load(self, pid):
+        return self.packages[pid]
+
+
+def parser_source_hash() -> str:
+    global _parser_source_hash
+    if _parser_source_hash is None:
+        h = hashlib.sha256()
+        for module in PARSER_MODULES:
+            with open(os.path.join(os.path.dirname(__file__), module), 'rb') as fh:
+                h.update(fh.read())
+        _parser_source_hash = h.hexdigest()
+    return _parser_source_hash
+
+
+def parse_cache_key(sable_config: SableConfig, descriptor_bytes: bytes) -> str:
+    import markdown
+
+    h = hashlib.sha256()
+    h.update(json.dumps([
+        PARSE_CACHE_VERSION,
+        sys.version_info[:2],
+        markdown.__version__,
+        parser_source_hash(),
+        {field: repr(getattr(sable_config, field)) for field in PARSE_CONFIG_FIELDS}
+    ]).encode('utf-8'))
+
+    # The custom comments parser is keyed by its source. (The modules it imports are not tracked, if those change, the
+    # cache has to be cleared with the clear-parse-cache command.)
+    if sable_config.comments_parser_file:
+        with open(sable_config.comments_parser_file, 'rb') as fh:
+            h.update(fh.read())
+
+    h.update(descriptor_bytes)
+    return h.hexdigest()
+
+
+def cache_file_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, f"{CACHE_FILE_PREFIX}{key}{CACHE_FILE_SUFFIX}")
+
+
+def load_parsed_context(sable_config: SableConfig, key: str) -> Optional[SableContext]:
+    """Returns the cached model with the given key, or None if it's not in the cache."""
+    path = cache_file_path(sable_config.parse_cache_dir, key)
+    try:
+        with open(path, 'rb') as fh:
+            unpickler = _ModelUnpickler(fh)
+            # The packages are created first, so the references to them can be resolved, and filled in once the model is loaded.
+            packages = unpickler.packages = [Package.__new__(Package) for _ in range(unpickler.load())]
+            (package_vars, all_messages, all_enums, types_by_full_name, used_by) = unpickler.load()
+        for (package, attributes) in zip(packages, package_vars):
+            for (name, value) in attributes.items():
+                setattr(package, name, value)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        print(f"WARNING: The parse cache file {path} could not be read, the descriptor will be parsed again.")
+        return None
+
+    try:
+        # The modification time marks the entry as recently used, so it's evicted last.
+        os.utime(path)
+    except OSError:
+        pass
+
+    # The config is not cached, the model is attached to the config of the current build.
+    return SableContext(packages, all_messages, all_enums, sable_config, types_by_full_name, used_by)
+
+
+def save_parsed_context(sable_config: SableConfig, key: str, sable_context: SableContext):
+    cache_dir = sable_config.parse_cache_dir
+    os.makedirs(cache_dir, exist_ok=True)
+    packages = list(sable_context.packages)
+
+    # Writing to a temporary file and renaming it makes sure concurrent builds never see a partially written entry.
+    # (If two builds parse the same descriptor at the same time, both write the same entry, and the last one wins.)
+    fd, temp_path = tempfile.mkstemp(dir=cache_dir, prefix=CACHE_FILE_PREFIX, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode='wb') as fh:
+            pickler = _ModelPickler(fh, packages)
+            pickler.dump(len(packages))
+            pickler.dump((
+                [model_vars(p) for p in packages],
+                sable_context.all_messages,
+                sable_context.all_enums,
+                sable_context.types_by_full_name,
+                sable_context.used_by))
+        os.replace(temp_path, cache_file_path(cache_dir, key))
+    except Exception as e:
+        print(f"WARNING: The parsed model could not be saved to the parse cache: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return
+
+    evict_entries(cache_dir, sable_config.parse_cache_max_mb * 1024 * 1024, key)
+
+
+def list_entries(cache_dir: str) -> list[tuple[str, os.stat_result]]:
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.startswith(CACHE_FILE_PREFIX) and entry.name.endswith(CACHE_FILE_SUFFIX):
+            try:
+                entries.append((entry.path, entry.stat()))
+            except FileNotFoundError:
+                # Removed by a concurrent build.
+                pass
+    return entries
+
+
+def evict_entries(cache_dir: str, max_bytes: int, keep_key: str):
+    """Removes the least recently used entries until the total size of the cache is below max_bytes. The entry of the
+       current build is always kept, even if it's larger than the limit."""
+    keep_path = cache_file_path(cache_dir, keep_key)
+    entries = sorted(list_entries(cache_dir), key=lambda e: e[1].st_mtime_ns)
+    total_size = sum(stat.st_size for (_, stat) in entries)
+    for (path, stat) in entries:
+        if total_size <= max_bytes:
+            break
+        if path == keep_path:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # On Windows, an entry which is being loaded by another build can't be removed, it's evicted later.
+            continue
+        total_size -= stat.st_size
+
+
+def clear_parse_cache(cache_dir: str) -> int:
+    """Removes every entry of the parse cache (and the temporary files left behind by interrupted builds), and returns
+       the number of removed entries."""
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    removed = 0
+    for entry in os.scandir(cache_dir):
+        is_cache_entry = entry.name.startswith(CACHE_FILE_PREFIX) and entry.name.endswith(CACHE_FILE_SUFFIX)
+        if is_cache_entry or (entry.name.startswith(CACHE_FILE_PREFIX) and entry.name.endswith(".tmp")):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            removed += is_cache_entry
+    return removed
@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from sabledocs.output_writer import OutputDirectoryWriter
+from sabledocs.sable_config import SableConfig
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".json", ".svg", ".txt", ".xml"}
+SIDECAR_EXTENSIONS = {"gzip": ".gz", "br": ".br"}
+
+
+def load_brotli():
+    # Brotli is an optional dependency, it can be installed with pip install sabledocs[brotli].
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    match encoding:
+        case "gzip":
+            # The mtime is fixed, so the same content always results in the same compressed bytes.
+            return gzip.compress(content, compresslevel=9, mtime=0)
+        case "br":
+            return load_brotli().compress(content, quality=11)
+        case _:
+            raise ValueError(f"Unknown compression encoding {encoding}")
+
+
+def collect_compressible_files(writer: OutputDirectoryWriter) -> list[str]:
+    # Only the files of the current build are compressed, not the files of a previous build which will be removed.
+    return [f for f in writer.output_files() if os.path.splitext(f)[1] in COMPRESSIBLE_EXTENSIONS]
+
+
+class CompressionResult:
+    def __init__(self, output_file: str, content_hash: str, size: int, compressed_sizes: dict[str, Optional[int]], skipped: bool):
+        self.output_file = output_file
+        self.content_hash = content_hash
+        self.size = size
+        # The size of every sidecar, or None, if the compressed content was not smaller than the original, so no sidecar was written.
+        self.compressed_sizes = compressed_sizes
+        self.skipped = skipped
+
+
+def compress_file(writer: OutputDirectoryWriter, output_file: str, encodings: list[str]) -> CompressionResult:
+    path = os.path.join(writer.output_dir, output_file)
+    with open(path, 'rb') as fh:
+        content = fh.read()
+    content_hash = hashlib.sha256(content).hexdigest()
+
+    # The sizes of the sidecars are recorded by the previous build in the manifest of the writer, with the hash of the file.
+    previous_sizes = writer.previous_attributes.get(output_file, {}).get("compressed_sizes")
+    if (previous_sizes is not None
+            and writer.previous_hashes.get(output_file) == content_hash
+            and all(e in previous_sizes for e in encodings)
+            and all(previous_sizes[e] is None or os.path.exists(path + SIDECAR_EXTENSIONS[e]) for e in encodings)):
+        compressed_sizes = {e: previous_sizes[e] for e in encodings}
+        for encoding in encodings:
+            if compressed_sizes[encoding] is not None:
+                writer.keep(output_file + SIDECAR_EXTENSIONS[encoding])
+        writer.set_attributes(output_file, compressed_sizes=compressed_sizes)
+        return CompressionResult(output_file, content_hash, len(content), compressed_sizes, True)
+
+    # The sidecars which are not written (because the compressed content is not smaller) are removed by the writer, like
+    # every file of the previous build which is not part of the output any more.
+    compressed_sizes = {}
+    for encoding in encodings:
+        compressed = compress(content, encoding)
+        if len(compressed) < len(content):
+            writer.write(output_file + SIDECAR_EXTENSIONS[encoding], compressed)
+            compressed_sizes[encoding] = len(compressed)
+        else:
+            compressed_sizes[encoding] = None
+
+    writer.set_attributes(output_file, compressed_sizes=compressed_sizes)
+    return CompressionResult(output_file, content_hash, len(content), compressed_sizes, False)
+
+
+def format_size(size: Optional[int]) -> str:
+    return "-" if size is None else f"{size / 1024:.1f} KB"
+
+
+def print_size_report(results: list[CompressionResult], encodings: list[str]):
+    print()
+    print(f"{'File':<60} {'Original':>12} " + " ".join(f"{e:>12}" for e in encodings))
+    for r in results:
+        print(f"{r.output_file:<60} {format_size(r.size):>12} " + " ".join(f"{format_size(r.compressed_sizes[e]):>12}" for e in encodings))
+
+    total = sum(r.size for r in results)
+    totals = [sum(r.compressed_sizes[e] if r.compressed_sizes[e] is not None else r.size for r in results) for e in encodings]
+    print(f"{'Total':<60} {format_size(total):>12} " + " ".join(f"{format_size(t):>12}" for t in totals))
+
+
+def precompress_output(sable_config: SableConfig, writer: OutputDirectoryWriter):
+    """Writes compressed sidecar files (.gz and .br) next to every compressible file of the output, so they can be served by
+       static file servers supporting precompressed content. Files whose content did not change since the previous build,
+       based on the hashes recorded in the manifest of the writer, are not compressed again."""
+    encodings = [e for e in sable_config.precompress if e in SIDECAR_EXTENSIONS]
+    if "br" in encodings and load_brotli() is None:
+        print(
+            "WARNING: Brotli compression is configured, but the brotli package is not installed, so .br files are not generated. "
+            "It can be installed with pip install sabledocs[brotli].")
+        encodings.remove("br")
+
+    if not encodings:
+        return
+
+    # The files are read from the output folder, so the files queued in the writer have to be written first.
+    writer.flush()
+    files = collect_compressible_files(writer)
+
+    # Both zlib and brotli release the GIL while compressing, so threads are enough to compress files in parallel.
+    # (The sidecars of the files which don't exist any more, and of the encodings which are not enabled any more, are
+    # not kept, so the writer removes them.)
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        results = list(executor.map(lambda f: compress_file(writer, f, encodings), files))
+
+    print_size_report(results, encodings)
+    print(f"Precompression done, {sum(1 for r in results if not r.skipped)} files compressed, {sum(1 for r in results if r.skipped)} unchanged.")
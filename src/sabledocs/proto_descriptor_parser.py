@@ -1,18 +1,19 @@
-from typing import Dict, Sequence
+from fnmatch import fnmatchcase
+from typing import Dict, Iterator, Optional, Sequence
 from google.protobuf.descriptor_pb2 import FileDescriptorSet
+from google.protobuf.descriptor_pb2 import FileDescriptorProto
 from google.protobuf.descriptor_pb2 import EnumDescriptorProto
 from google.protobuf.descriptor_pb2 import EnumValueDescriptorProto
 from google.protobuf.descriptor_pb2 import DescriptorProto
 from google.protobuf.descriptor_pb2 import FieldDescriptorProto
 from google.protobuf.descriptor_pb2 import ServiceDescriptorProto
 from google.protobuf.descriptor_pb2 import MethodDescriptorProto
-from sabledocs.proto_model import MessageField, Message, EnumValue, Enum, OneOfFieldGroup, ServiceMethod, ServiceMethodArgument, Service, Package, LocationInfo, SableContext
+from sabledocs.proto_model import MessageField, Message, EnumValue, Enum, OneOfFieldGroup, ServiceMethod, ServiceMethodArgument, Service, Package, SableContext, TypeUsage
 from sabledocs.sable_config import MemberOrdering, RepositoryType, SableConfig
-import pprint
-import markdown
-import pprint
+from sabledocs.instrumentation import get_instrumentation
+from sabledocs.markdown_converter import get_markdown_converter
 import re
-from furl import furl
+from sys import intern
 
 COMMENT_PACKAGE_INDEX = 2
 COMMENT_MESSAGE_INDEX = 4
@@ -29,11 +30,19 @@ COMMENT_ENUM_VALUE_INDEX = 2
 
 COMMENT_SERVICE_METHOD_INDEX = 2
 
+PACKAGE_PATH = (COMMENT_PACKAGE_INDEX,)
+
 FIELD_TYPE_MESSAGE = 11
 FIELD_TYPE_ENUM = 14
 
 
 def build_source_code_url(repository_url, repository_type, repository_branch, repository_dir, file_path, line_number):
+    if repository_type == RepositoryType.NONE:
+        return None
+
+    # furl is only imported if a repository is configured.
+    from furl import furl
+
     match repository_type:
         case RepositoryType.NONE:
             return None
@@ -65,38 +74,42 @@ def build_source_code_url(repository_url, repository_type, repository_branch, re
 
 
 class ParseContext:
-    def __init__(self, config, package, source_file_path, path, locations):
+    def __init__(self, config, package, source_file_path, path, locations, types, map_fields):
         self.config = config
         self.package = package
         self.source_file_path = source_file_path
         self.path = path
         self.locations = locations
+        # The index of the messages and enums parsed so far, by their full name. It's shared by every file.
+        self.types: Dict[str, Message | Enum] = types
+        # The map fields, by the full name of their entry message. It's shared by every file.
+        self.map_fields: Dict[str, MessageField] = map_fields
 
     @classmethod
-    def New(cls, config, package, source_file_path, locations):
-        return ParseContext(config, package, source_file_path, "", locations)
+    def New(cls, config, package, source_file_path, locations, types, map_fields=None):
+        return ParseContext(config, package, source_file_path, (), locations, types, map_fields if map_fields is not None else {})
 
-    def WithPath(self, path):
-        return ParseContext(self.config, self.package, self.source_file_path, path, self.locations)
+    def WithPath(self, *path):
+        return ParseContext(self.config, self.package, self.source_file_path, path, self.locations, self.types, self.map_fields)
 
     def ExtendPath(self, *path):
-        return ParseContext(self.config, self.package, self.source_file_path, f"{self.path}.{'.'.join(map(str, path))}", self.locations)
+        return ParseContext(self.config, self.package, self.source_file_path, self.path + path, self.locations, self.types, self.map_fields)
 
-    def GetComments(self, path=""):
-        location = self.locations.get(self.path if path == "" else path, None)
+    def GetComments(self, path=()):
+        location = self.locations.get(path or self.path, None)
         if location is None:
             return ""
         else:
-            comments = location.comments
+            comments = build_comment(location)
             for ignore_after in self.config.ignore_comments_after:
                 comments = comments.split(ignore_after)[0]
             for ignore_line in self.config.ignore_comment_lines_containing:
                 comments = '\n'.join([c for c in comments.splitlines() if ignore_line not in c])
             return comments
 
-    def GetLineNumber(self, path=""):
-        location = self.locations.get(self.path if path == "" else path, None)
-        return 0 if location is None else location.line_number
+    def GetLineNumber(self, path=()):
+        location = self.locations.get(path or self.path, None)
+        return 0 if location is None else location.span[0]
 
 
 def parse_enum(enum: EnumDescriptorProto, ctx: ParseContext, parent_message, nested_type_chain: str):
@@ -129,6 +142,8 @@ def parse_enum(enum: EnumDescriptorProto, ctx: ParseContext, parent_message, nes
     for i, ev in enumerate(enum.value):
         e.values.append(parse_enum_value(ev, ctx.ExtendPath(COMMENT_ENUM_VALUE_INDEX, i)))
 
+    ctx.types[e.full_name] = e
+
     return e
 
 
@@ -142,29 +157,32 @@ def parse_enums(enums: Sequence[EnumDescriptorProto], ctx: ParseContext, parent_
 
 def parse_field(field: FieldDescriptorProto, containing_message: DescriptorProto, ctx: ParseContext):
     mf = MessageField()
-    mf.name = field.name
+    # Field names like "name" or "parent" are repeated in many messages.
+    mf.name = intern(field.name)
 
     mf.number = field.number
     mf.label = to_label_name(field.label, field.proto3_optional)
     mf.description = ctx.config.comments_parser.ParseField(ctx.GetComments())
     mf.description_html = markdown_to_html(mf.description, ctx.config)
     mf.line_number = ctx.GetLineNumber()
-    mf.full_type = field.type_name.strip(".") if field.type_name != "" else to_type_name(field.type)
+    # The type names are repeated by many fields, so they are interned to store every distinct name only once.
+    mf.full_type = intern(field.type_name.strip(".")) if field.type_name != "" else to_type_name(field.type)
     mf.default_value = field.default_value
-    mf.type = extract_type_name_from_full_name(field.type_name.strip(".")) if field.type_name != "" else to_type_name(field.type)
+    mf.type = intern(extract_type_name_from_full_name(field.type_name.strip("."))) if field.type_name != "" else to_type_name(field.type)
     mf.type_kind = "MESSAGE" if field.type == FIELD_TYPE_MESSAGE else "ENUM" if field.type == FIELD_TYPE_ENUM else "UNKNOWN"
 
     if mf.type.endswith("Entry"):
-        entry_nested_type = next(filter(lambda m: m.full_name == mf.full_type, ctx.package.messages), None)
-        if entry_nested_type is not None and entry_nested_type.is_map_entry:
-            mf.type = f"map<{entry_nested_type.fields[0].type}, {entry_nested_type.fields[1].type}>"
-            mf.full_type = f"map<{entry_nested_type.fields[0].type}, {entry_nested_type.fields[1].type}>"
+        entry_nested_type = ctx.types.get(mf.full_type)
+        if isinstance(entry_nested_type, Message) and entry_nested_type.is_map_entry:
+            ctx.map_fields[entry_nested_type.full_name] = mf
+            mf.type = intern(f"map<{entry_nested_type.fields[0].type}, {entry_nested_type.fields[1].type}>")
+            mf.full_type = mf.type
             mf.label = ""
 
     # We only set the oneof name if the field is not a Proto3 optional.
     # Proto3 optionals are represented as a "synthetic" oneof, which does nto need to be displayed in the docs.
     if field.HasField("oneof_index") and not field.proto3_optional:
-        mf.oneof_name = containing_message.oneof_decl[field.oneof_index].name
+        mf.oneof_name = intern(containing_message.oneof_decl[field.oneof_index].name)
 
     return mf
 
@@ -213,6 +231,8 @@ def parse_message(message: DescriptorProto, ctx: ParseContext, parent_message, n
         lambda n: OneOfFieldGroup(n, list(filter(lambda f: f.oneof_name == n, m.fields))),
         oneof_names))
 
+    ctx.types[m.full_name] = m
+
     return m
 
 
@@ -231,14 +251,14 @@ def parse_service_method(service_method: MethodDescriptorProto, ctx: ParseContex
     sm.description_html = markdown_to_html(sm.description, ctx.config)
     sm.line_number = ctx.GetLineNumber()
     sm.request = ServiceMethodArgument(
-        service_method.input_type[service_method.input_type.rfind(".") + 1:],
-        service_method.input_type.strip("."),
+        intern(service_method.input_type[service_method.input_type.rfind(".") + 1:]),
+        intern(service_method.input_type.strip(".")),
         "MESSAGE"
     )
 
     sm.response = ServiceMethodArgument(
-        service_method.output_type[service_method.output_type.rfind(".") + 1:],
-        service_method.output_type.strip("."),
+        intern(service_method.output_type[service_method.output_type.rfind(".") + 1:]),
+        intern(service_method.output_type.strip(".")),
         "MESSAGE"
     )
 
@@ -282,16 +302,64 @@ def extract_package_name_from_full_name(full_type_name: str):
         return full_type_name[:last_dot]
 
 
-def add_package_references(messages: list[Message], services: list[Service], packages: list[Package], hidden_packages: list[str]):
-    def find_matching_package(full_type_name):
-            # We sort the matching packages by the length of their name, and pick the longest.
-            # This is needed, because if we have a package foo, and a package foo.bar, and a type foo.bar.Baz,
-            # then we could incorrectly pick the package foo instead of foo.bar.
-            filtered = sorted(filter(lambda p: full_type_name.startswith(p.name), packages), key=lambda package: len(package.name), reverse=True)
-            return None if len(filtered) == 0 else filtered[0]
+class PackageIndex:
+    """Answers which package a type belongs to, and whether it's hidden, by looking up the dot-separated prefixes of
+       the type's full name, from the longest to the shortest. So every lookup takes O(depth) dictionary lookups instead
+       of scanning every package, and packages are only matched on segment boundaries (foo does not match foobar.X)."""
+    def __init__(self, packages: list[Package], hidden_packages: list[str]):
+        self.packages_by_name = {p.name: p for p in packages}
+        self.hidden_packages = set(hidden_packages)
+        self._package_cache: Dict[str, Optional[Package]] = {}
+        self._hidden_cache: Dict[str, bool] = {}
+
+    @staticmethod
+    def prefixes(full_type_name: str):
+        end = full_type_name.rfind(".")
+        while end != -1:
+            yield full_type_name[:end]
+            end = full_type_name.rfind(".", 0, end)
+        # Every type matches the default package.
+        yield ""
+
+    def find_package(self, full_type_name: str) -> Optional[Package]:
+        """Returns the package with the longest name containing the type. If we have a package foo, and a package foo.bar,
+           and a type foo.bar.Baz, then foo.bar is returned."""
+        if full_type_name not in self._package_cache:
+            self._package_cache[full_type_name] = next(
+                (self.packages_by_name[p] for p in self.prefixes(full_type_name) if p in self.packages_by_name),
+                None)
+
+        return self._package_cache[full_type_name]
+
+    def is_hidden(self, full_type_name: str) -> bool:
+        if full_type_name not in self._hidden_cache:
+            self._hidden_cache[full_type_name] = any(
+                p in self.hidden_packages for p in self.prefixes(full_type_name) if p != "")
+
+        return self._hidden_cache[full_type_name]
+
+
+def add_package_references(
+        messages: list[Message],
+        services: list[Service],
+        packages: list[Package],
+        hidden_packages: list[str],
+        map_fields: Optional[Dict[str, MessageField]] = None) -> Dict[str, list[TypeUsage]]:
+    """Sets the packages of the referenced types, and returns the fields and methods referencing every message and enum,
+       by the full name of the type. Every field and method is visited once, so it takes linear time. The map_fields are
+       the map fields by the full name of their entry message, as recorded by the parser, the types used in the entries
+       are reported as used by them."""
+    package_index = PackageIndex(packages, hidden_packages)
+    used_by: Dict[str, list[TypeUsage]] = {}
+    if map_fields is None:
+        map_fields = {}
+
+    def add_usage(full_type: str, kind: str, owner: Message | Service, member: MessageField | ServiceMethod):
+        used_by.setdefault(full_type, []).append(TypeUsage(
+            kind, owner, member, package_index.find_package(owner.full_name), package_index.is_hidden(owner.full_name)))
 
     for m in messages:
-        package = find_matching_package(m.full_type)
+        package = package_index.find_package(m.full_type)
         if package is not None:
             m.package = package
 
@@ -299,47 +367,78 @@ def add_package_references(messages: list[Message], services: list[Service], pac
             if mf.full_type == "":
                 continue
 
-            package = find_matching_package(mf.full_type)
+            package = package_index.find_package(mf.full_type)
             if package is not None:
                 mf.package = package
-                mf.is_package_hidden = any(filter(lambda p: mf.full_type.startswith(p), hidden_packages))
+                mf.is_package_hidden = package_index.is_hidden(mf.full_type)
+
+            # The types of the map fields are recorded through the fields of their entry messages.
+            if mf.type_kind == "UNKNOWN" or mf.full_type.startswith("map<"):
+                continue
+
+            if m.is_map_entry and m.parent_message is not None:
+                # Map entries are not displayed, so the usage is reported on the map field of the containing message.
+                map_field = map_fields.get(m.full_name)
+                if map_field is not None:
+                    add_usage(mf.full_type, "field", m.parent_message, map_field)
+            else:
+                add_usage(mf.full_type, "field", m, mf)
 
     for s in services:
         for sm in s.methods:
-            requestPackage = next(filter(lambda p: extract_package_name_from_full_name(sm.request.full_type) == p.name, packages), None)
+            requestPackage = package_index.packages_by_name.get(extract_package_name_from_full_name(sm.request.full_type))
             if requestPackage is not None:
                 sm.request.package = requestPackage
 
-            responsePackage = next(filter(lambda p: extract_package_name_from_full_name(sm.response.full_type) == p.name, packages), None)
+            responsePackage = package_index.packages_by_name.get(extract_package_name_from_full_name(sm.response.full_type))
             if responsePackage is not None:
                 sm.response.package = responsePackage
 
+            add_usage(sm.request.full_type, "request", s, sm)
+            add_usage(sm.response.full_type, "response", s, sm)
 
-def build_location_map(source_code_info):
-    def build_key(path):
-        return '.'.join(map(lambda i: str(i), path))
+    return used_by
+
+
+class LocationMap:
+    """The source locations of a file, by their path, as a tuple. Only the index of the location is stored, and the comments
+       are extracted when a location is looked up, since most locations are never looked up.
+
+       The paths of the messages, fields, enums, values, services and methods consist of pairs of a field number and an
+       index (for example 4.0.2.1 is the second field of the first message), so their length is even. The package
+       declaration (2) is the only looked up location with an odd path. The rest of the odd paths belong to the
+       individual tokens, like the name or the type of a field, which make up the majority of the locations, so they are
+       not indexed at all."""
+    def __init__(self, source_code_info):
+        self.source_code_info = source_code_info
+        self.indexes = {}
+        for (i, loc) in enumerate(source_code_info.location):
+            path = tuple(loc.path)
+            if len(path) % 2 == 0 or path == PACKAGE_PATH:
+                self.indexes[path] = i
+
+    def get(self, path: tuple[int, ...], default=None):
+        index = self.indexes.get(path)
+        return default if index is None else self.source_code_info.location[index]
 
-    def scrub(comment: str):
-        return comment.strip().replace(" \n", "\n")
 
-    def build_comment(location):
-        comment = ""
-        if location.leading_comments != "":
-            comment += scrub(location.leading_comments)
-            comment += "\n\n"
+def build_location_map(source_code_info):
+    return LocationMap(source_code_info)
+
 
-        comment += scrub(location.trailing_comments)
+def scrub_comment(comment: str):
+    return comment.strip().replace(" \n", "\n")
 
-        return comment.strip()
 
-    def build_location_info(location):
-        return LocationInfo(location.span[0], build_comment(location))
+def build_comment(location):
+    comment = ""
+    if location.leading_comments != "":
+        comment += scrub_comment(location.leading_comments)
+        comment += "\n\n"
 
-    location_infos = {}
-    for loc in source_code_info.location:
-        location_infos[build_key(loc.path)] = build_location_info(loc)
+    comment += scrub_comment(location.trailing_comments)
 
-    return location_infos
+    return comment.strip()
 
 
 def to_type_name(type: FieldDescriptorProto.Type.ValueType):
@@ -375,50 +474,187 @@ def to_label_name(type, proto3_optional):
         case _: return ""
 
 
-def parse_proto_descriptor(sable_config: SableConfig):
+def defined_type_names(file: FileDescriptorProto) -> Iterator[str]:
+    """Returns the full names of the messages and enums defined in the file, including the nested ones."""
+    def walk(prefix: str, messages: Sequence[DescriptorProto]):
+        for message in messages:
+            full_name = f"{prefix}.{message.name}".lstrip(".")
+            yield full_name
+            for enum in message.enum_type:
+                yield f"{full_name}.{enum.name}"
+            yield from walk(full_name, message.nested_type)
+
+    for enum in file.enum_type:
+        yield f"{file.package}.{enum.name}".lstrip(".")
+    yield from walk(file.package, file.message_type)
+
+
+def referenced_type_names(file: FileDescriptorProto) -> Iterator[str]:
+    """Returns the full names of the types used by the fields and the service methods of the file."""
+    def walk(messages: Sequence[DescriptorProto]):
+        for message in messages:
+            for field in message.field:
+                if field.type_name != "":
+                    yield field.type_name.lstrip(".")
+            yield from walk(message.nested_type)
+
+    yield from walk(file.message_type)
+    for service in file.service:
+        for method in service.method:
+            yield method.input_type.lstrip(".")
+            yield method.output_type.lstrip(".")
+
+
+def count_types(file: FileDescriptorProto) -> int:
+    return sum(1 for _ in defined_type_names(file)) + len(file.service)
+
+
+def count_comments(file: FileDescriptorProto) -> int:
+    return sum(
+        1 for location in file.source_code_info.location
+        if location.leading_comments or location.trailing_comments or location.leading_detached_comments)
+
+
+def prune_descriptor_files(files: Sequence[FileDescriptorProto], include_packages: list[str]) -> list[FileDescriptorProto]:
+    """Returns the files of the packages matching one of the include-packages patterns, and of the packages their fields
+       and methods reference, transitively. The descriptors are only scanned for type names, so the files outside of this
+       closure are skipped before their comments are parsed and converted to HTML."""
+    files_by_package: Dict[str, list[FileDescriptorProto]] = {}
+    package_of_type: Dict[str, str] = {}
+    for file in files:
+        files_by_package.setdefault(file.package, []).append(file)
+        for type_name in defined_type_names(file):
+            package_of_type[type_name] = file.package
+
+    included = {p for p in files_by_package if any(fnmatchcase(p, pattern) for pattern in include_packages)}
+    if not included:
+        print(f"WARNING: None of the packages match the include-packages patterns {', '.join(include_packages)}.")
+
+    # Every package is scanned once, when it's added to the closure.
+    queue = list(included)
+    while queue:
+        for file in files_by_package[queue.pop()]:
+            for type_name in referenced_type_names(file):
+                package = package_of_type.get(type_name)
+                if package is not None and package not in included:
+                    included.add(package)
+                    queue.append(package)
+
+    kept_files = [f for f in files if f.package in included]
+    pruned_files = [f for f in files if f.package not in included]
+    print(
+        f"Including {len(included)} of {len(files_by_package)} packages, "
+        f"pruned {len(pruned_files)} of {len(files)} files, "
+        f"{sum(count_types(f) for f in pruned_files)} types and {sum(count_comments(f) for f in pruned_files)} comments.")
+
+    return kept_files
+
+
+def parse_proto_descriptor(sable_config: SableConfig, descriptor_bytes: Optional[bytes] = None):
+    """Parses the serialized FileDescriptorSet, which is read from the configured input descriptor file if it's not passed.
+       If a parse cache is configured, the model is loaded from the cache if the descriptor was already parsed."""
+    instrumentation = get_instrumentation()
+
+    if descriptor_bytes is None:
+        with open(sable_config.input_descriptor_file, mode="rb") as proto_descriptor_file:
+            descriptor_bytes = proto_descriptor_file.read()
+
+    if sable_config.parse_cache_dir == "":
+        return parse_descriptor_bytes(sable_config, descriptor_bytes)
+
+    from sabledocs.parse_cache import load_parsed_context, parse_cache_key, save_parsed_context
+
+    with instrumentation.phase("load_parse_cache"):
+        key = parse_cache_key(sable_config, descriptor_bytes)
+        sable_context = load_parsed_context(sable_config, key)
+    if sable_context is not None:
+        print()
+        print(f"Loaded the parsed model from the cache in {sable_config.parse_cache_dir}.")
+        return sable_context
+
+    sable_context = parse_descriptor_bytes(sable_config, descriptor_bytes)
+    with instrumentation.phase("save_parse_cache"):
+        save_parsed_context(sable_config, key, sable_context)
+    return sable_context
+
+
+def parse_descriptor_bytes(sable_config: SableConfig, descriptor_bytes: bytes):
     packages: Dict[str, Package] = dict()
     all_messages = []
     all_enums = []
     all_services = []
+    types: Dict[str, Message | Enum] = dict()
+    map_fields: Dict[str, MessageField] = dict()
+
+    markdown_converter = get_markdown_converter(sable_config.markdown_extensions)
+    if sable_config.markdown_cache_dir != "":
+        markdown_converter.load(sable_config.markdown_cache_dir)
+
+    instrumentation = get_instrumentation()
 
     print()
-    with open(sable_config.input_descriptor_file, mode="rb") as proto_descriptor_file:
-        fds = FileDescriptorSet.FromString(proto_descriptor_file.read())
-        for file in fds.file:
-            print(f"Processing {file.name}")
+    with instrumentation.phase("decode_descriptor"):
+        fds = FileDescriptorSet.FromString(descriptor_bytes)
 
-            locations = build_location_map(file.source_code_info)
+    files = fds.file
+    if sable_config.include_packages:
+        with instrumentation.phase("prune_descriptor_files"):
+            files = prune_descriptor_files(fds.file, sable_config.include_packages)
+
+    for file in files:
+        print(f"Processing {file.name}")
+
+        with instrumentation.file(file.name):
+            with instrumentation.phase("build_location_map"):
+                locations = build_location_map(file.source_code_info)
 
             package = packages.get(file.package, Package())
             package.name = file.package
 
-            ctx = ParseContext.New(sable_config, package, file.name, locations)
+            ctx = ParseContext.New(sable_config, package, file.name, locations, types, map_fields)
 
-            package.description += sable_config.comments_parser.ParsePackage(ctx.GetComments(str(COMMENT_PACKAGE_INDEX)))
+            package.description += sable_config.comments_parser.ParsePackage(ctx.GetComments(PACKAGE_PATH))
             package.description_html = markdown_to_html(package.description, sable_config)
 
             parse_enums(file.enum_type, ctx.WithPath(COMMENT_ENUM_INDEX), None, "")
             parse_messages(file.message_type, ctx.WithPath(COMMENT_MESSAGE_INDEX), None, "")
             parse_services(file.service, ctx.WithPath(COMMENT_SERVICE_INDEX))
 
-            all_messages.extend(package.messages)
-            all_enums.extend(package.enums)
-            all_services.extend(package.services)
-
             packages[file.package] = package
 
-        add_package_references(all_messages, all_services, list(packages.values()), sable_config.hidden_packages)
+    # A package can be spread over many files, so the lists of all items are collected once every file is parsed.
+    for package in packages.values():
+        all_messages.extend(package.messages)
+        all_enums.extend(package.enums)
+        all_services.extend(package.services)
 
-        return SableContext(
-            sorted(packages.values(), key=lambda p: (p.name))
-                if sable_config.member_ordering == MemberOrdering.ALPHABETICAL
-                else packages.values(),
-            all_messages,
-            all_enums,
-            sable_config)
+    with instrumentation.phase("add_package_references"):
+        used_by = add_package_references(all_messages, all_services, list(packages.values()), sable_config.hidden_packages, map_fields)
+
+    for message in all_messages:
+        message.finalize()
+
+    if sable_config.markdown_cache_dir != "":
+        markdown_converter.save(sable_config.markdown_cache_dir)
+    else:
+        markdown_converter.trim()
+
+    return SableContext(
+        sorted(packages.values(), key=lambda p: (p.name))
+            if sable_config.member_ordering == MemberOrdering.ALPHABETICAL
+            else packages.values(),
+        all_messages,
+        all_enums,
+        sable_config,
+        types,
+        used_by)
 
 
 def markdown_to_html(md: str, sable_config: SableConfig):
+    return get_markdown_converter(sable_config.markdown_extensions).convert(preprocess_comment_markdown(md))
+
+
+def preprocess_comment_markdown(md: str):
     # We trim single spaces at the beginning of lines, because those are most probably due to the common pattern of
     # having a single space between // and the start of the comment line in code comments.
     # And the single leading space causes problems with the markdown parsing, particularly with fenced code blocks.
@@ -435,4 +671,4 @@ def markdown_to_html(md: str, sable_config: SableConfig):
     if all(map(lambda l: l == "" or l.startswith(" "), md.split("\n")[1:])):
         md = re.sub(r"^ ", r"", md, flags=re.MULTILINE)
 
-    return markdown.markdown(md, extensions=sable_config.markdown_extensions)
+    return md
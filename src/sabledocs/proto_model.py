@@ -1,9 +1,22 @@
+from functools import cached_property
 from pprint import pformat
 from typing import Optional
 from sabledocs.sable_config import SableConfig
 
 
+def model_vars(item) -> dict:
+    """Returns the attributes of a model item. (The model classes use __slots__ to reduce their memory usage, so vars()
+       can't be used with them.)"""
+    return {
+        name: getattr(item, name)
+        for cls in reversed(type(item).__mro__)
+        for name in getattr(cls, "__slots__", ())
+        if not name.startswith("_")}
+
+
 class CodeItem:
+    __slots__ = ("name", "description", "description_html", "source_file_path", "line_number", "repository_url")
+
     def __init__(self):
         self.name = ''
         self.description = ''
@@ -14,6 +27,8 @@ class CodeItem:
 
 
 class MessageField(CodeItem):
+    __slots__ = ("number", "label", "type", "full_type", "default_value", "package", "is_package_hidden", "type_kind", "oneof_name")
+
     def __init__(self):
         CodeItem.__init__(self)
         self.number = 0
@@ -27,50 +42,78 @@ class MessageField(CodeItem):
         self.oneof_name: Optional[str] = None
 
     def __repr__(self):
-        filtered_vars = dict(filter(lambda elem: elem[0] != "package", vars(self).items()))
+        filtered_vars = dict(filter(lambda elem: elem[0] != "package", model_vars(self).items()))
         return pformat(filtered_vars, indent=4, width=1)
 
 
 class OneOfFieldGroup:
+    __slots__ = ("name", "fields")
+
     def __init__(self, name: str, fields: list[MessageField]):
         self.name = name
         self.fields: list[MessageField] = fields
 
 
 class Message(CodeItem):
+    __slots__ = (
+        "full_name", "is_map_entry", "fields", "oneof_field_groups", "parent_message", "package", "type_kind",
+        "_derived_from_fields", "_has_any_fields_with_default_value", "_non_oneof_fields")
+
     def __init__(self):
         CodeItem.__init__(self)
         self.full_name = ''
         self.is_map_entry = False
-        self.fields: list[MessageField] = []
+        self.fields: list[MessageField] | tuple[MessageField, ...] = []
         self.oneof_field_groups: list[OneOfFieldGroup] = []
         self.parent_message = None
         self.package: Optional[Package] = None
         self.type_kind = "MESSAGE"
+        # The values derived from the fields, computed by finalize, and the fields they were computed from.
+        self._derived_from_fields: Optional[tuple[MessageField, ...]] = None
+        self._has_any_fields_with_default_value = False
+        self._non_oneof_fields: list[MessageField] = []
 
     @property
     def full_type(self):
         return self.full_name
-    
+
+    def finalize(self):
+        """Freezes the fields into a tuple, and computes the values derived from them once, since the templates use them
+           for every row of the fields table. Called at the end of parsing. The computed values are only used as long as
+           the fields are the frozen tuple, so if other fields are assigned after that, they are computed on every access
+           again (until finalize is called again)."""
+        self.fields = tuple(self.fields)
+        self._has_any_fields_with_default_value = any(f.default_value for f in self.fields)
+        self._non_oneof_fields = [f for f in self.fields if not f.oneof_name]
+        self._derived_from_fields = self.fields
+
     @property
     def has_any_fields_with_default_value(self):
-        return any(filter(lambda f: f.default_value, self.fields))
+        if self._derived_from_fields is not self.fields:
+            return any(f.default_value for f in self.fields)
+        return self._has_any_fields_with_default_value
 
     @property
     def non_oneof_fields(self):
-        return [f for f in self.fields if not f.oneof_name]
+        if self._derived_from_fields is not self.fields:
+            return [f for f in self.fields if not f.oneof_name]
+        return self._non_oneof_fields
 
     def __repr__(self):
-        return pformat(vars(self), indent=4, width=1)
+        return pformat(model_vars(self), indent=4, width=1)
 
 
 class EnumValue(CodeItem):
+    __slots__ = ("number",)
+
     def __init__(self):
         CodeItem.__init__(self)
         self.number = 0
 
 
 class Enum(CodeItem):
+    __slots__ = ("full_name", "values", "parent_message", "package", "type_kind")
+
     def __init__(self):
         CodeItem.__init__(self)
         self.full_name = ''
@@ -80,10 +123,12 @@ class Enum(CodeItem):
         self.type_kind = "ENUM"
 
     def __repr__(self):
-        return pformat(vars(self), indent=4, width=1)
+        return pformat(model_vars(self), indent=4, width=1)
 
 
 class ServiceMethodArgument(CodeItem):
+    __slots__ = ("type", "full_type", "type_kind", "package")
+
     def __init__(self, type: str, full_type: str, type_kind: str):
         CodeItem.__init__(self)
         self.type = type
@@ -93,6 +138,8 @@ class ServiceMethodArgument(CodeItem):
 
 
 class ServiceMethod(CodeItem):
+    __slots__ = ("request", "response")
+
     def __init__(self):
         CodeItem.__init__(self)
         self.request = ServiceMethodArgument("", "", "")
@@ -100,6 +147,8 @@ class ServiceMethod(CodeItem):
 
 
 class Service(CodeItem):
+    __slots__ = ("full_name", "methods")
+
     def __init__(self):
         CodeItem.__init__(self)
         self.full_name = ''
@@ -107,30 +156,65 @@ class Service(CodeItem):
 
 
 class Package(CodeItem):
+    __slots__ = ("messages", "enums", "services", "type_pages")
+
     def __init__(self):
         CodeItem.__init__(self)
         self.messages = []
         self.enums = []
         self.services = []
+        # The pages of the services, messages and enums by their full name, if they are rendered on separate pages (set
+        # by the page layout). Empty if they are on the package page.
+        self.type_pages: dict[str, str] = {}
 
     def __repr__(self):
-        return pformat(vars(self), indent=4, width=1)
+        return pformat(model_vars(self), indent=4, width=1)
+
 
+class TypeUsage:
+    """A field or a service method referencing a message or an enum. The kind is "field", "request" or "response", the
+       owner is the message of the field or the service of the method, and the member is the field or the method.
+       (A field of a map entry message is reported as the map field of the message containing the map.)"""
+    __slots__ = ("kind", "owner", "member", "package", "is_package_hidden")
 
-class LocationInfo:
-    def __init__(self, line_number, comments):
-        self.line_number = line_number
-        self.comments = comments
+    def __init__(self, kind: str, owner: "Message | Service", member: "MessageField | ServiceMethod", package: Optional["Package"], is_package_hidden: bool):
+        self.kind = kind
+        self.owner = owner
+        self.member = member
+        # The package of the owner, used to link to it.
+        self.package = package
+        self.is_package_hidden = is_package_hidden
 
 
 class SableContext:
-    def __init__(self, packages: list[Package], all_messages: list[Message], all_enums: list[Enum], sable_config: SableConfig):
+    def __init__(
+            self,
+            packages: list[Package],
+            all_messages: list[Message],
+            all_enums: list[Enum],
+            sable_config: SableConfig,
+            types_by_full_name: Optional[dict[str, Message | Enum]] = None,
+            used_by: Optional[dict[str, list[TypeUsage]]] = None):
         self.packages = packages
         self.all_messages = all_messages
         self.all_enums = all_enums
         self.sable_config = sable_config
-
-    @property
+        self.types_by_full_name: dict[str, Message | Enum] = (
+            types_by_full_name
+            if types_by_full_name is not None
+            else {t.full_name: t for t in all_messages + all_enums})
+        # The fields and methods referencing every message and enum, by the full name of the type.
+        self.used_by: dict[str, list[TypeUsage]] = used_by if used_by is not None else {}
+
+    def find_type(self, full_name: str) -> Optional[Message | Enum]:
+        """Returns the message or enum with the given full name (with or without a leading dot), or None if it doesn't exist."""
+        return self.types_by_full_name.get(full_name.lstrip("."))
+
+    def find_usages(self, full_name: str) -> list[TypeUsage]:
+        """Returns the fields and methods referencing the message or enum with the given full name."""
+        return self.used_by.get(full_name.lstrip("."), [])
+
+    @cached_property
     def non_hidden_packages(self):
         return [p for p in self.packages if p.name not in self.sable_config.hidden_packages]
 
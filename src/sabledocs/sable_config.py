@@ -1,7 +1,7 @@
 from enum import Enum
 from os import path
 import tomllib
-from typing import List
+from typing import List, Optional
 
 
 class RepositoryType(Enum):
@@ -17,8 +17,23 @@ class MemberOrdering(Enum):
     PRESERVE_ORIGINAL = 2
 
 
+class SearchIndexMode(Enum):
+    INLINE = 1
+    EXTERNAL = 2
+
+
+class SearchIndexGranularity(Enum):
+    PACKAGE = 1
+    SYMBOL = 2
+
+
+class PageLayout(Enum):
+    PACKAGE = 1
+    SPLIT = 2
+
+
 class SableConfig:
-    def __init__(self, config_file_path):
+    def __init__(self, config_file_path: Optional[str] = None):
         self.module_title = "Protobuf module documentation"
         self.input_descriptor_file = "descriptor.pb"
         self.template = "_default"
@@ -29,6 +44,11 @@ class SableConfig:
         self.main_page_content_file = ""
         self.output_dir = "sabledocs_output"
         self.enable_lunr_search = True
+        self.search_index_mode = SearchIndexMode.INLINE
+        self.search_index_shard_depth = 0
+        self.search_index_granularity = SearchIndexGranularity.PACKAGE
+        self.page_layout = PageLayout.PACKAGE
+        self.types_per_page = 1
         self.repository_url = ""
         self.repository_branch = ""
         self.repository_dir = ""
@@ -37,8 +57,24 @@ class SableConfig:
         self.ignore_comment_lines_containing: List[str] = []
         self.comments_parser_file = None
         self.hidden_packages: List[str] = []
+        self.include_packages: List[str] = []
         self.member_ordering = MemberOrdering.ALPHABETICAL
         self.markdown_extensions: List[str] = ['fenced_code']
+        self.render_jobs = 1
+        self.write_queue_size = 0
+        self.incremental_build = False
+        self.markdown_cache_dir = ""
+        self.parse_cache_dir = ""
+        self.parse_cache_max_mb = 512
+        self.template_cache_dir = ""
+        self.precompiled_templates = False
+        self.fingerprint_static_assets = False
+        self.optimize_assets = False
+        self.precompress: List[str] = []
+
+        if config_file_path is None:
+            # The config is built in code, for example when sabledocs is used as a library.
+            return
 
         if path.exists(config_file_path):
             print(f"Configuration found in {config_file_path}")
@@ -57,6 +93,22 @@ class SableConfig:
                 self.main_page_content_file = config_values.get('main-page-content-file', self.main_page_content_file)
                 self.output_dir = config_values.get('output-dir', self.output_dir).rstrip("/\\")
                 self.enable_lunr_search = config_values.get('enable-lunr-search', True)
+
+                if 'search-index-mode' in config_values:
+                    if config_values['search-index-mode'] == "external":
+                        self.search_index_mode = SearchIndexMode.EXTERNAL
+
+                self.search_index_shard_depth = config_values.get('search-index-shard-depth', self.search_index_shard_depth)
+
+                if 'search-index-granularity' in config_values:
+                    if config_values['search-index-granularity'] == "symbol":
+                        self.search_index_granularity = SearchIndexGranularity.SYMBOL
+
+                if 'page-layout' in config_values:
+                    if config_values['page-layout'] == "split":
+                        self.page_layout = PageLayout.SPLIT
+
+                self.types_per_page = config_values.get('types-per-page', self.types_per_page)
                 self.repository_url = config_values.get('repository-url', self.repository_url)
                 self.repository_branch = config_values.get('repository-branch', self.repository_branch)
                 self.repository_dir = config_values.get('repository-dir', self.repository_dir)
@@ -76,7 +128,19 @@ class SableConfig:
                 self.ignore_comment_lines_containing = config_values.get('ignore-comment-lines-containing', [])
                 self.comments_parser_file = config_values.get('comments-parser-file', None)
                 self.hidden_packages = config_values.get('hidden-packages', [])
+                self.include_packages = config_values.get('include-packages', [])
                 self.markdown_extensions = config_values.get('markdown-extensions', self.markdown_extensions)
+                self.render_jobs = config_values.get('render-jobs', self.render_jobs)
+                self.write_queue_size = config_values.get('write-queue-size', self.write_queue_size)
+                self.incremental_build = config_values.get('incremental-build', self.incremental_build)
+                self.fingerprint_static_assets = config_values.get('fingerprint-static-assets', self.fingerprint_static_assets)
+                self.optimize_assets = config_values.get('optimize-assets', self.optimize_assets)
+                self.precompress = config_values.get('precompress', self.precompress)
+                self.markdown_cache_dir = config_values.get('markdown-cache-dir', self.markdown_cache_dir).rstrip("/\\")
+                self.parse_cache_dir = config_values.get('parse-cache-dir', self.parse_cache_dir).rstrip("/\\")
+                self.parse_cache_max_mb = config_values.get('parse-cache-max-mb', self.parse_cache_max_mb)
+                self.template_cache_dir = config_values.get('template-cache-dir', self.template_cache_dir).rstrip("/\\")
+                self.precompiled_templates = config_values.get('precompiled-templates', self.precompiled_templates)
 
                 if 'member-ordering' in config_values:
                     if config_values["member-ordering"] == "preserve":
@@ -0,0 +1,107 @@
+import hashlib
+import os
+
+from sabledocs.asset_optimizer import pruned_file_name
+from sabledocs.output_writer import OutputDirectoryWriter
+from sabledocs.sable_config import SableConfig
+
+USER_STATIC_DIR = "static"
+
+
+def file_hash(path: str) -> str:
+    with open(path, 'rb') as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+def fingerprinted_name(relative_path: str, content_hash: str) -> str:
+    (name, ext) = os.path.splitext(relative_path)
+    return f"{name}.{content_hash[:10]}{ext}"
+
+
+def list_files(dir_path: str) -> list[str]:
+    """Returns the paths of every file in the folder, relative to the folder, always using forward slashes."""
+    files = []
+    if os.path.isdir(dir_path):
+        for root, _, file_names in os.walk(dir_path):
+            for f in file_names:
+                files.append(os.path.relpath(os.path.join(root, f), dir_path).replace(os.sep, "/"))
+    return sorted(files)
+
+
+class StaticAsset:
+    def __init__(self, source_path: str, output_file: str, content_hash: str, overwrite: bool):
+        self.source_path = source_path
+        self.output_file = output_file
+        self.content_hash = content_hash
+        # The files from the user's static folder never overwrite files generated by sabledocs.
+        self.overwrite = overwrite
+
+
+def collect_static_assets(sable_config: SableConfig, template_base_dir: str) -> list[StaticAsset]:
+    """Collects the static files of the template, which are copied to the static folder of the output, and the files of the
+       user's static folder, which are copied to the root of the output."""
+    assets = []
+    template_static_dir = os.path.join(template_base_dir, "static")
+    for relative_path in list_files(template_static_dir):
+        source_path = os.path.join(template_static_dir, relative_path)
+        content_hash = file_hash(source_path)
+        output_file = fingerprinted_name(relative_path, content_hash) if sable_config.fingerprint_static_assets else relative_path
+        assets.append(StaticAsset(source_path, f"static/{output_file}", content_hash, True))
+
+    for relative_path in list_files(USER_STATIC_DIR):
+        source_path = os.path.join(USER_STATIC_DIR, relative_path)
+        assets.append(StaticAsset(source_path, relative_path, file_hash(source_path), False))
+
+    return assets
+
+
+def static_asset_urls(sable_config: SableConfig, template_base_dir: str) -> dict[str, str]:
+    """Returns the URLs of the static files of the template, by their original path (for example static/mystyles.css).
+       The URLs only differ from the original paths if the assets are fingerprinted, or if the stylesheets are pruned."""
+    template_static_dir = os.path.join(template_base_dir, "static")
+    urls = {}
+    for relative_path in list_files(template_static_dir):
+        if sable_config.optimize_assets and relative_path.endswith(".css"):
+            # The pruned stylesheets are generated after rendering the pages, so they are never fingerprinted.
+            urls[f"static/{relative_path}"] = f"static/{pruned_file_name(relative_path)}"
+        elif sable_config.fingerprint_static_assets:
+            urls[f"static/{relative_path}"] = f"static/{fingerprinted_name(relative_path, file_hash(os.path.join(template_static_dir, relative_path)))}"
+    return urls
+
+
+def sync_static_content(sable_config: SableConfig, template_base_dir: str, writer: OutputDirectoryWriter):
+    """Copies the static files into the output, using the hashes recorded by the writer to only copy the files which are new
+       or changed, and removes the files which were copied before, but don't exist any more. Unchanged files are not
+       touched, so their modification time is preserved."""
+    output_dir = sable_config.output_dir
+    # The static files are marked with an attribute in the manifest, so they can be told apart from the generated pages.
+    previous_static_files = set(writer.files_with_attribute("static"))
+    synced = set()
+    copied = 0
+
+    if os.path.isdir(USER_STATIC_DIR):
+        print(f"Copying static content from the folder '{USER_STATIC_DIR}'.")
+
+    for asset in collect_static_assets(sable_config, template_base_dir):
+        if not asset.overwrite and asset.output_file not in previous_static_files and writer.has_output(asset.output_file):
+            # The file is a page generated by sabledocs.
+            continue
+
+        synced.add(asset.output_file)
+        writer.set_attributes(asset.output_file, static=True)
+        dest_path = os.path.join(output_dir, asset.output_file)
+        if (writer.recorded_hash(asset.output_file) == asset.content_hash
+                and os.path.exists(dest_path)
+                and os.path.getsize(dest_path) == os.path.getsize(asset.source_path)):
+            writer.keep(asset.output_file, asset.content_hash)
+            continue
+
+        with open(asset.source_path, 'rb') as fh:
+            writer.write(asset.output_file, fh.read())
+        copied += 1
+
+    removed = sorted(previous_static_files - synced)
+    for output_file in removed:
+        writer.remove(output_file)
+
+    print(f"Static content synchronized, {copied} files copied, {len(synced) - copied} unchanged, {len(removed)} removed.")
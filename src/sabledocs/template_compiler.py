@@ -0,0 +1,70 @@
+"""Compiles the default templates into Python modules, which can be shipped in the package, so the templates don't have to
+be compiled from source on every run.
+
+Usage, before building the package:
+    python -m sabledocs.template_compiler
+"""
+import hashlib
+import json
+import os
+import shutil
+from typing import Optional
+
+import jinja2
+from jinja2 import Environment, FileSystemLoader, ModuleLoader, select_autoescape
+
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates", "_default")
+COMPILED_TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates", "_default_compiled")
+COMPILED_MANIFEST_FILE_NAME = "manifest.json"
+
+
+def template_hashes(template_dir: str) -> dict[str, str]:
+    hashes = {}
+    for f in sorted(os.listdir(template_dir)):
+        path = os.path.join(template_dir, f)
+        if os.path.isfile(path) and f.endswith(".html"):
+            with open(path, 'rb') as fh:
+                hashes[f] = hashlib.sha256(fh.read()).hexdigest()
+    return hashes
+
+
+def compile_default_templates(target_dir: str = COMPILED_TEMPLATE_DIR):
+    # The environment has to be configured the same way as the one used to render the pages, since the autoescaping is
+    # decided when the templates are compiled.
+    jinja_env = Environment(loader=FileSystemLoader(searchpath=DEFAULT_TEMPLATE_DIR), autoescape=select_autoescape())
+    jinja_env.filters['asset_url'] = lambda path: path
+
+    shutil.rmtree(target_dir, ignore_errors=True)
+    os.makedirs(target_dir)
+    jinja_env.compile_templates(target_dir, extensions=["html"], zip=None)
+
+    # The manifest records what the modules were compiled from, so they are only used if they are still up to date.
+    with open(os.path.join(target_dir, COMPILED_MANIFEST_FILE_NAME), mode='w', encoding='utf-8') as fh:
+        json.dump({"jinja_version": jinja2.__version__, "templates": template_hashes(DEFAULT_TEMPLATE_DIR)}, fh, indent=2)
+
+
+def load_precompiled_templates(template_dir: str) -> Optional[ModuleLoader]:
+    """Returns a loader for the precompiled default templates, or None if they were not compiled, or if they were compiled
+       from different templates or with a different Jinja version."""
+    if os.path.normpath(template_dir) != os.path.normpath(DEFAULT_TEMPLATE_DIR):
+        return None
+
+    manifest_path = os.path.join(COMPILED_TEMPLATE_DIR, COMPILED_MANIFEST_FILE_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, mode='r', encoding='utf-8') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("jinja_version") != jinja2.__version__ or manifest.get("templates") != template_hashes(template_dir):
+        return None
+
+    return ModuleLoader(COMPILED_TEMPLATE_DIR)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    compile_default_templates()
+    print(f"The default templates were compiled into {COMPILED_TEMPLATE_DIR}.")
@@ -0,0 +1,101 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import markdown
+from google.protobuf.descriptor_pb2 import FileDescriptorSet
+
+from sabledocs.api import BuildError, DirectoryWriter, DocsBuilder, MemoryWriter, build
+from sabledocs.sable_config import SableConfig
+
+SAMPLE_DESCRIPTOR = os.path.join(os.path.dirname(__file__), "..", "sample", "sable-test.pb")
+
+
+def read_sample_descriptor():
+    with open(SAMPLE_DESCRIPTOR, 'rb') as fh:
+        return fh.read()
+
+
+def comment(package: str, i: int) -> str:
+    return f"Message *{package} {i}* with `code` and a [link](https://example.com/{i}).\n\n- first\n- second **{i}**\n"
+
+
+def build_commented_descriptor(package: str, message_count: int) -> bytes:
+    fds = FileDescriptorSet()
+    file = fds.file.add(name=f"{package}.proto", package=package)
+    for i in range(message_count):
+        file.message_type.add(name=f"Message{i}")
+        file.source_code_info.location.add(path=[4, i], span=[i, 0, 1], leading_comments=comment(package, i))
+    return fds.SerializeToString()
+
+
+class TestBuild(unittest.TestCase):
+
+    def test_output_files_are_returned_in_memory(self):
+        sable_config = SableConfig()
+        sable_config.module_title = "Test module"
+
+        result = build(sable_config, read_sample_descriptor())
+
+        self.assertIn("index.html", result.files)
+        self.assertIn("search.html", result.files)
+        self.assertIn("static/mystyles.css", result.files)
+        self.assertIn("Test module", result.files["index.html"].decode('utf-8'))
+        self.assertEqual(list(result.files.keys()), result.output_files)
+        self.assertTrue(result.sable_context.packages)
+
+    def test_output_files_are_passed_to_the_writer(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            result = build(SableConfig(), read_sample_descriptor(), DirectoryWriter(output_dir))
+
+            self.assertIsNone(result.files)
+            for output_file in result.output_files:
+                self.assertTrue(os.path.exists(os.path.join(output_dir, output_file)))
+
+    def test_stylesheets_are_not_pruned(self):
+        sable_config = SableConfig()
+        sable_config.optimize_assets = True
+
+        result = build(sable_config, read_sample_descriptor())
+
+        # The API doesn't prune the stylesheets, so the pages have to link to the original ones.
+        index = result.files["index.html"].decode('utf-8')
+        self.assertIn("static/mystyles.css", index)
+        self.assertNotIn(".pruned.css", index)
+
+    def test_a_parsed_context_can_be_rendered_again(self):
+        builder = DocsBuilder(SableConfig())
+        result = builder.build(read_sample_descriptor())
+
+        writer = MemoryWriter()
+        builder.render(result.sable_context, writer)
+
+        self.assertEqual(result.files, writer.files)
+
+    def test_descriptors_are_parsed_concurrently(self):
+        builder = DocsBuilder(SableConfig())
+        packages = [f"concurrent{i}" for i in range(4)]
+        descriptors = [build_commented_descriptor(p, 200) for p in packages]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                contexts = list(executor.map(builder.parse, descriptors))
+
+        # Every comment is distinct, so every one of them is converted by the shared Markdown engine.
+        for package, sable_context in zip(packages, contexts):
+            self.assertEqual(len(sable_context.all_messages), 200)
+            for message in sable_context.all_messages:
+                i = int(message.name.removeprefix("Message"))
+                self.assertEqual(message.description_html, markdown.markdown(comment(package, i), extensions=['fenced_code']))
+
+    def test_errors_are_raised(self):
+        with self.assertRaises(BuildError):
+            build(SableConfig(), b"invalid descriptor")
+
+        sable_config = SableConfig()
+        sable_config.template_path = "nonexistent"
+        with self.assertRaises(BuildError):
+            build(sable_config, read_sample_descriptor())
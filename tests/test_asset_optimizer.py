@@ -0,0 +1,41 @@
+import unittest
+
+from sabledocs.asset_optimizer import prune_css
+
+
+class TestPruneCss(unittest.TestCase):
+
+    def test_unused_selectors_are_removed(self):
+        css = """/*! license */
+/* comment */
+.used, .unused { color: red; }
+.unused { color: blue; }
+.used:not(.unused) > a { color: green; }
+body { margin: 0; }
+"""
+        pruned = prune_css(css, {"used"})
+
+        self.assertIn("/*! license */", pruned)
+        self.assertNotIn("/* comment */", pruned)
+        self.assertIn(".used {", pruned)
+        self.assertNotIn("color: blue", pruned)
+        self.assertIn(".used:not(.unused) > a {", pruned)
+        self.assertIn("body {", pruned)
+
+    def test_at_rules(self):
+        css = """@import "other.css";
+@media screen and (max-width: 768px) {
+  .used { color: red; }
+  .unused { color: blue; }
+}
+@media print {
+  .unused { color: blue; }
+}
+@keyframes spin { from { transform: rotate(0deg); } to { transform: rotate(359deg); } }
+"""
+        pruned = prune_css(css, {"used"})
+
+        self.assertIn('@import "other.css";', pruned)
+        self.assertIn("@media screen and (max-width: 768px) {\n.used { color: red; }\n}", pruned)
+        self.assertNotIn("@media print", pruned)
+        self.assertIn("@keyframes spin { from { transform: rotate(0deg); } to { transform: rotate(359deg); } }", pruned)
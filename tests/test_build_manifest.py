@@ -0,0 +1,78 @@
+import unittest
+
+from jinja2 import DictLoader, Environment
+
+from sabledocs.build_manifest import compute_page_fingerprints
+from sabledocs.page_renderer import Page, RenderState
+from sabledocs.proto_descriptor_parser import add_package_references
+from sabledocs.proto_model import Message, MessageField, Package, SableContext
+from sabledocs.sable_config import SableConfig
+
+
+def build_render_state():
+    sable_config = SableConfig("nonexistent.toml")
+    packages = []
+    for name in ["foo", "bar"]:
+        package = Package()
+        package.name = name
+        message = Message()
+        message.name = "Msg"
+        message.full_name = f"{name}.Msg"
+        message.package = package
+        package.messages.append(message)
+        packages.append(package)
+
+    # foo.Msg has a field referencing bar.Msg.
+    field = MessageField()
+    field.name = "ref"
+    field.full_type = "bar.Msg"
+    field.type_kind = "MESSAGE"
+    field.package = packages[1]
+    packages[0].messages[0].fields.append(field)
+
+    messages = [p.messages[0] for p in packages]
+    used_by = add_package_references(messages, [], packages, [])
+    return RenderState(
+        sable_config, SableContext(packages, messages, [], sable_config, None, used_by), Environment(loader=DictLoader({})), None, "")
+
+
+def fingerprints_of(render_state):
+    pages = [Page(f"{p.name}.html", "package", p.name) for p in render_state.sable_context.packages]
+    pages += [Page("index.html", "index"), Page("search.html", "search")]
+    return compute_page_fingerprints(render_state, pages, "")
+
+
+class TestBuildManifest(unittest.TestCase):
+
+    def test_fingerprints_are_stable(self):
+        self.assertEqual(fingerprints_of(build_render_state()), fingerprints_of(build_render_state()))
+
+    def test_only_changed_package_is_invalidated(self):
+        render_state = build_render_state()
+        before = fingerprints_of(render_state)
+        render_state.sable_context.packages[1].messages[0].description_html = "<p>Changed</p>"
+        after = fingerprints_of(render_state)
+
+        self.assertEqual(before["foo.html"], after["foo.html"])
+        self.assertNotEqual(before["bar.html"], after["bar.html"])
+        self.assertNotEqual(before["index.html"], after["index.html"])
+        self.assertNotEqual(before["search.html"], after["search.html"])
+
+    def test_usage_change_invalidates_the_used_package(self):
+        before = fingerprints_of(build_render_state())
+        render_state = build_render_state()
+        render_state.sable_context.used_by["bar.Msg"][0].member.name = "renamed_ref"
+        after = fingerprints_of(render_state)
+
+        # The field is displayed on the page of foo, and in the "used by" list of bar.Msg.
+        self.assertNotEqual(before["foo.html"], after["foo.html"])
+        self.assertNotEqual(before["bar.html"], after["bar.html"])
+
+    def test_config_change_invalidates_every_page(self):
+        render_state = build_render_state()
+        before = fingerprints_of(render_state)
+        render_state.sable_config.footer_content = "© Someone"
+        after = fingerprints_of(render_state)
+
+        for page, fingerprint in before.items():
+            self.assertNotEqual(fingerprint, after[page])
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from sabledocs.docs_server import LruCache, ModuleServer
+from sabledocs.sable_config import SableConfig
+
+SAMPLE_DESCRIPTOR = os.path.join(os.path.dirname(__file__), "..", "sample", "sable-test.pb")
+
+
+class TestLruCache(unittest.TestCase):
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = LruCache(2)
+        cache.get_or_create("a", lambda: 1)
+        cache.get_or_create("b", lambda: 2)
+        cache.get_or_create("a", lambda: 1)
+        cache.get_or_create("c", lambda: 3)
+
+        self.assertEqual(["a", "c"], list(cache.entries.keys()))
+        self.assertEqual(
+            {"entries": 2, "size": 2, "max_size": 2, "hits": 1, "misses": 3, "evictions": 1},
+            cache.stats())
+
+    def test_entries_are_evicted_by_size(self):
+        cache = LruCache(10, len)
+        cache.get_or_create("a", lambda: b"12345")
+        cache.get_or_create("b", lambda: b"123456")
+        self.assertEqual(["b"], list(cache.entries.keys()))
+
+        # A value larger than the cache is returned, but not kept.
+        self.assertEqual(b"12345678901", cache.get_or_create("c", lambda: b"12345678901"))
+        self.assertEqual([], list(cache.entries.keys()))
+
+    def test_concurrent_misses_create_the_value_once(self):
+        cache = LruCache(2)
+        calls = []
+
+        def create():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_create("a", create))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(["value"] * 5, results)
+        self.assertEqual(1, cache.stats()["misses"])
+
+    def test_failed_creation_is_not_cached(self):
+        cache = LruCache(2)
+
+        def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            cache.get_or_create("a", fail)
+        self.assertEqual("value", cache.get_or_create("a", lambda: "value"))
+
+
+class TestModuleServer(unittest.TestCase):
+
+    def setUp(self):
+        self.descriptor_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.descriptor_dir, "test"))
+        shutil.copy(SAMPLE_DESCRIPTOR, os.path.join(self.descriptor_dir, "test", "v1.pb"))
+        self.module_server = ModuleServer(self.descriptor_dir, SableConfig(), max_modules=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.descriptor_dir)
+
+    def test_paths_are_resolved_to_modules(self):
+        descriptor_path = os.path.join(self.descriptor_dir, "test", "v1.pb")
+        self.assertEqual(["test/v1"], self.module_server.list_modules())
+        self.assertEqual(("test/v1", descriptor_path, "index.html"), self.module_server.resolve("/test/v1/index.html"))
+        self.assertEqual(("test/v1", descriptor_path, ""), self.module_server.resolve("/test/v1/"))
+        self.assertEqual(("test/v1", descriptor_path, "static/mystyles.css"), self.module_server.resolve("/test/v1/static/mystyles.css"))
+        self.assertIsNone(self.module_server.resolve("/test/v2/index.html"))
+        self.assertIsNone(self.module_server.resolve("/test/../test/v1/index.html"))
+
+    def test_pages_are_rendered_on_demand_and_cached(self):
+        descriptor_path = os.path.join(self.descriptor_dir, "test", "v1.pb")
+
+        index = self.module_server.get_file(descriptor_path, "index.html")
+        self.assertIn(b"Protobuf module documentation", index)
+        self.assertEqual(index, self.module_server.get_file(descriptor_path, "index.html"))
+        self.assertIsNotNone(self.module_server.get_file(descriptor_path, "static/mystyles.css"))
+        self.assertIsNone(self.module_server.get_file(descriptor_path, "nonexistent.html"))
+
+        metrics = self.module_server.metrics()
+        self.assertEqual(1, metrics["modules"]["misses"])
+        self.assertEqual(3, metrics["modules"]["hits"])
+        self.assertEqual(1, metrics["pages"]["misses"])
+        self.assertEqual(1, metrics["pages"]["hits"])
+
+    def test_changed_descriptor_is_parsed_again(self):
+        descriptor_path = os.path.join(self.descriptor_dir, "test", "v1.pb")
+        (key, module) = self.module_server.get_module(descriptor_path)
+        self.assertIs(module, self.module_server.get_module(descriptor_path)[1])
+
+        shutil.copy(os.path.join(os.path.dirname(SAMPLE_DESCRIPTOR), "descriptor.pb"), descriptor_path)
+        (changed_key, changed_module) = self.module_server.get_module(descriptor_path)
+
+        self.assertNotEqual(key, changed_key)
+        self.assertIsNot(module, changed_module)
+        self.assertEqual(1, self.module_server.metrics()["modules"]["evictions"])
+
+    def test_same_descriptor_content_is_parsed_once(self):
+        os.makedirs(os.path.join(self.descriptor_dir, "other"))
+        shutil.copy(SAMPLE_DESCRIPTOR, os.path.join(self.descriptor_dir, "other", "v1.pb"))
+
+        (key, module) = self.module_server.get_module(os.path.join(self.descriptor_dir, "test", "v1.pb"))
+        (other_key, other_module) = self.module_server.get_module(os.path.join(self.descriptor_dir, "other", "v1.pb"))
+
+        self.assertEqual(key, other_key)
+        self.assertIs(module, other_module)
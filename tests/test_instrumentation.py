@@ -0,0 +1,68 @@
+import unittest
+
+from sabledocs.comments_parser import CommentsParser
+from sabledocs.instrumentation import Instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_phases_nested_in_a_file_are_reported_for_the_file(self):
+        instrumentation = Instrumentation()
+        with instrumentation.file("a.proto"):
+            with instrumentation.phase("markdown"):
+                pass
+            with instrumentation.phase("markdown"):
+                pass
+
+        report = instrumentation.report()
+
+        self.assertEqual(2, report["phases"]["markdown"]["calls"])
+        self.assertEqual(1, report["phases"]["parse_file"]["calls"])
+        self.assertEqual(["markdown"], list(report["files"]["a.proto"]["phases"].keys()))
+
+    def test_peak_memory_of_the_files_and_phases(self):
+        instrumentation = Instrumentation(trace_memory=True)
+        try:
+            with instrumentation.file("small.proto"):
+                small = bytearray(1024)
+            with instrumentation.file("large.proto"):
+                with instrumentation.phase("markdown"):
+                    large = bytearray(10 * 1024 * 1024)
+                # The memory is released before the end of the file, but it's still the peak of the file.
+                del large
+        finally:
+            instrumentation.close()
+
+        report = instrumentation.report()
+
+        self.assertLess(report["files"]["small.proto"]["peak_memory_kb"], 1024)
+        self.assertGreaterEqual(report["files"]["large.proto"]["peak_memory_kb"], 10 * 1024)
+        self.assertGreaterEqual(report["phases"]["markdown"]["peak_memory_kb"], 10 * 1024)
+        self.assertGreaterEqual(report["phases"]["parse_file"]["peak_memory_kb"], 10 * 1024)
+        self.assertEqual(len(small), 1024)
+
+    def test_memory_is_not_traced_by_default(self):
+        instrumentation = Instrumentation()
+        with instrumentation.file("a.proto"):
+            pass
+
+        self.assertIsNone(instrumentation.report()["files"]["a.proto"]["peak_memory_kb"])
+
+    def test_only_the_outermost_call_of_the_wrapped_methods_is_measured(self):
+        instrumentation = Instrumentation()
+        comments_parser = CommentsParser()
+        instrumentation.wrap_methods(comments_parser, "comments_parser", ["ParseAll", "ParseField"])
+
+        self.assertEqual("comment", comments_parser.ParseField("comment"))
+        self.assertEqual(1, instrumentation.phases["comments_parser"].calls)
+
+    def test_render_times_are_aggregated_by_template(self):
+        instrumentation = Instrumentation()
+        instrumentation.record_page("a.html", "package.html", 1.0)
+        instrumentation.record_page("b.html", "package.html", 2.0)
+
+        report = instrumentation.report()
+
+        self.assertEqual(3.0, report["templates"]["package.html"]["seconds"])
+        self.assertEqual(2, report["templates"]["package.html"]["calls"])
+        self.assertEqual({"a.html": 1.0, "b.html": 2.0}, report["pages"])
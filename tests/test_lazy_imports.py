@@ -0,0 +1,15 @@
+import subprocess
+import sys
+import unittest
+
+HEAVY_MODULES = ["jinja2", "markdown", "lunr", "furl", "google.protobuf.descriptor_pb2"]
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_entry_point_does_not_import_the_heavy_dependencies(self):
+        # A separate interpreter is used, since the modules might already be imported by other tests.
+        script = f"import sys, sabledocs.__main__; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+
+        self.assertEqual("", result.stdout.strip())
@@ -0,0 +1,74 @@
+import unittest
+
+from sabledocs.lunr_search import build_package_content, build_search_index, build_search_manifest, build_search_shards, search_shard_name
+from sabledocs.proto_model import Message, MessageField, Package, SableContext
+from sabledocs.sable_config import SableConfig, SearchIndexGranularity
+
+
+def build_sable_context(names):
+    sable_config = SableConfig("nonexistent.toml")
+    packages = []
+    for name in names:
+        package = Package()
+        package.name = name
+        package.description = f"Description of {name}"
+        packages.append(package)
+
+    return SableContext(packages, [], [], sable_config)
+
+
+class TestLunrSearch(unittest.TestCase):
+
+    def test_shard_name(self):
+        self.assertEqual(search_shard_name("google.pubsub.v1", 0), "all")
+        self.assertEqual(search_shard_name("google.pubsub.v1", 1), "google")
+        self.assertEqual(search_shard_name("google.pubsub.v1", 2), "google.pubsub")
+        self.assertEqual(search_shard_name("google.pubsub.v1", 5), "google.pubsub.v1")
+        self.assertEqual(search_shard_name("", 1), "__default")
+
+    def test_shards_contain_every_package(self):
+        sable_context = build_sable_context(["google.pubsub.v1", "google.datastore.v1", "acme.v1"])
+        shards = build_search_shards(sable_context, 1)
+
+        self.assertEqual({k: [p.name for p in v] for k, v in shards.items()}, {
+            "google": ["google.pubsub.v1", "google.datastore.v1"],
+            "acme": ["acme.v1"]
+        })
+
+        manifest = build_search_manifest(shards)
+        self.assertEqual(manifest["shards"][1]["index"], "search/acme.index.json")
+        self.assertEqual(manifest["shards"][1]["documents"], "search/acme.documents.json")
+
+        (documents, _) = build_search_index(sable_context, shards["google"])
+        self.assertEqual(set(documents.keys()), {"google.pubsub.v1", "google.datastore.v1"})
+
+    def test_symbol_documents_link_to_anchors(self):
+        sable_context = build_sable_context(["foo"])
+        sable_context.sable_config.search_index_granularity = SearchIndexGranularity.SYMBOL
+        package = sable_context.packages[0]
+
+        message = Message()
+        message.name = "Bar"
+        message.full_name = "foo.Bar"
+        field = MessageField()
+        field.name = "baz_id"
+        field.full_type = "string"
+        message.fields.append(field)
+        package.messages.append(message)
+
+        (documents, _) = build_search_index(sable_context)
+
+        self.assertEqual(documents["message-foo.Bar"]["url"], "foo.html#message-foo.Bar")
+        self.assertEqual(documents["field-foo.Bar.baz_id"]["url"], "foo.html#message-foo.Bar")
+        self.assertEqual(documents["field-foo.Bar.baz_id"]["content"], "baz_id\n\nstring\n")
+
+        # With the split page layout, the symbols link to the pages of their types.
+        package.type_pages = {"foo.Bar": "foo-Bar.html"}
+        (documents, _) = build_search_index(sable_context)
+
+        self.assertEqual(documents["message-foo.Bar"]["url"], "foo-Bar.html#message-foo.Bar")
+        self.assertEqual(documents["field-foo.Bar.baz_id"]["url"], "foo-Bar.html#message-foo.Bar")
+
+    def test_package_content(self):
+        sable_context = build_sable_context(["foo.bar"])
+        self.assertEqual(build_package_content(sable_context.packages[0]), "foo.bar\nDescription of foo.bar\n")
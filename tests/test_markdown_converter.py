@@ -0,0 +1,59 @@
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import markdown
+
+from sabledocs.markdown_converter import MarkdownConverter
+
+
+class TestMarkdownConverter(unittest.TestCase):
+
+    def test_output_matches_markdown(self):
+        converter = MarkdownConverter(['fenced_code'])
+        for md in ["", "Foo *bar*", "```\ncode\n```", "Foo *bar*", "- a\n- b"]:
+            self.assertEqual(converter.convert(md), markdown.markdown(md, extensions=['fenced_code']))
+
+        self.assertEqual(converter.hits, 1)
+        self.assertEqual(converter.misses, 4)
+
+    def test_cache_is_persisted(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            converter = MarkdownConverter(['fenced_code'])
+            converter.convert("Foo *bar*")
+            converter.save(cache_dir)
+
+            loaded = MarkdownConverter(['fenced_code'])
+            loaded.load(cache_dir)
+            self.assertEqual(loaded.convert("Foo *bar*"), "<p>Foo <em>bar</em></p>")
+            self.assertEqual(loaded.misses, 0)
+
+            other_extensions = MarkdownConverter(['fenced_code', 'nl2br'])
+            other_extensions.load(cache_dir)
+            other_extensions.convert("Foo *bar*")
+            self.assertEqual(other_extensions.misses, 1)
+
+    def test_unused_entries_are_dropped(self):
+        converter = MarkdownConverter(['fenced_code'])
+        converter.convert("Foo")
+        converter.convert("Bar")
+        converter.trim()
+
+        converter.convert("Foo")
+        converter.trim()
+        self.assertEqual(list(converter.cache), ["Foo"])
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            converter.convert("Baz")
+            converter.save(cache_dir)
+            self.assertEqual(list(converter.cache), ["Baz"])
+            self.assertEqual(converter.used_keys, set())
+
+    def test_concurrent_conversions(self):
+        converter = MarkdownConverter(['fenced_code'])
+        inputs = [f"Item *{i}* with `code`\n\n- a\n- b **{i}**" for i in range(2000)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            outputs = list(executor.map(converter.convert, inputs))
+
+        self.assertEqual(outputs, [markdown.markdown(md, extensions=['fenced_code']) for md in inputs])
@@ -0,0 +1,130 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from sabledocs.output_writer import OutputDirectoryWriter, load_deploy_manifest
+
+
+class TestOutputDirectoryWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def build(self, files: dict[str, bytes], queue_size: int = 0) -> dict:
+        writer = OutputDirectoryWriter(self.output_dir, queue_size)
+        for output_file, content in files.items():
+            writer.write(output_file, content)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return writer.finish()
+
+    def test_manifest_lists_the_changes(self):
+        manifest = self.build({"index.html": b"index", "static/style.css": b"body {}", "a.html": b"a"})
+        self.assertEqual(manifest["added"], ["a.html", "index.html", "static/style.css"])
+        self.assertEqual(manifest["changed"], [])
+        self.assertEqual(manifest["removed"], [])
+
+        manifest = self.build({"index.html": b"new index", "static/style.css": b"body {}", "b.html": b"b"})
+        self.assertEqual(manifest["added"], ["b.html"])
+        self.assertEqual(manifest["changed"], ["index.html"])
+        self.assertEqual(manifest["removed"], ["a.html"])
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "a.html")))
+        self.assertEqual(set(load_deploy_manifest(self.output_dir)), {"b.html", "index.html", "static/style.css"})
+
+    def test_unchanged_files_are_not_written(self):
+        self.build({"index.html": b"index"})
+        index_path = os.path.join(self.output_dir, "index.html")
+        os.utime(index_path, (0, 0))
+
+        manifest = self.build({"index.html": b"index"})
+        self.assertEqual(manifest["added"] + manifest["changed"] + manifest["removed"], [])
+        self.assertEqual(os.path.getmtime(index_path), 0)
+
+    def test_kept_files_are_not_removed(self):
+        self.build({"index.html": b"index", "a.html": b"a"})
+
+        writer = OutputDirectoryWriter(self.output_dir)
+        writer.write("index.html", b"index")
+        writer.keep("a.html")
+        with contextlib.redirect_stdout(io.StringIO()):
+            manifest = writer.finish()
+        self.assertEqual(manifest["removed"], [])
+        self.assertEqual(sorted(manifest["files"]), ["a.html", "index.html"])
+
+    def test_removed_files_and_attributes(self):
+        writer = OutputDirectoryWriter(self.output_dir, queue_size=1)
+        writer.write("a.html", b"a")
+        writer.write("b.html", b"b")
+        writer.set_attributes("a.html", fingerprint="1234")
+        writer.set_attributes("b.html", fingerprint="5678")
+        writer.remove("b.html")
+        self.assertEqual(writer.output_files(), ["a.html"])
+        self.assertEqual(writer.files_with_attribute("fingerprint"), ["a.html"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            manifest = writer.finish()
+        self.assertEqual(manifest["added"], ["a.html"])
+        self.assertEqual(manifest["attributes"], {"a.html": {"fingerprint": "1234"}})
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "b.html")))
+
+        # The attributes of the previous build are available until the file is written, kept or removed.
+        writer = OutputDirectoryWriter(self.output_dir)
+        self.assertEqual(writer.previous_attributes["a.html"], {"fingerprint": "1234"})
+        self.assertEqual(writer.files_with_attribute("fingerprint"), ["a.html"])
+        writer.remove("a.html")
+        self.assertEqual(writer.files_with_attribute("fingerprint"), [])
+        with contextlib.redirect_stdout(io.StringIO()):
+            manifest = writer.finish()
+        self.assertEqual(manifest["removed"], ["a.html"])
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "a.html")))
+
+    def test_background_writes(self):
+        files = {f"page{i}.html": f"page {i}".encode('utf-8') for i in range(100)}
+        manifest = self.build(files, queue_size=4)
+        self.assertEqual(len(manifest["added"]), 100)
+        with open(os.path.join(self.output_dir, "page99.html"), 'rb') as fh:
+            self.assertEqual(fh.read(), b"page 99")
+
+    def test_background_writes_from_several_threads(self):
+        # Frequent thread switches make it likely that the threads interleave between starting the writer thread and
+        # recording it, if that's not done under the lock.
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for _ in range(20):
+                writer = OutputDirectoryWriter(self.output_dir, queue_size=4)
+                barrier = threading.Barrier(8)
+
+                def write_file(i: int):
+                    barrier.wait()
+                    writer.write(f"page{i}.html", b"page")
+
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    list(executor.map(write_file, range(8)))
+
+                self.assertEqual(sum(1 for t in threading.enumerate() if t.name == "sabledocs-writer"), 1)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    writer.finish()
+                self.assertEqual(len(writer.output_files()), 8)
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+    def test_background_write_errors_are_raised(self):
+        with open(os.path.join(self.output_dir, "blocker"), 'wb') as fh:
+            fh.write(b"a file, not a folder")
+
+        writer = OutputDirectoryWriter(self.output_dir, queue_size=1)
+        writer.write("blocker/index.html", b"index")
+        with self.assertRaises(OSError):
+            writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
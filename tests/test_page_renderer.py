@@ -0,0 +1,140 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from jinja2 import DictLoader, Environment
+
+from sabledocs.page_renderer import Page, RenderError, RenderState, collect_pages, create_executor, layout_type_pages, render_pages
+from sabledocs.proto_model import Enum, Message, Package, SableContext, Service
+from sabledocs.sable_config import PageLayout, SableConfig
+
+
+def build_render_state(package_template):
+    sable_config = SableConfig("nonexistent.toml")
+    packages = []
+    for name in ["foo", "foo.bar", "baz"]:
+        package = Package()
+        package.name = name
+        packages.append(package)
+
+    jinja_env = Environment(loader=DictLoader({
+        "package.html": package_template,
+        "index.html": "{% for p in non_hidden_packages %}{{ p.name }};{% endfor %}"
+    }))
+
+    return RenderState(sable_config, SableContext(packages, [], [], sable_config), jinja_env, None, "")
+
+
+def build_pages(render_state):
+    pages = [Page(f"{p.name}.html", "package", p.name) for p in render_state.sable_context.packages]
+    pages.append(Page("index.html", "index"))
+    return pages
+
+
+class TestPageRenderer(unittest.TestCase):
+
+    def test_parallel_output_is_identical_to_serial(self):
+        render_state = build_render_state("Package {{ package.name }} ©")
+        pages = build_pages(render_state)
+
+        serial = [(p.output_file, o) for p, o in render_pages(render_state, pages, 1)]
+        parallel = [(p.output_file, o) for p, o in render_pages(render_state, pages, 3)]
+
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial[1], ("foo.bar.html", "Package foo.bar ©".encode('utf-8')))
+        self.assertEqual(serial[3], ("index.html", b"foo;foo.bar;baz;"))
+
+    def test_interleaved_renders(self):
+        first = build_render_state("First {{ package.name }}")
+        second = build_render_state("Second {{ package.name }}")
+        second.packages_by_name = {"other": second.packages_by_name["foo"]}
+        second_pages = [Page("other.html", "package", "other")]
+
+        for jobs in [1, 2]:
+            first_renders = render_pages(first, build_pages(first), jobs)
+            (page, output) = next(first_renders)
+            self.assertEqual(output, b"First foo")
+
+            # The second render starts while the first is still in progress, and it doesn't change the state of the first.
+            self.assertEqual([o for (_, o) in render_pages(second, second_pages, jobs)], [b"Second foo"])
+            self.assertEqual([o for (_, o) in first_renders][0], b"First foo.bar")
+
+    def test_threads_are_used_if_other_threads_are_running(self):
+        render_state = build_render_state("Package {{ package.name }}")
+        pages = build_pages(render_state)
+        serial = [o for (_, o) in render_pages(render_state, pages, 1)]
+
+        stop = threading.Event()
+        thread = threading.Thread(target=stop.wait)
+        thread.start()
+        try:
+            (executor, render_job) = create_executor(2, render_state)
+            with executor:
+                self.assertIsInstance(executor, ThreadPoolExecutor)
+            self.assertEqual([o for (_, o) in render_pages(render_state, pages, 2)], serial)
+        finally:
+            stop.set()
+            thread.join()
+
+    def test_failing_package_is_reported(self):
+        render_state = build_render_state("{% if package.name == 'baz' %}{{ package.name.missing() }}{% endif %}")
+        pages = build_pages(render_state)
+
+        for jobs in [1, 2]:
+            with self.assertRaises(RenderError) as cm:
+                list(render_pages(render_state, pages, jobs))
+
+            self.assertIn('the page of the package "baz"', str(cm.exception))
+
+
+def build_package_with_types(name):
+    package = Package()
+    package.name = name
+    service = Service()
+    service.full_name = f"{name}.Api"
+    package.services.append(service)
+    for message_name in ["Foo", "Foo.Nested", "Foo.MapEntry"]:
+        message = Message()
+        message.full_name = f"{name}.{message_name}"
+        message.is_map_entry = message_name.endswith("MapEntry")
+        package.messages.append(message)
+    enum = Enum()
+    enum.full_name = f"{name}.Kind"
+    package.enums.append(enum)
+    return package
+
+
+class TestPageLayout(unittest.TestCase):
+
+    def test_package_layout_has_no_type_pages(self):
+        package = build_package_with_types("foo")
+        self.assertEqual(layout_type_pages([package], SableConfig("nonexistent.toml")), {})
+        self.assertEqual(package.type_pages, {})
+
+    def test_one_type_per_page(self):
+        sable_config = SableConfig("nonexistent.toml")
+        sable_config.page_layout = PageLayout.SPLIT
+        package = build_package_with_types("foo")
+
+        type_pages = layout_type_pages([package], sable_config)
+
+        self.assertEqual(list(type_pages.keys()), ["foo-Api.html", "foo-Foo.html", "foo-Foo.Nested.html", "foo-Kind.html"])
+        self.assertEqual(package.type_pages["foo.Foo.Nested"], "foo-Foo.Nested.html")
+        self.assertNotIn("foo.Foo.MapEntry", package.type_pages)
+        self.assertEqual([m.full_name for m in type_pages["foo-Foo.html"].messages], ["foo.Foo"])
+
+    def test_chunks_of_types(self):
+        sable_config = SableConfig("nonexistent.toml")
+        sable_config.page_layout = PageLayout.SPLIT
+        sable_config.types_per_page = 3
+        package = build_package_with_types("")
+        sable_context = SableContext([package], package.messages, package.enums, sable_config)
+
+        render_state = RenderState(sable_config, sable_context, Environment(), None, "")
+
+        self.assertEqual(list(render_state.type_pages.keys()), ["__default-1.html", "__default-2.html"])
+        self.assertEqual([s.full_name for s in render_state.type_pages["__default-1.html"].services], [".Api"])
+        self.assertEqual([e.full_name for e in render_state.type_pages["__default-2.html"].enums], [".Kind"])
+        self.assertEqual(
+            [(p.output_file, p.kind) for p in collect_pages(render_state)][:3],
+            [("__default.html", "package"), ("__default-1.html", "types"), ("__default-2.html", "types")])
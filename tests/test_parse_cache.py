@@ -0,0 +1,121 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from google.protobuf.descriptor_pb2 import FieldDescriptorProto, FileDescriptorSet
+
+from sabledocs.comments_parser import CommentsParser
+from sabledocs.parse_cache import clear_parse_cache, list_entries, parse_cache_key
+from sabledocs.proto_descriptor_parser import parse_proto_descriptor
+from sabledocs.sable_config import SableConfig
+
+
+def build_descriptor(package_count: int) -> bytes:
+    # Every package references the next one, so the model has a long chain of references between the packages.
+    fds = FileDescriptorSet()
+    for i in range(package_count):
+        file = fds.file.add(name=f"p{i}.proto", package=f"p{i}")
+        message = file.message_type.add(name="Foo")
+        if i + 1 < package_count:
+            message.field.add(
+                name="next", number=1, label=FieldDescriptorProto.LABEL_OPTIONAL,
+                type=FieldDescriptorProto.TYPE_MESSAGE, type_name=f".p{i + 1}.Foo")
+    return fds.SerializeToString()
+
+
+def parse(sable_config: SableConfig, descriptor_bytes: bytes):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        sable_context = parse_proto_descriptor(sable_config, descriptor_bytes)
+    return (sable_context, output.getvalue())
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.sable_config = SableConfig()
+        self.sable_config.comments_parser = CommentsParser()
+        self.sable_config.parse_cache_dir = self.cache_dir.name
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_model_is_loaded_from_the_cache(self):
+        descriptor_bytes = build_descriptor(2000)
+        (parsed, output) = parse(self.sable_config, descriptor_bytes)
+        self.assertNotIn("Loaded the parsed model", output)
+        self.assertNotIn("WARNING", output)
+
+        (loaded, output) = parse(self.sable_config, descriptor_bytes)
+        self.assertIn("Loaded the parsed model", output)
+        self.assertIs(loaded.sable_config, self.sable_config)
+        self.assertEqual([p.name for p in loaded.packages], [p.name for p in parsed.packages])
+
+        # The references between the items are restored.
+        packages_by_name = {p.name: p for p in loaded.packages}
+        message = loaded.find_type("p1.Foo")
+        self.assertIs(message.package, packages_by_name["p1"])
+        self.assertIn(message, packages_by_name["p1"].messages)
+        self.assertIs(message.fields[0].package, packages_by_name["p2"])
+        self.assertIs(loaded.find_usages("p2.Foo")[0].owner, message)
+        # The values derived from the fields are loaded with them, not computed again on every access.
+        self.assertIs(message.non_oneof_fields, message.non_oneof_fields)
+
+    def test_key_depends_on_the_parse_options_only(self):
+        descriptor_bytes = build_descriptor(2)
+        key = parse_cache_key(self.sable_config, descriptor_bytes)
+
+        self.sable_config.output_dir = "other"
+        self.sable_config.module_title = "Other"
+        self.assertEqual(parse_cache_key(self.sable_config, descriptor_bytes), key)
+
+        self.sable_config.hidden_packages = ["p1"]
+        self.assertNotEqual(parse_cache_key(self.sable_config, descriptor_bytes), key)
+        self.sable_config.hidden_packages = []
+        self.assertNotEqual(parse_cache_key(self.sable_config, build_descriptor(3)), key)
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix=".py", delete=False) as fh:
+            fh.write("class CustomCommentsParser(CommentsParser): pass\n")
+        try:
+            self.sable_config.comments_parser_file = fh.name
+            self.assertNotEqual(parse_cache_key(self.sable_config, descriptor_bytes), key)
+        finally:
+            os.remove(fh.name)
+
+    def test_unreadable_entry_is_parsed_again(self):
+        descriptor_bytes = build_descriptor(2)
+        parse(self.sable_config, descriptor_bytes)
+        [(path, _)] = list_entries(self.cache_dir.name)
+        with open(path, 'wb') as fh:
+            fh.write(b"garbage")
+
+        (sable_context, output) = parse(self.sable_config, descriptor_bytes)
+        self.assertIn("WARNING: The parse cache file", output)
+        self.assertEqual(len(sable_context.all_messages), 2)
+
+        (_, output) = parse(self.sable_config, descriptor_bytes)
+        self.assertIn("Loaded the parsed model", output)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.sable_config.parse_cache_max_mb = 0
+        parse(self.sable_config, build_descriptor(2))
+        parse(self.sable_config, build_descriptor(3))
+
+        # The entry of the last build is kept, even though it's larger than the limit.
+        [(path, _)] = list_entries(self.cache_dir.name)
+        self.assertTrue(path.endswith(parse_cache_key(self.sable_config, build_descriptor(3)) + ".pickle"))
+
+    def test_cache_is_cleared(self):
+        parse(self.sable_config, build_descriptor(2))
+        parse(self.sable_config, build_descriptor(3))
+
+        self.assertEqual(clear_parse_cache(self.cache_dir.name), 2)
+        self.assertEqual(list_entries(self.cache_dir.name), [])
+        self.assertEqual(clear_parse_cache(os.path.join(self.cache_dir.name, "missing")), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from sabledocs.output_writer import OutputDirectoryWriter
+from sabledocs.precompress import precompress_output
+from sabledocs.sable_config import SableConfig
+
+
+class TestPrecompress(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = self.temp_dir.name
+        with open(os.path.join(self.output_dir, "index.html"), 'w') as fh:
+            fh.write("<html>" + "<p>Hello</p>" * 100 + "</html>")
+        with open(os.path.join(self.output_dir, "image.png"), 'wb') as fh:
+            fh.write(b"not compressible")
+
+        self.sable_config = SableConfig("nonexistent.toml")
+        self.sable_config.output_dir = self.output_dir
+        self.sable_config.precompress = ["gzip"]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def precompress(self):
+        writer = OutputDirectoryWriter(self.output_dir)
+        for f in ["index.html", "image.png"]:
+            if os.path.exists(os.path.join(self.output_dir, f)):
+                writer.keep(f)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            precompress_output(self.sable_config, writer)
+        with contextlib.redirect_stdout(io.StringIO()):
+            writer.finish()
+        return output.getvalue()
+
+    def test_sidecars_are_written_for_changed_files(self):
+        self.assertIn("1 files compressed, 0 unchanged", self.precompress())
+
+        index_path = os.path.join(self.output_dir, "index.html")
+        with gzip.open(index_path + ".gz", 'rb') as fh, open(index_path, 'rb') as original:
+            self.assertEqual(fh.read(), original.read())
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "image.png.gz")))
+
+        self.assertIn("0 files compressed, 1 unchanged", self.precompress())
+
+        os.remove(index_path)
+        self.precompress()
+        self.assertFalse(os.path.exists(index_path + ".gz"))
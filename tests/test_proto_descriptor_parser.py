@@ -1,7 +1,23 @@
 import unittest
 
-from sabledocs.sable_config import RepositoryType
-from sabledocs.proto_descriptor_parser import build_source_code_url
+import contextlib
+import io
+
+from google.protobuf.descriptor_pb2 import DescriptorProto, FieldDescriptorProto, FileDescriptorProto
+
+from sabledocs.comments_parser import CommentsParser
+from sabledocs.proto_model import Package, SableContext, Service, ServiceMethod
+from sabledocs.sable_config import RepositoryType, SableConfig
+from sabledocs.proto_descriptor_parser import (
+    COMMENT_MESSAGE_INDEX,
+    PackageIndex,
+    ParseContext,
+    PACKAGE_PATH,
+    add_package_references,
+    build_location_map,
+    build_source_code_url,
+    parse_messages,
+    prune_descriptor_files)
 
 class TestProtoDescriptorParser(unittest.TestCase):
 
@@ -130,3 +146,204 @@ class TestProtoDescriptorParser(unittest.TestCase):
         expected = 'https://git.example.com/-/blob/main/myrepodir/foo/bar.proto#L41'
 
         self.assertEqual(got, expected)
+
+
+class TestParseFieldTypeIndex(unittest.TestCase):
+
+    def test_map_entry_is_resolved_from_type_index(self):
+        config = SableConfig("nonexistent.toml")
+        config.comments_parser = CommentsParser()
+        package = Package()
+        package.name = "foo"
+        types = {}
+        ctx = ParseContext.New(config, package, "foo.proto", {}, types)
+
+        message = DescriptorProto(name="Msg")
+        entry = message.nested_type.add(name="LabelsEntry")
+        entry.options.map_entry = True
+        entry.field.add(name="key", number=1, type=FieldDescriptorProto.Type.TYPE_STRING)
+        entry.field.add(name="value", number=2, type=FieldDescriptorProto.Type.TYPE_INT32)
+        message.field.add(
+            name="labels",
+            number=1,
+            type=FieldDescriptorProto.Type.TYPE_MESSAGE,
+            type_name=".foo.Msg.LabelsEntry",
+            label=FieldDescriptorProto.Label.LABEL_REPEATED)
+
+        parse_messages([message], ctx.WithPath(COMMENT_MESSAGE_INDEX), None, "")
+
+        self.assertEqual(set(types.keys()), {"foo.Msg", "foo.Msg.LabelsEntry"})
+        labels = types["foo.Msg"].fields[0]
+        self.assertEqual(labels.full_type, "map<string, int32>")
+        self.assertEqual(labels.label, "")
+
+        sable_context = SableContext([package], package.messages, [], config, types)
+        self.assertIs(sable_context.find_type(".foo.Msg"), types["foo.Msg"])
+        self.assertIsNone(sable_context.find_type("foo.Missing"))
+
+    def test_usages_are_indexed(self):
+        config = SableConfig("nonexistent.toml")
+        config.comments_parser = CommentsParser()
+        package = Package()
+        package.name = "foo"
+        types = {}
+        ctx = ParseContext.New(config, package, "foo.proto", {}, types)
+
+        item = DescriptorProto(name="Item")
+        message = DescriptorProto(name="Msg")
+        entry = message.nested_type.add(name="ItemsByIdEntry")
+        entry.options.map_entry = True
+        entry.field.add(name="key", number=1, type=FieldDescriptorProto.Type.TYPE_STRING)
+        entry.field.add(name="value", number=2, type=FieldDescriptorProto.Type.TYPE_MESSAGE, type_name=".foo.Item")
+        message.field.add(name="first_item", number=1, type=FieldDescriptorProto.Type.TYPE_MESSAGE, type_name=".foo.Item")
+        message.field.add(
+            name="items_by_id",
+            number=2,
+            type=FieldDescriptorProto.Type.TYPE_MESSAGE,
+            type_name=".foo.Msg.ItemsByIdEntry",
+            label=FieldDescriptorProto.Label.LABEL_REPEATED)
+        parse_messages([item, message], ctx.WithPath(COMMENT_MESSAGE_INDEX), None, "")
+
+        service = Service()
+        service.full_name = "foo.Api"
+        method = ServiceMethod()
+        method.name = "GetItem"
+        method.request.full_type = "foo.Msg"
+        method.response.full_type = "foo.Item"
+        service.methods.append(method)
+
+        used_by = add_package_references(package.messages, [service], [package], [], ctx.map_fields)
+        sable_context = SableContext([package], package.messages, [], config, types, used_by)
+
+        self.assertEqual(
+            sorted((u.kind, u.owner.full_name, u.member.name) for u in sable_context.find_usages(".foo.Item")),
+            [("field", "foo.Msg", "first_item"), ("field", "foo.Msg", "items_by_id"), ("response", "foo.Api", "GetItem")])
+        self.assertEqual([(u.kind, u.package.name) for u in sable_context.find_usages("foo.Msg")], [("request", "foo")])
+        self.assertEqual(sable_context.find_usages("foo.Msg.ItemsByIdEntry"), [])
+
+    def test_usages_of_map_entries_do_not_depend_on_their_names(self):
+        config = SableConfig("nonexistent.toml")
+        config.comments_parser = CommentsParser()
+        package = Package()
+        package.name = "foo"
+        types = {}
+        ctx = ParseContext.New(config, package, "foo.proto", {}, types)
+
+        item = DescriptorProto(name="Item")
+        message = DescriptorProto(name="Msg")
+        # The entry is not named after the field, like protoc would name it.
+        entry = message.nested_type.add(name="CustomEntry")
+        entry.options.map_entry = True
+        entry.field.add(name="key", number=1, type=FieldDescriptorProto.Type.TYPE_STRING)
+        entry.field.add(name="value", number=2, type=FieldDescriptorProto.Type.TYPE_MESSAGE, type_name=".foo.Item")
+        message.field.add(
+            name="items_2d",
+            number=1,
+            type=FieldDescriptorProto.Type.TYPE_MESSAGE,
+            type_name=".foo.Msg.CustomEntry",
+            label=FieldDescriptorProto.Label.LABEL_REPEATED)
+        parse_messages([item, message], ctx.WithPath(COMMENT_MESSAGE_INDEX), None, "")
+
+        used_by = add_package_references(package.messages, [], [package], [], ctx.map_fields)
+
+        self.assertEqual([(u.owner.full_name, u.member.name) for u in used_by["foo.Item"]], [("foo.Msg", "items_2d")])
+
+
+class TestPackageIndex(unittest.TestCase):
+
+    def build_index(self, names, hidden_packages):
+        packages = []
+        for name in names:
+            package = Package()
+            package.name = name
+            packages.append(package)
+
+        return PackageIndex(packages, hidden_packages)
+
+    def test_longest_matching_package_is_found(self):
+        index = self.build_index(["foo", "foo.bar"], [])
+
+        self.assertEqual(index.find_package("foo.bar.Baz").name, "foo.bar")
+        self.assertEqual(index.find_package("foo.Baz").name, "foo")
+        self.assertEqual(index.find_package("foo.Baz.Nested").name, "foo")
+        self.assertIsNone(index.find_package("qux.Baz"))
+
+    def test_packages_are_matched_on_segment_boundaries(self):
+        index = self.build_index(["foo"], ["foo"])
+
+        self.assertIsNone(index.find_package("foobar.X"))
+        self.assertFalse(index.is_hidden("foobar.X"))
+        self.assertTrue(index.is_hidden("foo.X"))
+        self.assertTrue(index.is_hidden("foo.sub.X"))
+
+    def test_default_package_matches_every_type(self):
+        index = self.build_index(["", "foo"], [])
+
+        self.assertEqual(index.find_package("Baz").name, "")
+        self.assertEqual(index.find_package("qux.Baz").name, "")
+        self.assertEqual(index.find_package("foo.Baz").name, "foo")
+
+
+def build_file(name, package, message_name, field_type_name=None):
+    file = FileDescriptorProto(name=name, package=package)
+    message = file.message_type.add(name=message_name)
+    message.nested_type.add(name="Nested")
+    if field_type_name is not None:
+        message.field.add(name="ref", number=1, type=FieldDescriptorProto.Type.TYPE_MESSAGE, type_name=field_type_name)
+    file.source_code_info.location.add(path=[4, 0], leading_comments=f" {message_name} comment")
+    return file
+
+
+class TestLocationMap(unittest.TestCase):
+
+    def test_comments_are_looked_up_by_path(self):
+        file = FileDescriptorProto(name="foo.proto", package="foo")
+        file.source_code_info.location.add(path=[2], span=[2, 0, 12], leading_comments=" The package. \n Second line.\n")
+        file.source_code_info.location.add(path=[4, 0], span=[4, 0, 6, 1], leading_comments=" Leading", trailing_comments=" Trailing ")
+        file.source_code_info.location.add(path=[4, 0, 1], span=[4, 8, 11], leading_comments=" Token")
+        locations = build_location_map(file.source_code_info)
+
+        config = SableConfig("nonexistent.toml")
+        config.ignore_comment_lines_containing = ["Second"]
+        ctx = ParseContext.New(config, Package(), "foo.proto", locations, {})
+        self.assertEqual(ctx.GetComments(PACKAGE_PATH), "The package.")
+
+        message_ctx = ctx.WithPath(COMMENT_MESSAGE_INDEX).ExtendPath(0)
+        self.assertEqual(message_ctx.path, (4, 0))
+        self.assertEqual(message_ctx.GetComments(), "Leading\n\nTrailing")
+        self.assertEqual(message_ctx.GetLineNumber(), 4)
+
+        # The locations of the individual tokens are not indexed, since they are never looked up.
+        self.assertIsNone(locations.get((4, 0, 1)))
+        self.assertEqual(message_ctx.ExtendPath(2, 0).GetComments(), "")
+        self.assertEqual(message_ctx.ExtendPath(2, 0).GetLineNumber(), 0)
+
+
+class TestPruneDescriptorFiles(unittest.TestCase):
+
+    def test_referenced_packages_are_included_transitively(self):
+        files = [
+            build_file("team/a.proto", "team.a", "A", ".shared.Money"),
+            build_file("shared/money.proto", "shared", "Money", ".base.Id.Nested"),
+            build_file("base/id.proto", "base", "Id"),
+            build_file("other/x.proto", "other", "X", ".team.a.A"),
+            build_file("other/y.proto", "other", "Y")
+        ]
+        service = files[0].service.add(name="Api")
+        service.method.add(name="Get", input_type=".team.a.A", output_type=".extra.Response")
+        files.append(build_file("extra/response.proto", "extra", "Response"))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            kept = prune_descriptor_files(files, ["team.*"])
+
+        self.assertEqual([f.name for f in kept], ["team/a.proto", "shared/money.proto", "base/id.proto", "extra/response.proto"])
+        self.assertIn("Including 4 of 5 packages, pruned 2 of 6 files, 4 types and 2 comments.", output.getvalue())
+
+    def test_nothing_matches(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            kept = prune_descriptor_files([build_file("a.proto", "a", "A")], ["b"])
+
+        self.assertEqual(kept, [])
+        self.assertIn("WARNING", output.getvalue())
@@ -0,0 +1,54 @@
+import unittest
+
+from sabledocs.proto_model import Message, MessageField, model_vars
+
+
+def create_field(name, oneof_name=None, default_value=''):
+    field = MessageField()
+    field.name = name
+    field.oneof_name = oneof_name
+    field.default_value = default_value
+    return field
+
+
+class TestMessage(unittest.TestCase):
+
+    def test_derived_field_values(self):
+        message = Message()
+        message.fields = [create_field("a"), create_field("b", oneof_name="choice"), create_field("c", default_value="1")]
+
+        self.assertEqual(["a", "c"], [f.name for f in message.non_oneof_fields])
+        self.assertTrue(message.has_any_fields_with_default_value)
+
+        message.finalize()
+        self.assertEqual(["a", "c"], [f.name for f in message.non_oneof_fields])
+        self.assertIs(message.non_oneof_fields, message.non_oneof_fields)
+
+    def test_derived_field_values_follow_the_assigned_fields(self):
+        message = Message()
+        message.fields = [create_field("a", default_value="1")]
+        message.finalize()
+        self.assertTrue(message.has_any_fields_with_default_value)
+
+        message.fields = [create_field("b"), create_field("c", oneof_name="choice")]
+        self.assertFalse(message.has_any_fields_with_default_value)
+        self.assertEqual(["b"], [f.name for f in message.non_oneof_fields])
+
+        # The frozen fields can't be changed in place.
+        message.finalize()
+        with self.assertRaises(AttributeError):
+            message.fields.append(create_field("d"))
+
+    def test_model_vars_returns_the_public_attributes(self):
+        message = Message()
+        message.name = "Foo"
+
+        attributes = model_vars(message)
+
+        self.assertEqual("Foo", attributes["name"])
+        self.assertIn("fields", attributes)
+        self.assertNotIn("_non_oneof_fields", attributes)
+
+    def test_model_items_have_no_instance_dict(self):
+        with self.assertRaises(AttributeError):
+            MessageField().unknown_attribute = 1
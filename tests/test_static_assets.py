@@ -0,0 +1,89 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+
+from sabledocs.output_writer import OutputDirectoryWriter
+from sabledocs.sable_config import SableConfig
+from sabledocs.static_assets import static_asset_urls, sync_static_content
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as fh:
+        fh.write(content)
+
+
+def read_file(path):
+    with open(path) as fh:
+        return fh.read()
+
+
+class SlowOutputDirectoryWriter(OutputDirectoryWriter):
+    def _write(self, output_file: str, content: bytes):
+        time.sleep(0.2)
+        super()._write(output_file, content)
+
+
+class TestStaticAssets(unittest.TestCase):
+
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+
+        write_file("template/static/style.css", "body {}")
+        write_file("static/sub/image.txt", "image")
+        write_file("static/index.html", "user index")
+
+        self.sable_config = SableConfig("nonexistent.toml")
+        self.sable_config.output_dir = "output"
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        self.temp_dir.cleanup()
+
+    def sync(self):
+        # Like in a build, the generated pages are written before the static content, and the writer is finished after it.
+        writer = OutputDirectoryWriter("output")
+        writer.write("index.html", b"generated index")
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            sync_static_content(self.sable_config, "template", writer)
+        with contextlib.redirect_stdout(io.StringIO()):
+            writer.finish()
+        return output.getvalue()
+
+    def test_only_changed_files_are_copied(self):
+        self.assertIn("2 files copied, 0 unchanged, 0 removed", self.sync())
+        self.assertEqual(read_file("output/static/style.css"), "body {}")
+        self.assertEqual(read_file("output/sub/image.txt"), "image")
+        # Files from the static folder don't overwrite the generated pages.
+        self.assertEqual(read_file("output/index.html"), "generated index")
+
+        self.assertIn("0 files copied, 2 unchanged, 0 removed", self.sync())
+
+        write_file("template/static/style.css", "body { color: red }")
+        os.remove("static/sub/image.txt")
+        self.assertIn("1 files copied, 0 unchanged, 1 removed", self.sync())
+        self.assertEqual(read_file("output/static/style.css"), "body { color: red }")
+        self.assertFalse(os.path.exists("output/sub/image.txt"))
+
+    def test_fingerprinted_assets(self):
+        self.sable_config.fingerprint_static_assets = True
+        asset_urls = static_asset_urls(self.sable_config, "template")
+        self.sync()
+
+        fingerprinted_url = asset_urls["static/style.css"]
+        self.assertRegex(fingerprinted_url, r"^static/style\.[0-9a-f]{10}\.css$")
+        self.assertEqual(read_file(os.path.join("output", fingerprinted_url)), "body {}")
+        self.assertFalse(os.path.exists("output/static/style.css"))
+
+    def test_queued_pages_are_not_overwritten(self):
+        writer = SlowOutputDirectoryWriter("output", queue_size=4)
+        writer.write("index.html", b"generated index")
+        with contextlib.redirect_stdout(io.StringIO()):
+            sync_static_content(self.sable_config, "template", writer)
+            writer.finish()
+        self.assertEqual(read_file("output/index.html"), "generated index")
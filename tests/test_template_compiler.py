@@ -0,0 +1,22 @@
+import os
+import tempfile
+import unittest
+
+from jinja2 import Environment, ModuleLoader, select_autoescape
+
+from sabledocs.template_compiler import COMPILED_MANIFEST_FILE_NAME, compile_default_templates, load_precompiled_templates
+
+
+class TestTemplateCompiler(unittest.TestCase):
+
+    def test_compiled_templates_can_be_loaded(self):
+        with tempfile.TemporaryDirectory() as target_dir:
+            compile_default_templates(target_dir)
+
+            self.assertTrue(os.path.exists(os.path.join(target_dir, COMPILED_MANIFEST_FILE_NAME)))
+            jinja_env = Environment(loader=ModuleLoader(target_dir), autoescape=select_autoescape())
+            self.assertIsNotNone(jinja_env.get_template("package.html"))
+
+    def test_precompiled_templates_are_only_used_for_the_default_template(self):
+        with tempfile.TemporaryDirectory() as template_dir:
+            self.assertIsNone(load_precompiled_templates(template_dir))